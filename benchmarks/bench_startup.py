@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the HTTP (src/main.py) and stdio (src/server.py)
+transports.
+
+Each run starts a fresh server process and measures the time from spawn until
+the first ``initialize`` is answered, then the latency of the first
+``tools/call`` (which now pays for importing the tool's module). Runs report
+min/p50/p95, and the results are written as JSON. With a baseline file the
+run fails (exit status 1) if p50 time-to-initialize rises by more than the
+tolerance.
+
+    python benchmarks/bench_startup.py --transport both --runs 20
+    python benchmarks/bench_startup.py --save-baseline benchmarks/startup_baseline.json
+    python benchmarks/bench_startup.py --baseline benchmarks/startup_baseline.json
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_transports import free_port, percentile
+
+INITIALIZE = {"jsonrpc": "2.0", "id": 1, "method": "initialize",
+              "params": {"protocolVersion": "2024-11-05", "capabilities": {},
+                         "clientInfo": {"name": "bench", "version": "1.0"}}}
+FIRST_CALL = {"jsonrpc": "2.0", "id": 2, "method": "tools/call",
+              "params": {"name": "greet", "arguments": {"name": "bench"}}}
+
+
+def http_cold_start(env: Dict[str, str], timeout: float = 15) -> Tuple[float, float]:
+    """Seconds to the first initialize reply and for the first tools/call"""
+    port = free_port()
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "src", "main.py")],
+        cwd=ROOT, env={**env, "HOST": "127.0.0.1", "PORT": str(port)},
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while True:
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+                conn.request("POST", "/", json.dumps(INITIALIZE), {"Content-Type": "application/json"})
+                conn.getresponse().read()
+                break
+            except OSError:
+                if proc.poll() is not None:
+                    raise SystemExit("HTTP server exited during startup")
+                if time.perf_counter() - started > timeout:
+                    raise SystemExit("HTTP server did not become ready")
+                time.sleep(0.002)
+        ready = time.perf_counter() - started
+        call_started = time.perf_counter()
+        conn.request("POST", "/", json.dumps(FIRST_CALL), {"Content-Type": "application/json"})
+        conn.getresponse().read()
+        first_call = time.perf_counter() - call_started
+        conn.close()
+        return ready, first_call
+    finally:
+        proc.terminate()
+        proc.wait(15)
+
+
+def stdio_cold_start(env: Dict[str, str], timeout: float = 15) -> Tuple[float, float]:
+    """Seconds to the first initialize reply and for the first tools/call"""
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "src.server"], cwd=ROOT, env=env,
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+    )
+    try:
+        def roundtrip(message):
+            proc.stdin.write(json.dumps(message).encode() + b"\n")
+            proc.stdin.flush()
+            line = proc.stdout.readline()
+            if not line:
+                raise SystemExit("stdio server exited during startup")
+            return json.loads(line)
+        roundtrip(INITIALIZE)
+        ready = time.perf_counter() - started
+        proc.stdin.write(b'{"jsonrpc": "2.0", "method": "notifications/initialized"}\n')
+        call_started = time.perf_counter()
+        roundtrip(FIRST_CALL)
+        return ready, time.perf_counter() - call_started
+    finally:
+        proc.stdin.close()
+        try:
+            proc.wait(timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def summarize(transport: str, ready: List[float], first_call: List[float]) -> Dict[str, Any]:
+    ready, first_call = sorted(ready), sorted(first_call)
+    return {
+        "transport": transport,
+        "runs": len(ready),
+        "initialize_min_ms": round(ready[0] * 1000, 3),
+        "initialize_p50_ms": round(percentile(ready, 50) * 1000, 3),
+        "initialize_p95_ms": round(percentile(ready, 95) * 1000, 3),
+        "first_call_p50_ms": round(percentile(first_call, 50) * 1000, 3),
+    }
+
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Transports whose p50 time-to-initialize regressed beyond ``tolerance``"""
+    previous = {r["transport"]: r for r in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        base = previous.get(result["transport"])
+        if base and result["initialize_p50_ms"] > base["initialize_p50_ms"] * (1 + tolerance):
+            regressions.append(f"{result['transport']}: initialize p50 "
+                               f"{base['initialize_p50_ms']}ms -> {result['initialize_p50_ms']}ms")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transport", choices=["http", "stdio", "both"], default="both")
+    parser.add_argument("--runs", type=int, default=10, help="cold starts per transport")
+    parser.add_argument("--output", default="bench_startup.json")
+    parser.add_argument("--baseline", help="fail if results regress against this file")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative regression")
+    parser.add_argument("--save-baseline", help="also write the results here as the new baseline")
+    args = parser.parse_args(argv)
+
+    env = {**os.environ, "DEBUG": "false", "PREFORK": "false",
+           "PYTHONPATH": os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")]))}
+    runners = {"http": http_cold_start, "stdio": stdio_cold_start}
+    transports = list(runners) if args.transport == "both" else [args.transport]
+    results = []
+    failed = []
+    for transport in transports:
+        ready, first_call = [], []
+        try:
+            for _ in range(args.runs):
+                r, c = runners[transport](env)
+                ready.append(r)
+                first_call.append(c)
+        except (SystemExit, OSError) as e:
+            # Report the failure and still write the other transports' results
+            failed.append({"transport": transport, "error": str(e)})
+            print(f"{transport} transport failed: {e}", file=sys.stderr)
+            continue
+        results.append(summarize(transport, ready, first_call))
+        print(json.dumps(results[-1]), file=sys.stderr)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "runs": args.runs,
+            "timestamp": time.time(),
+        },
+        "results": results,
+        "failed": failed,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    # A partial run is no baseline
+    if args.save_baseline and not failed:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    print(f"{'transport':<10}{'runs':>6}{'init min':>10}{'init p50':>10}{'init p95':>10}{'call p50':>10}")
+    for r in results:
+        print(f"{r['transport']:<10}{r['runs']:>6}{r['initialize_min_ms']:>10}{r['initialize_p50_ms']:>10}"
+              f"{r['initialize_p95_ms']:>10}{r['first_call_p50_ms']:>10}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
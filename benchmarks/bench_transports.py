@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+"""
+Throughput/latency benchmark for the HTTP (src/main.py) and stdio (src/server.py)
+transports.
+
+Each transport is started as a local subprocess and driven with a weighted mix
+of requests at fixed concurrency levels. Every level reports requests/second
+and p50/p95/p99 latency, and the results are written as JSON. When a baseline
+file is given, the run fails (exit status 1) if any level's throughput drops or
+its p99 latency rises by more than the tolerance.
+
+    python benchmarks/bench_transports.py --transport http --concurrency 1,8,32
+    python benchmarks/bench_transports.py --save-baseline benchmarks/baseline.json
+    python benchmarks/bench_transports.py --baseline benchmarks/baseline.json
+
+Mix weights are ``name=weight`` pairs over: initialize, tools/list, call
+(small calculator/greet calls), batch (one array of --batch-size calls,
+pipelined as separate messages over stdio) and large (text_analyzer on
+--large-bytes of text). The stdio session is initialized once, so initialize
+is left out of its mix; a second initialize on a live MCP session is rejected.
+
+A transport that fails to start is reported and the other's results are still
+written, with exit status 1. Any request that errors also fails the run, and
+such a run is never saved as a baseline.
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import threading
+import copy
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MIX = "initialize=1,tools/list=2,call=6,batch=1,large=0.2"
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    unknown = set(mix) - {"initialize", "tools/list", "call", "batch", "large"}
+    if unknown:
+        raise SystemExit(f"Unknown mix entries: {', '.join(sorted(unknown))}")
+    return mix
+
+
+class Workload:
+    """Builds reproducible request payloads for the configured mix"""
+
+    def __init__(self, mix: Dict[str, float], batch_size: int, large_bytes: int, seed: int):
+        self.names = list(mix)
+        self.weights = [mix[name] for name in self.names]
+        self.batch_size = batch_size
+        self.large_text = ("The quick brown fox jumps over the lazy dog. " * (large_bytes // 45 + 1))[:large_bytes]
+        self.seed = seed
+
+    def without(self, kind: str) -> "Workload":
+        """Copy of this workload that never builds ``kind`` requests"""
+        workload = copy.copy(self)
+        pairs = [(n, w) for n, w in zip(self.names, self.weights) if n != kind and w > 0]
+        if not pairs:
+            raise SystemExit(f"Mix has nothing left without {kind}")
+        workload.names, workload.weights = [n for n, _ in pairs], [w for _, w in pairs]
+        return workload
+
+    def rng(self, worker: int) -> random.Random:
+        return random.Random(self.seed * 1000 + worker)
+
+    def build(self, rng: random.Random, next_id) -> Any:
+        kind = rng.choices(self.names, self.weights)[0]
+        if kind == "initialize":
+            return {"jsonrpc": "2.0", "id": next_id(), "method": "initialize",
+                    "params": {"protocolVersion": "2024-11-05", "capabilities": {},
+                               "clientInfo": {"name": "bench", "version": "1.0"}}}
+        if kind == "tools/list":
+            return {"jsonrpc": "2.0", "id": next_id(), "method": "tools/list"}
+        if kind == "batch":
+            return [self._small_call(rng, next_id()) for _ in range(self.batch_size)]
+        if kind == "large":
+            return {"jsonrpc": "2.0", "id": next_id(), "method": "tools/call",
+                    "params": {"name": "text_analyzer", "arguments": {"text": self.large_text}}}
+        return self._small_call(rng, next_id())
+
+    @staticmethod
+    def _small_call(rng: random.Random, request_id: int) -> Dict[str, Any]:
+        if rng.random() < 0.5:
+            arguments = {"name": f"user{rng.randint(0, 999)}"}
+            return {"jsonrpc": "2.0", "id": request_id, "method": "tools/call",
+                    "params": {"name": "greet", "arguments": arguments}}
+        arguments = {"operation": rng.choice(["add", "subtract", "multiply", "divide"]),
+                     "a": rng.randint(-1000, 1000), "b": rng.randint(1, 1000)}
+        return {"jsonrpc": "2.0", "id": request_id, "method": "tools/call",
+                "params": {"name": "calculator", "arguments": arguments}}
+
+
+def is_error(reply: Any) -> bool:
+    if isinstance(reply, list):
+        return any(is_error(item) for item in reply)
+    return not isinstance(reply, dict) or "error" in reply
+
+
+def summarize(transport: str, concurrency: int, latencies: List[float], errors: int,
+              elapsed: float) -> Dict[str, Any]:
+    latencies.sort()
+    return {
+        "transport": transport,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+# HTTP transport
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_http_server(env: Dict[str, str]) -> Tuple[subprocess.Popen, int]:
+    port = free_port()
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "src", "main.py")],
+        cwd=ROOT, env={**env, "HOST": "127.0.0.1", "PORT": str(port)},
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("POST", "/", json.dumps({"jsonrpc": "2.0", "id": 0, "method": "initialize"}))
+            conn.getresponse().read()
+            conn.close()
+            return proc, port
+        except OSError:
+            if proc.poll() is not None:
+                raise SystemExit("HTTP server exited during startup")
+            time.sleep(0.05)
+    proc.kill()
+    raise SystemExit("HTTP server did not become ready")
+
+
+def run_http_level(port: int, workload: Workload, concurrency: int, requests: int,
+                   warmup: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors = [0]
+    lock = threading.Lock()
+    counter = iter(range(1, 1 << 62))
+    per_worker = max(1, requests // concurrency)
+    ready = threading.Barrier(concurrency + 1)
+
+    def worker(index: int):
+        rng = workload.rng(index)
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        local, local_errors = [], 0
+        for n in range(warmup + per_worker):
+            if n == warmup:
+                ready.wait()
+            body = json.dumps(workload.build(rng, lambda: next(counter))).encode()
+            started = time.perf_counter()
+            conn.request("POST", "/", body, {"Content-Type": "application/json"})
+            response = conn.getresponse()
+            data = response.read()
+            took = time.perf_counter() - started
+            if n < warmup:
+                continue
+            local.append(took)
+            if response.status not in (200, 202) or (data and is_error(json.loads(data))):
+                local_errors += 1
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    # Timing starts once every worker has finished its warmup
+    ready.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return summarize("http", concurrency, latencies, errors[0], elapsed)
+
+
+# stdio transport
+
+class StdioClient:
+    """Pipelines JSON-RPC messages over a server's stdin/stdout"""
+
+    def __init__(self, env: Dict[str, str]):
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "src.server"], cwd=ROOT, env=env,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        )
+        self._pending: Dict[Any, Any] = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        threading.Thread(target=self._read_loop, daemon=True).start()
+
+    def _read_loop(self):
+        for line in self.proc.stdout:
+            try:
+                reply = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(reply, dict):
+                continue
+            key = reply.get("id")
+            with self._lock:
+                waiter = self._pending.pop(key, None)
+            if waiter is not None:
+                waiter[1] = reply
+                waiter[0].set()
+        with self._lock:
+            for waiter in self._pending.values():
+                waiter[0].set()
+
+    def send(self, message: Any, timeout: float = 60) -> Optional[Any]:
+        """Send a request (or batch) and wait for its reply.
+
+        The SDK's stdio transport takes one message per line and no JSON-RPC
+        batches, so a batch is pipelined as its individual requests and the
+        replies are returned together.
+        """
+        messages = message if isinstance(message, list) else [message]
+        waiters = []
+        for item in messages:
+            if item.get("id") is not None:
+                waiters.append([threading.Event(), None])
+                with self._lock:
+                    self._pending[item["id"]] = waiters[-1]
+        with self._write_lock:
+            self.proc.stdin.write(b"".join(json.dumps(item).encode() + b"\n" for item in messages))
+            self.proc.stdin.flush()
+        if not waiters:
+            return None
+        give_up = time.monotonic() + timeout
+        for waiter in waiters:
+            waiter[0].wait(max(0.0, give_up - time.monotonic()))
+        if not isinstance(message, list):
+            return waiters[0][1]
+        replies = [waiter[1] for waiter in waiters]
+        return None if None in replies else replies
+
+    def close(self):
+        self.proc.stdin.close()
+        try:
+            self.proc.wait(5)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+
+
+def start_stdio_server(env: Dict[str, str]) -> StdioClient:
+    client = StdioClient(env)
+    reply = client.send({"jsonrpc": "2.0", "id": "init", "method": "initialize",
+                         "params": {"protocolVersion": "2024-11-05", "capabilities": {},
+                                    "clientInfo": {"name": "bench", "version": "1.0"}}}, timeout=15)
+    if reply is None:
+        client.close()
+        raise SystemExit("stdio server did not answer initialize")
+    client.send({"jsonrpc": "2.0", "method": "notifications/initialized"})
+    return client
+
+
+def run_stdio_level(client: StdioClient, workload: Workload, concurrency: int, requests: int,
+                    warmup: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors = [0]
+    lock = threading.Lock()
+    counter = iter(range(1, 1 << 62))
+    next_id = lambda: next(counter)
+    per_worker = max(1, requests // concurrency)
+    ready = threading.Barrier(concurrency + 1)
+
+    def worker(index: int):
+        rng = workload.rng(index)
+        local, local_errors = [], 0
+        for n in range(warmup + per_worker):
+            if n == warmup:
+                ready.wait()
+            message = workload.build(rng, next_id)
+            started = time.perf_counter()
+            reply = client.send(message)
+            took = time.perf_counter() - started
+            if n < warmup:
+                continue
+            local.append(took)
+            if reply is None or is_error(reply):
+                local_errors += 1
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    ready.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return summarize("stdio", concurrency, latencies, errors[0], elapsed)
+
+
+# Baselines
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Regressions of ``results`` against ``baseline``, as human-readable lines"""
+    previous = {(r["transport"], r["concurrency"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        base = previous.get((result["transport"], result["concurrency"]))
+        if base is None:
+            continue
+        label = f"{result['transport']} c={result['concurrency']}"
+        if result["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{label}: rps {result['rps']} < baseline {base['rps']}")
+        if result["p99_ms"] > base["p99_ms"] * (1 + tolerance):
+            regressions.append(f"{label}: p99 {result['p99_ms']}ms > baseline {base['p99_ms']}ms")
+        if result["errors"] > base.get("errors", 0):
+            regressions.append(f"{label}: {result['errors']} errors > baseline {base.get('errors', 0)}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transport", choices=["http", "stdio", "both"], default="both")
+    parser.add_argument("--concurrency", default="1,8,32", help="comma-separated levels")
+    parser.add_argument("--requests", type=int, default=2000, help="measured requests per level")
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured requests per worker")
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--large-bytes", type=int, default=1 << 20)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="fail if results regress against this file")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative regression")
+    parser.add_argument("--save-baseline", help="also write the results here as the new baseline")
+    args = parser.parse_args(argv)
+
+    workload = Workload(parse_mix(args.mix), args.batch_size, args.large_bytes, args.seed)
+    levels = [int(level) for level in args.concurrency.split(",")]
+    env = {**os.environ, "DEBUG": "false",
+           "PYTHONPATH": os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")]))}
+    results = []
+    failed = []
+
+    # A transport that fails is reported and skipped; the results of the
+    # others are still written
+    if args.transport in ("http", "both"):
+        try:
+            proc, port = start_http_server(env)
+            try:
+                for level in levels:
+                    results.append(run_http_level(port, workload, level, args.requests, args.warmup))
+                    print(json.dumps(results[-1]), file=sys.stderr)
+            finally:
+                proc.terminate()
+                proc.wait(15)
+        except (SystemExit, OSError) as e:
+            failed.append({"transport": "http", "error": str(e)})
+            print(f"http transport failed: {e}", file=sys.stderr)
+
+    if args.transport in ("stdio", "both"):
+        try:
+            stdio_workload = workload.without("initialize")
+            client = start_stdio_server(env)
+            try:
+                for level in levels:
+                    results.append(run_stdio_level(client, stdio_workload, level, args.requests, args.warmup))
+                    print(json.dumps(results[-1]), file=sys.stderr)
+            finally:
+                client.close()
+        except (SystemExit, OSError) as e:
+            failed.append({"transport": "stdio", "error": str(e)})
+            print(f"stdio transport failed: {e}", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "mix": args.mix,
+            "requests": args.requests,
+            "batch_size": args.batch_size,
+            "large_bytes": args.large_bytes,
+            "seed": args.seed,
+            "timestamp": time.time(),
+        },
+        "results": results,
+        "failed": failed,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    errored = [f"{r['transport']} c={r['concurrency']}" for r in results if r["errors"]]
+    # A partial run, or one with errors, is no baseline
+    if args.save_baseline and not failed and not errored:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    print(f"{'transport':<10}{'conc':>6}{'reqs':>8}{'errs':>6}{'rps':>10}{'p50ms':>10}{'p95ms':>10}{'p99ms':>10}")
+    for r in results:
+        print(f"{r['transport']:<10}{r['concurrency']:>6}{r['requests']:>8}{r['errors']:>6}"
+              f"{r['rps']:>10}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}")
+
+    for label in errored:
+        print(f"ERRORS {label}: requests failed; not a valid run", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 1 if failed or errored else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,22 @@
 import os
-from dotenv import load_dotenv
 
-load_dotenv()
+
+def _load_dotenv():
+    """Load the nearest .env above this package, importing python-dotenv only if there is one"""
+    directory = os.path.dirname(os.path.abspath(__file__))
+    while True:
+        path = os.path.join(directory, ".env")
+        if os.path.isfile(path):
+            from dotenv import load_dotenv
+            load_dotenv(path)
+            return
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return
+        directory = parent
+
+
+_load_dotenv()
 
 class Settings:
     # Server Configuration
@@ -14,4 +29,81 @@ class Settings:
     PORT = int(os.getenv("PORT", 8000))
     DEBUG = os.getenv("DEBUG", "false").lower() == "true"
 
+    # Transport for src/main.py: "http" (threaded, one JSON reply per request)
+    # or "sse" (uvicorn; tools/call can stream progress and partial results)
+    TRANSPORT = os.getenv("TRANSPORT", "http").lower()
+    SSE_PING_INTERVAL = float(os.getenv("SSE_PING_INTERVAL", 15))
+
+    # HTTP Worker Pool
+    HTTP_WORKERS = int(os.getenv("HTTP_WORKERS", 32))
+    HTTP_QUEUE_SIZE = int(os.getenv("HTTP_QUEUE_SIZE", 128))
+    KEEPALIVE_TIMEOUT = float(os.getenv("KEEPALIVE_TIMEOUT", 15))
+    SHUTDOWN_GRACE_PERIOD = float(os.getenv("SHUTDOWN_GRACE_PERIOD", 10))
+    BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", 16))
+
+    # HTTP Bodies (responses of at least GZIP_MIN_BYTES are gzipped for clients
+    # that accept it; 0 disables compression)
+    MAX_BODY_BYTES = int(os.getenv("MAX_BODY_BYTES", 64 * 1024 * 1024))
+    GZIP_MIN_BYTES = int(os.getenv("GZIP_MIN_BYTES", 1024))
+    GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", 6))
+
+    # Prefork Mode (WORKER_PROCESSES of 0 means one per CPU)
+    PREFORK = os.getenv("PREFORK", "false").lower() == "true"
+    WORKER_PROCESSES = int(os.getenv("WORKER_PROCESSES", 0))
+    PREFORK_REUSE_PORT = os.getenv("PREFORK_REUSE_PORT", "false").lower() == "true"
+    WORKER_HEARTBEAT_INTERVAL = float(os.getenv("WORKER_HEARTBEAT_INTERVAL", 1))
+    WORKER_HEARTBEAT_TIMEOUT = float(os.getenv("WORKER_HEARTBEAT_TIMEOUT", 30))
+
+    # Tool Execution (0 = no timeout / concurrency limit equal to worker count)
+    TOOL_TIMEOUT = float(os.getenv("TOOL_TIMEOUT", 60))
+    BLOCKING_TOOL_WORKERS = int(os.getenv("BLOCKING_TOOL_WORKERS", 16))
+    BLOCKING_TOOL_CONCURRENCY = int(os.getenv("BLOCKING_TOOL_CONCURRENCY", 0))
+    CPU_POOL = os.getenv("CPU_POOL", "thread")
+    CPU_TOOL_WORKERS = int(os.getenv("CPU_TOOL_WORKERS", os.cpu_count() or 1))
+    CPU_TOOL_CONCURRENCY = int(os.getenv("CPU_TOOL_CONCURRENCY", 0))
+
+    # Admission Control (rates in calls/second; 0 disables a limit). Rates and
+    # bursts are server-wide: under PREFORK each worker gets 1/WORKER_PROCESSES
+    # of them. TOOL_MAX_INFLIGHT and the queue limits apply per process.
+    ADMISSION_RATE = float(os.getenv("ADMISSION_RATE", 0))
+    ADMISSION_BURST = float(os.getenv("ADMISSION_BURST", 0))
+    ADMISSION_CLIENT_RATE = float(os.getenv("ADMISSION_CLIENT_RATE", 0))
+    ADMISSION_CLIENT_BURST = float(os.getenv("ADMISSION_CLIENT_BURST", 0))
+    TOOL_MAX_INFLIGHT = int(os.getenv("TOOL_MAX_INFLIGHT", 0))
+    ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", 64))
+    ADMISSION_MAX_WAIT = float(os.getenv("ADMISSION_MAX_WAIT", 30))
+
+    # Result Cache for pure tools (0 disables; max entry defaults to 1/16 of the budget)
+    RESULT_CACHE_BYTES = int(os.getenv("RESULT_CACHE_BYTES", 64 * 1024 * 1024))
+    RESULT_CACHE_MAX_ENTRY_BYTES = int(os.getenv("RESULT_CACHE_MAX_ENTRY_BYTES", 0))
+
+    # Local Files (tools may only read below DATA_DIR; unset disables file access)
+    DATA_DIR = os.getenv("DATA_DIR", "")
+    # Ranges a large file is split into for text_analyzer (run on the CPU pool)
+    TEXT_ANALYSIS_WORKERS = int(os.getenv("TEXT_ANALYSIS_WORKERS", os.cpu_count() or 1))
+    TEXT_PARALLEL_THRESHOLD = int(os.getenv("TEXT_PARALLEL_THRESHOLD", 32 * 1024 * 1024))
+
+    # Resources (the files under DATA_DIR, listed in pages and read in ranges)
+    RESOURCE_PAGE_SIZE = int(os.getenv("RESOURCE_PAGE_SIZE", 100))
+    RESOURCE_REFRESH_INTERVAL = float(os.getenv("RESOURCE_REFRESH_INTERVAL", 5))
+    RESOURCE_MAX_READ_BYTES = int(os.getenv("RESOURCE_MAX_READ_BYTES", 4 * 1024 * 1024))
+
+    # Logging
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+    LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", 1.0))
+    LOG_PAYLOAD_MAX_CHARS = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", 512))
+
+    # Metrics (the HTTP server serves GET /metrics; the stdio server writes
+    # here on SIGUSR1, or to stderr when unset)
+    METRICS_FILE = os.getenv("METRICS_FILE", "")
+
+    # Weather provider (get_weather returns mock data when the URL is unset)
+    WEATHER_API_URL = os.getenv("WEATHER_API_URL", "")
+    WEATHER_API_KEY = os.getenv("WEATHER_API_KEY", "")
+    WEATHER_TIMEOUT = float(os.getenv("WEATHER_TIMEOUT", 5))
+    WEATHER_CACHE_TTL = float(os.getenv("WEATHER_CACHE_TTL", 300))
+    WEATHER_STALE_TTL = float(os.getenv("WEATHER_STALE_TTL", 3600))
+    WEATHER_CACHE_SIZE = int(os.getenv("WEATHER_CACHE_SIZE", 1024))
+    WEATHER_MAX_CONNECTIONS = int(os.getenv("WEATHER_MAX_CONNECTIONS", 20))
+
 settings = Settings()
\ No newline at end of file
@@ -0,0 +1,186 @@
+"""
+JSON-RPC dispatch shared by the HTTP transports.
+
+Takes a parsed message or batch and returns the reply, with no knowledge of
+the connection it came in on: the threaded server in main.py and the
+streaming transport in sse_server.py both hand requests here, passing the
+client address (for per-client admission) and the arrival time (from which
+client deadlines count).
+
+Replies are dicts, or bytes when they are spliced from pre-encoded parts
+(cached results, batches); ``encode_reply`` turns either into a body.
+"""
+import json
+import logging
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Dict, List, Optional, Union
+from config.settings import settings
+from src.resources.index import ResourceError, resource_index
+from src.tools.catalog import registry
+from src.tools.registry import ToolError
+from src.utils.admission import Overloaded, admission, request_deadline
+from src.utils.metrics import metrics
+
+logger = logging.getLogger("mcp.dispatch")
+
+Reply = Union[Dict[str, Any], bytes]
+
+# Shared across connections so a batch cannot fan out beyond BATCH_WORKERS
+# threads no matter how many clients send batches at once
+_batch_executor = ThreadPoolExecutor(
+    max_workers=settings.BATCH_WORKERS, thread_name_prefix="mcp-batch"
+)
+
+
+def error_response(request_id: Any, code: int, message: str, data: Any = None) -> Dict[str, Any]:
+    """Build a JSON-RPC error reply"""
+    error: Dict[str, Any] = {"code": code, "message": message}
+    if data is not None:
+        error["data"] = data
+    return {"jsonrpc": "2.0", "id": request_id, "error": error}
+
+
+INITIALIZE_RESULT = {
+    "protocolVersion": "2024-11-05",
+    "capabilities": {
+        "tools": {},
+        "resources": {},
+        "prompts": {}
+    },
+    "serverInfo": {
+        "name": "my-mcp-server",
+        "version": "1.0.0"
+    }
+}
+_INITIALIZE_RESULT_JSON = json.dumps(INITIALIZE_RESULT).encode("utf-8")
+
+# Methods with their own metrics series; anything else is counted as "other"
+# so arbitrary client input cannot create unbounded label values
+HANDLED_METHODS = {"initialize", "tools/list", "tools/call",
+                   "resources/list", "resources/read", "resources/templates/list"}
+
+
+def cached_result(method: Any) -> Optional[bytes]:
+    """Pre-encoded result for methods whose reply never changes, else None"""
+    if method == "initialize":
+        return _INITIALIZE_RESULT_JSON
+    if method == "tools/list":
+        return registry.encoded_tools()[0]
+    return None
+
+
+def encode_reply(reply: Reply) -> bytes:
+    """Encode a reply dict, passing through replies that are already bytes"""
+    if isinstance(reply, bytes):
+        return reply
+    return json.dumps(reply).encode("utf-8")
+
+
+def dispatch(message: Any, client: str = "", received: Optional[float] = None) -> Optional[Reply]:
+    """Reply to a parsed JSON-RPC message or batch, or None when no reply is due"""
+    if received is None:
+        received = time.monotonic()
+    if isinstance(message, list):
+        return handle_batch(message, client, received)
+    return handle_single(message, client, received)
+
+
+def handle_batch(requests: List[Any], client: str = "", received: Optional[float] = None) -> Optional[Reply]:
+    """Handle a JSON-RPC batch, running its calls concurrently.
+
+    Replies keep the order of the batch; notifications are executed but
+    contribute no entry. Returns None when nothing needs a reply.
+    """
+    if not requests:
+        return error_response(None, -32600, "Invalid Request: empty batch")
+
+    if len(requests) == 1:
+        replies = [handle_single(requests[0], client, received)]
+    else:
+        replies = list(_batch_executor.map(partial(handle_single, client=client, received=received), requests))
+
+    encoded = [encode_reply(reply) for reply in replies if reply is not None]
+    if not encoded:
+        return None
+    return b"[" + b",".join(encoded) + b"]"
+
+
+def handle_single(request: Any, client: str = "", received: Optional[float] = None) -> Optional[Reply]:
+    """Handle one JSON-RPC message, returning None for notifications"""
+    if not isinstance(request, dict):
+        return error_response(None, -32600, "Invalid Request")
+
+    method = request.get("method")
+    label = method if isinstance(method, str) and method in HANDLED_METHODS else "other"
+    with metrics.timer("mcp_requests", label) as timer:
+        # Fast path: splice the id into the pre-encoded result
+        if "id" in request:
+            result = cached_result(method)
+            if result is not None:
+                request_id = json.dumps(request["id"]).encode("utf-8")
+                return b'{"jsonrpc": "2.0", "id": ' + request_id + b', "result": ' + result + b'}'
+
+        try:
+            response = handle_mcp_request(request, client, received)
+        except Exception as e:
+            logger.exception("💥 Error handling %s: %s", method, e)
+            response = error_response(request.get("id"), -32603, f"Internal error: {e}")
+        timer.error = "error" in response
+
+        return response if "id" in request else None
+
+
+def handle_mcp_request(request: Dict[str, Any], client: str = "",
+                       received: Optional[float] = None) -> Dict[str, Any]:
+    """Handle MCP protocol requests"""
+    method = request.get("method")
+    request_id = request.get("id")
+
+    if method == "initialize":
+        return {"jsonrpc": "2.0", "id": request_id, "result": INITIALIZE_RESULT}
+
+    elif method == "tools/list":
+        return {"jsonrpc": "2.0", "id": request_id, "result": {"tools": registry.list_tools()}}
+
+    elif method == "tools/call":
+        params = request.get("params", {})
+        if not isinstance(params, dict):
+            return error_response(request_id, -32602, "Invalid params: expected an object")
+        name = params.get("name")
+        arguments = params.get("arguments", {})
+
+        try:
+            tool = registry.get(name)
+            deadline = request_deadline(params.get("_meta"), received)
+            with admission.admit(tool.name, client, deadline, tool.max_inflight):
+                result = registry.call_sync(name, arguments, deadline)
+        except Overloaded as e:
+            return error_response(request_id, e.code, str(e),
+                                  {"retryAfter": max(1, math.ceil(e.retry_after))})
+        except ToolError as e:
+            return error_response(request_id, e.code, str(e))
+
+        return {"jsonrpc": "2.0", "id": request_id, "result": result}
+
+    elif method in ("resources/list", "resources/read"):
+        params = request.get("params") or {}
+        if not isinstance(params, dict):
+            return error_response(request_id, -32602, "Invalid params: expected an object")
+        try:
+            if method == "resources/list":
+                result = resource_index.list_page(params.get("cursor"))
+            else:
+                result = resource_index.read(params.get("uri"), params.get("offset", 0), params.get("length"))
+        except ResourceError as e:
+            return error_response(request_id, e.code, str(e))
+
+        return {"jsonrpc": "2.0", "id": request_id, "result": result}
+
+    elif method == "resources/templates/list":
+        return {"jsonrpc": "2.0", "id": request_id, "result": {"resourceTemplates": []}}
+
+    else:
+        return error_response(request_id, -32601, f"Method not found: {method}")
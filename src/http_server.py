@@ -0,0 +1,139 @@
+"""
+Pooled HTTP/1.1 server used by the HTTP transport in src/main.py
+"""
+import logging
+import queue
+import socket
+import threading
+import time
+from http.server import HTTPServer
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class PooledHTTPServer(HTTPServer):
+    """HTTPServer that hands accepted connections to a fixed pool of worker threads.
+
+    Each worker owns one connection at a time and keeps serving requests on it
+    while the client holds it open (HTTP/1.1 keep-alive). Accepted connections
+    wait in a bounded queue when every worker is busy; once the queue is full
+    the accept loop blocks, which pushes back on the kernel listen backlog.
+
+    Handlers that call ``mark_idle`` around their keep-alive wait let ``drain``
+    close idle connections straight away instead of waiting out the client.
+
+    ``listen_socket`` serves an already bound and listening socket (shared by
+    prefork workers) instead of binding ``server_address``; ``reuse_port``
+    binds with SO_REUSEPORT so several processes can bind the same port.
+    """
+
+    allow_reuse_address = True
+
+    def __init__(self, server_address, handler_class, workers: int = 32,
+                 queue_size: int = 128, drain_timeout: float = 10.0,
+                 bind_and_activate: bool = True, listen_socket: Optional[socket.socket] = None,
+                 reuse_port: bool = False):
+        self.allow_reuse_port = reuse_port
+        super().__init__(server_address, handler_class, bind_and_activate and listen_socket is None)
+        if listen_socket is not None:
+            self.socket.close()
+            self.socket = listen_socket
+            self.server_address = listen_socket.getsockname()
+            self.server_name, self.server_port = self.server_address[:2]
+        self.drain_timeout = drain_timeout
+        self.draining = threading.Event()
+        self._connections = queue.Queue(maxsize=queue_size)
+        self._active = set()
+        # Connections whose worker is waiting for the next request on them
+        self._idle = set()
+        self._active_lock = threading.Lock()
+        self._workers = [
+            threading.Thread(target=self._worker, name=f"mcp-http-{i}", daemon=True)
+            for i in range(max(1, workers))
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def process_request(self, request, client_address):
+        """Queue the connection for the worker pool instead of serving it inline"""
+        self._connections.put((request, client_address))
+
+    def _worker(self):
+        while True:
+            item = self._connections.get()
+            if item is None:
+                return
+            request, client_address = item
+            with self._active_lock:
+                self._active.add(request)
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                with self._active_lock:
+                    self._active.discard(request)
+                    self._idle.discard(request)
+                self.shutdown_request(request)
+
+    def mark_idle(self, connection: socket.socket, idle: bool) -> None:
+        """Record whether ``connection`` is between requests.
+
+        An idle connection is shut for reading once the server drains, so its
+        worker sees EOF rather than blocking until the keep-alive timeout.
+        """
+        with self._active_lock:
+            if not idle:
+                self._idle.discard(connection)
+            elif self.draining.is_set():
+                _shutdown_read(connection)
+            else:
+                self._idle.add(connection)
+
+    def stats(self) -> Dict[str, Any]:
+        """Connection counts for health reporting"""
+        with self._active_lock:
+            active = len(self._active)
+        return {
+            "active_connections": active,
+            "queued_connections": self._connections.qsize(),
+            "draining": self.draining.is_set(),
+        }
+
+    def drain(self):
+        """Finish in-flight work and stop the workers.
+
+        Call after ``shutdown()`` has stopped the accept loop. Idle keep-alive
+        connections are closed at once; workers finish the request they are on
+        and close their connection. Connections that are still open when the
+        grace period ends are closed forcibly.
+        """
+        self.draining.set()
+        with self._active_lock:
+            for connection in self._idle:
+                _shutdown_read(connection)
+            self._idle.clear()
+        for _ in self._workers:
+            self._connections.put(None)
+
+        deadline = time.monotonic() + self.drain_timeout
+        for worker in self._workers:
+            worker.join(max(0.0, deadline - time.monotonic()))
+
+        with self._active_lock:
+            leftover = list(self._active)
+        for request in leftover:
+            try:
+                request.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if leftover:
+            logger.warning("Closed %d connection(s) still open after drain", len(leftover))
+        self.server_close()
+
+
+def _shutdown_read(connection: socket.socket) -> None:
+    try:
+        connection.shutdown(socket.SHUT_RD)
+    except OSError:
+        pass
@@ -2,182 +2,361 @@
 """
 MCP Server - HTTP Version for Smithey Scanning
 """
+import gzip
 import json
+import logging
+import os
+import signal
 import sys
-from http.server import HTTPServer, BaseHTTPRequestHandler
+import time
+from http.server import BaseHTTPRequestHandler
 import threading
 
+# Allow running as a script (``python src/main.py``) as well as a module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import settings
+from src.dispatcher import dispatch, encode_reply, error_response
+from src.http_server import PooledHTTPServer
+from src.tools.catalog import registry
+from src.utils.admission import Overloaded
+from src.utils.log import log_payload, setup_logging
+from src.utils.metrics import metrics
+
+logger = logging.getLogger("mcp.http")
+
+class BodyError(Exception):
+    """Request body that cannot be read; answered with ``status``"""
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+# Each worker thread reads bodies into its own buffer, reused across requests.
+# Buffers grown past BUFFER_RETAIN for one large request are not kept.
+BUFFER_RETAIN = 1024 * 1024
+MAX_CHUNK_LINE = 1024
+_buffers = threading.local()
+
+def request_buffer(size):
+    """This thread's body buffer, at least ``size`` bytes long"""
+    buffer = getattr(_buffers, 'buffer', None)
+    if buffer is None or len(buffer) < size:
+        buffer = bytearray(max(size, 64 * 1024))
+        if size <= BUFFER_RETAIN:
+            _buffers.buffer = buffer
+    return buffer
+
+def accepts_gzip(accept_encoding):
+    """Whether an Accept-Encoding header allows a gzip response"""
+    for coding in accept_encoding.lower().split(','):
+        name, _, params = coding.partition(';')
+        if name.strip() not in ('gzip', '*'):
+            continue
+        quality = params.strip()
+        if quality.startswith('q='):
+            try:
+                return float(quality[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+def gzip_etag(etag):
+    """Distinct ETag for the gzip-encoded representation"""
+    return etag[:-1] + '-gzip"'
+
 class MCPHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps connections open between requests; every response must
+    # therefore carry a Content-Length. Idle connections are dropped after
+    # KEEPALIVE_TIMEOUT seconds so they cannot pin a worker forever.
+    protocol_version = "HTTP/1.1"
+    timeout = settings.KEEPALIVE_TIMEOUT
+    # Headers and body go out in separate writes; with Nagle enabled the body
+    # waits for the client's delayed ACK (~40ms) on a persistent connection
+    disable_nagle_algorithm = True
+
+    def handle(self):
+        """Serve requests on this connection until it closes or the server drains"""
+        self.close_connection = True
+        self.server.mark_idle(self.connection, True)
+        self.handle_one_request()
+        while not self.close_connection and not self.server.draining.is_set():
+            # Waiting for the next request: a drain may close the connection
+            self.server.mark_idle(self.connection, True)
+            self.handle_one_request()
+    
+    def parse_request(self):
+        """Mark the connection busy as soon as a request line has arrived"""
+        self.server.mark_idle(self.connection, False)
+        return super().parse_request()
+
+    def end_headers(self):
+        if self.server.draining.is_set():
+            self.send_header('Connection', 'close')
+            self.close_connection = True
+        super().end_headers()
+
+    def handle_expect_100(self):
+        """Refuse an oversized body before the client sends it"""
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            length = 0
+        if length > settings.MAX_BODY_BYTES:
+            self.send_error(413, "Request body too large")
+            return False
+        return super().handle_expect_100()
+
     def do_OPTIONS(self):
         """Handle CORS preflight requests"""
         self.send_response(200)
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Content-Length', '0')
         self.end_headers()
     
+    def do_GET(self):
+        """Serve Prometheus metrics"""
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_error(404, "Not Found")
+            return
+        self.send_body(metrics.scrape().encode('utf-8'), 'text/plain; version=0.0.4; charset=utf-8')
+    
     def do_POST(self):
         """Handle MCP requests"""
+        # Client deadlines (params._meta.timeoutMs) count from here
+        self.received = time.monotonic()
         try:
-            # Read request body
-            content_length = int(self.headers.get('Content-Length', 0))
-            post_data = self.rfile.read(content_length)
-            request = json.loads(post_data.decode('utf-8'))
+            # Read request body and decode it straight from the buffer
+            try:
+                body = self.read_body()
+            except BodyError as e:
+                self.send_error(e.status, str(e))
+                return
+            try:
+                request = json.loads(str(body, 'utf-8'))
+            except ValueError as e:
+                self.send_json(error_response(None, -32700, f"Parse error: {e}"))
+                return
             
-            print(f"📨 Received request: {request}", file=sys.stderr)
+            log_payload(logger, "📨 Received request", request)
             
-            # Handle the request
-            response = self.handle_mcp_request(request)
+            # tools/list only changes with the tool set, so clients can
+            # revalidate (send_body answers a matching If-None-Match with 304)
+            headers = {}
+            if isinstance(request, dict) and request.get("method") == "tools/list":
+                headers['ETag'] = registry.encoded_tools()[1]
             
-            # Send response
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
+            # Handle the request (a JSON-RPC batch arrives as an array)
+            response = dispatch(request, self.client_address[0], self.received)
             
-            response_json = json.dumps(response).encode('utf-8')
-            self.wfile.write(response_json)
-            print(f"📤 Sent response: {response}", file=sys.stderr)
+            # Notifications get no reply
+            if response is None:
+                self.send_response(202)
+                self.send_header('Content-Length', '0')
+                self.send_header('Access-Control-Allow-Origin', '*')
+                self.end_headers()
+                return
+            
+            # A single call turned away by admission control is a 503
+            status = 200
+            if isinstance(response, dict) and response.get("error", {}).get("code") == Overloaded.code:
+                status = 503
+                headers['Retry-After'] = str(response["error"]["data"]["retryAfter"])
+            
+            # Send response
+            self.send_json(response, status, headers)
+            log_payload(logger, "📤 Sent response", response)
             
         except Exception as e:
-            print(f"💥 Error: {e}", file=sys.stderr)
+            logger.exception("💥 Error: %s", e)
             self.send_error(500, str(e))
     
-    def handle_mcp_request(self, request):
-        """Handle MCP protocol requests"""
-        method = request.get("method")
-        request_id = request.get("id")
-        
-        if method == "initialize":
-            return {
-                "jsonrpc": "2.0",
-                "id": request_id,
-                "result": {
-                    "protocolVersion": "2024-11-05",
-                    "capabilities": {
-                        "tools": {},
-                        "resources": {},
-                        "prompts": {}
-                    },
-                    "serverInfo": {
-                        "name": "my-mcp-server",
-                        "version": "1.0.0"
-                    }
-                }
-            }
+    def read_body(self):
+        """Request body as a memoryview over this thread's reusable buffer.
         
-        elif method == "tools/list":
-            tools = [
-                {
-                    "name": "greet",
-                    "description": "A friendly greeting tool",
-                    "inputSchema": {
-                        "type": "object",
-                        "properties": {
-                            "name": {
-                                "type": "string",
-                                "description": "Your name"
-                            }
-                        },
-                        "required": ["name"]
-                    }
-                },
-                {
-                    "name": "calculator",
-                    "description": "Simple calculator with basic operations",
-                    "inputSchema": {
-                        "type": "object",
-                        "properties": {
-                            "operation": {
-                                "type": "string",
-                                "description": "add, subtract, multiply, divide",
-                                "enum": ["add", "subtract", "multiply", "divide"]
-                            },
-                            "a": {
-                                "type": "number",
-                                "description": "First number"
-                            },
-                            "b": {
-                                "type": "number", 
-                                "description": "Second number"
-                            }
-                        },
-                        "required": ["operation", "a", "b"]
-                    }
-                }
-            ]
-            return {
-                "jsonrpc": "2.0",
-                "id": request_id,
-                "result": {
-                    "tools": tools
-                }
-            }
+        Accepts Content-Length and chunked bodies up to MAX_BODY_BYTES; raises
+        BodyError for anything larger or malformed.
+        """
+        transfer_encoding = self.headers.get('Transfer-Encoding')
+        if transfer_encoding is not None:
+            codings = [coding.strip() for coding in transfer_encoding.lower().split(',')]
+            if codings != ['chunked']:
+                raise BodyError(501, f"Unsupported Transfer-Encoding: {transfer_encoding}")
+            return self.read_chunked()
         
-        elif method == "tools/call":
-            params = request.get("params", {})
-            name = params.get("name")
-            arguments = params.get("arguments", {})
-            
-            if name == "greet":
-                result = f"Hello, {arguments.get('name', 'Friend')}! Welcome to MCP Server!"
-            elif name == "calculator":
-                op = arguments.get("operation", "add")
-                a = arguments.get("a", 0)
-                b = arguments.get("b", 0)
-                
-                if op == "add": result = f"{a} + {b} = {a + b}"
-                elif op == "subtract": result = f"{a} - {b} = {a - b}"
-                elif op == "multiply": result = f"{a} × {b} = {a * b}"
-                elif op == "divide": 
-                    if b == 0: result = "Error: Cannot divide by zero"
-                    else: result = f"{a} ÷ {b} = {a / b}"
-                else: result = f"Unknown operation: {op}"
-            else:
-                result = f"Unknown tool: {name}"
-            
-            return {
-                "jsonrpc": "2.0",
-                "id": request_id,
-                "result": {
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": result
-                        }
-                    ]
-                }
-            }
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            raise BodyError(400, "Invalid Content-Length")
+        if length < 0:
+            raise BodyError(400, "Invalid Content-Length")
+        if length > settings.MAX_BODY_BYTES:
+            raise BodyError(413, "Request body too large")
+        view = memoryview(request_buffer(length))[:length]
+        self.read_into(view)
+        return view
+    
+    def read_chunked(self):
+        """Read a chunked body, growing the buffer as chunks arrive"""
+        buffer = request_buffer(0)
+        used = 0
+        while True:
+            line = self.rfile.readline(MAX_CHUNK_LINE + 1)
+            try:
+                size = int(line.split(b';', 1)[0], 16)
+            except ValueError:
+                raise BodyError(400, "Invalid chunk size")
+            if size < 0 or len(line) > MAX_CHUNK_LINE:
+                raise BodyError(400, "Invalid chunk size")
+            if size == 0:
+                break
+            if used + size > settings.MAX_BODY_BYTES:
+                raise BodyError(413, "Request body too large")
+            if used + size > len(buffer):
+                grown = bytearray(max(2 * len(buffer), used + size))
+                grown[:used] = memoryview(buffer)[:used]
+                buffer = grown
+            self.read_into(memoryview(buffer)[used:used + size])
+            used += size
+            if self.rfile.readline(MAX_CHUNK_LINE + 1) not in (b'\r\n', b'\n'):
+                raise BodyError(400, "Malformed chunk")
+        # Skip trailer fields up to the blank line ending the message
+        while self.rfile.readline(MAX_CHUNK_LINE + 1) not in (b'\r\n', b'\n', b''):
+            pass
+        if len(buffer) <= BUFFER_RETAIN:
+            _buffers.buffer = buffer
+        return memoryview(buffer)[:used]
+    
+    def read_into(self, view):
+        """Fill ``view`` from the connection"""
+        while len(view):
+            count = self.rfile.readinto(view)
+            if not count:
+                raise BodyError(400, "Incomplete request body")
+            view = view[count:]
+    
+    def send_json(self, payload, status=200, headers=None):
+        """Write a JSON body (a reply dict or pre-encoded bytes) with the standard headers"""
+        self.send_body(encode_reply(payload), 'application/json', status, headers)
+    
+    def send_body(self, body, content_type, status=200, headers=None):
+        """Write ``body``, gzip-compressed when it is large and the client accepts it.
         
-        else:
-            return {
-                "jsonrpc": "2.0",
-                "id": request_id,
-                "error": {
-                    "code": -32601,
-                    "message": f"Method not found: {method}"
-                }
-            }
+        A 200 with an ETag is answered with 304 when the client's If-None-Match
+        names the ETag of the representation it would receive.
+        """
+        headers = dict(headers or {})
+        use_gzip = (settings.GZIP_MIN_BYTES and len(body) >= settings.GZIP_MIN_BYTES
+                    and accepts_gzip(self.headers.get('Accept-Encoding', '')))
+        if use_gzip and 'ETag' in headers:
+            headers['ETag'] = gzip_etag(headers['ETag'])
+        if status == 200 and 'ETag' in headers and self.not_modified(headers['ETag']):
+            self.send_response(304)
+            self.send_header('ETag', headers['ETag'])
+            self.send_header('Vary', 'Accept-Encoding')
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+            return
+        if use_gzip:
+            body = gzip.compress(body, settings.GZIP_LEVEL, mtime=0)
+            headers['Content-Encoding'] = 'gzip'
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def not_modified(self, etag):
+        """Whether the request's If-None-Match names ``etag``"""
+        value = self.headers.get('If-None-Match')
+        if value is None:
+            return False
+        return value.strip() == '*' or etag in (tag.strip() for tag in value.split(','))
     
     def log_message(self, format, *args):
-        """Override to log to stderr instead of stdout"""
-        print(f"🌐 HTTP {format % args}", file=sys.stderr)
+        """Route the access log through the structured logger"""
+        logger.debug("🌐 HTTP " + format, *args, extra={"client": self.client_address[0]})
+    
+    def log_error(self, format, *args):
+        logger.warning("🌐 HTTP " + format, *args, extra={"client": self.client_address[0]})
+
+def create_server(listen_socket=None, reuse_port=False):
+    """PooledHTTPServer for MCPHandler configured from settings"""
+    return PooledHTTPServer(
+        (settings.HOST, settings.PORT),
+        MCPHandler,
+        workers=settings.HTTP_WORKERS,
+        queue_size=settings.HTTP_QUEUE_SIZE,
+        drain_timeout=settings.SHUTDOWN_GRACE_PERIOD,
+        listen_socket=listen_socket,
+        reuse_port=reuse_port,
+    )
+
+def run_prefork():
+    """Run the HTTP server in several worker processes under a supervisor"""
+    from src.prefork import PreforkSupervisor
+    supervisor = PreforkSupervisor(
+        create_server,
+        (settings.HOST, settings.PORT),
+        workers=settings.WORKER_PROCESSES,
+        reuse_port=settings.PREFORK_REUSE_PORT,
+        heartbeat_interval=settings.WORKER_HEARTBEAT_INTERVAL,
+        heartbeat_timeout=settings.WORKER_HEARTBEAT_TIMEOUT,
+        grace_period=settings.SHUTDOWN_GRACE_PERIOD,
+        backlog=settings.HTTP_QUEUE_SIZE,
+    )
+    supervisor.run()
+
+def run_sse():
+    """Run the streaming transport (see sse_server.py) under uvicorn"""
+    import uvicorn
+    from src.sse_server import create_app
+    logger.info("🚀 MCP SSE Server running on %s:%d", settings.HOST, settings.PORT)
+    uvicorn.run(
+        create_app(),
+        host=settings.HOST,
+        port=settings.PORT,
+        log_config=None,
+        timeout_keep_alive=int(settings.KEEPALIVE_TIMEOUT),
+        timeout_graceful_shutdown=int(settings.SHUTDOWN_GRACE_PERIOD),
+    )
 
 def run_server():
     """Run the HTTP server"""
-    port = 8000
-    server_address = ('', port)
-    httpd = HTTPServer(server_address, MCPHandler)
+    setup_logging()
+    if settings.TRANSPORT == "sse":
+        run_sse()
+        return
+    if settings.PREFORK:
+        run_prefork()
+        return
+    httpd = create_server()
+
+    # shutdown() waits for serve_forever() to return, so it must not run on
+    # the thread that is serving; hand it to a helper thread instead.
+    def handle_sigterm(signum, frame):
+        threading.Thread(target=httpd.shutdown, daemon=True).start()
+    signal.signal(signal.SIGTERM, handle_sigterm)
     
-    print(f"🚀 MCP HTTP Server running on port {port}", file=sys.stderr)
-    print("✅ Server ready for Smithey scanning", file=sys.stderr)
+    logger.info("🚀 MCP HTTP Server running on %s:%d (%d workers)",
+                settings.HOST, settings.PORT, settings.HTTP_WORKERS)
+    logger.info("✅ Server ready for Smithey scanning")
     
     try:
         httpd.serve_forever()
     except KeyboardInterrupt:
-        print("🛑 Server stopped", file=sys.stderr)
+        logger.info("🛑 Server stopped")
     except Exception as e:
-        print(f"💥 Server error: {e}", file=sys.stderr)
+        logger.exception("💥 Server error: %s", e)
+    finally:
+        logger.info("⏳ Draining in-flight requests")
+        httpd.drain()
 
 if __name__ == "__main__":
     run_server()
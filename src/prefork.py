@@ -0,0 +1,395 @@
+"""
+Prefork supervisor for the HTTP transport.
+
+The supervisor binds the listening socket once and forks worker processes that
+each run their own PooledHTTPServer on it, so JSON parsing and tool execution
+are no longer limited to one core by the GIL. With ``reuse_port`` every worker
+binds its own SO_REUSEPORT socket instead and the kernel spreads connections.
+
+Workers write a JSON heartbeat line to a pipe every ``heartbeat_interval``
+seconds. The supervisor:
+
+- restarts workers that exit or whose heartbeat stops (backing off when they
+  crash straight after starting),
+- rolls every worker over on SIGHUP: a new generation is started and the old
+  workers are drained once it is up (the code is not reloaded; that still
+  needs a restart),
+- logs per-worker health on SIGUSR1,
+- drains all workers on SIGTERM / SIGINT.
+
+The heartbeat also carries the worker's metrics. The supervisor sums them,
+keeping the final counts of workers that have exited, into a file that /metrics
+serves from every worker (see ``Metrics.scrape``), so a scrape of any worker
+covers the whole server; it is at most one heartbeat interval old.
+"""
+import json
+import logging
+import os
+import selectors
+import signal
+import shutil
+import socket
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from src.http_server import PooledHTTPServer
+from src.utils.admission import admission
+from src.utils.log import setup_logging, shutdown_logging
+from src.utils.metrics import merge_expositions, metrics
+
+logger = logging.getLogger("mcp.prefork")
+
+# Workers that die sooner than this after starting count as crash-looping
+MIN_UPTIME = 1.0
+MAX_RESTART_DELAY = 30.0
+
+
+@dataclass
+class Worker:
+    """Supervisor-side record of one worker process"""
+    pid: int
+    generation: int
+    heartbeat_fd: int
+    started: float
+    last_heartbeat: float
+    ready: bool = False
+    stopping: bool = False
+    status: Dict[str, Any] = field(default_factory=dict)
+    metrics: str = ""
+    buffer: bytes = b""
+
+
+class PreforkSupervisor:
+    """Forks, watches and replaces HTTP worker processes"""
+
+    def __init__(self, server_factory: Callable[..., PooledHTTPServer], address: Tuple[str, int],
+                 workers: Optional[int] = None, reuse_port: bool = False,
+                 heartbeat_interval: float = 1.0, heartbeat_timeout: float = 30.0,
+                 grace_period: float = 10.0, backlog: int = 128):
+        self.server_factory = server_factory
+        self.address = address
+        self.size = workers or os.cpu_count() or 1
+        self.reuse_port = reuse_port
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.grace_period = grace_period
+        self.backlog = backlog
+        self.generation = 0
+        self.workers: Dict[int, Worker] = {}
+        self._socket: Optional[socket.socket] = None
+        self._selector: Optional[selectors.BaseSelector] = None
+        self._wakeup: Optional[Tuple[socket.socket, socket.socket]] = None
+        self._rollover_started: Optional[float] = None
+        self._stop_deadline: Optional[float] = None
+        self._restart_delay = 0.0
+        self._next_spawn = 0.0
+        self._metrics_dir: Optional[str] = None
+        self._metrics_dirty = False
+        # Counters of workers that have exited, so totals never go backwards
+        self._retired_metrics = ""
+
+    def health(self) -> List[Dict[str, Any]]:
+        """One entry per worker with its last reported status"""
+        now = time.monotonic()
+        return [
+            {
+                "pid": worker.pid,
+                "generation": worker.generation,
+                "uptime": round(now - worker.started, 3),
+                "heartbeat_age": round(now - worker.last_heartbeat, 3),
+                "ready": worker.ready,
+                "stopping": worker.stopping,
+                **worker.status,
+            }
+            for worker in self.workers.values()
+        ]
+
+    def run(self) -> None:
+        """Serve until SIGTERM / SIGINT, then drain the workers"""
+        self._selector = selectors.DefaultSelector()
+        self._wakeup = socket.socketpair()
+        for end in self._wakeup:
+            end.setblocking(False)
+        self._selector.register(self._wakeup[0], selectors.EVENT_READ)
+        if not self.reuse_port:
+            self._socket = socket.create_server(self.address, backlog=self.backlog)
+            # Every worker polls this socket; a worker that loses the race for a
+            # connection must get EAGAIN rather than block in accept()
+            self._socket.setblocking(False)
+            self.address = self._socket.getsockname()[:2]
+        self._metrics_dir = tempfile.mkdtemp(prefix="mcp-metrics-")
+
+        previous = {signum: signal.signal(signum, lambda *_: None)
+                    for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP,
+                                   signal.SIGUSR1, signal.SIGCHLD)}
+        signal.set_wakeup_fd(self._wakeup[1].fileno())
+        logger.info("Prefork supervisor listening on %s:%d with %d workers",
+                    self.address[0], self.address[1], self.size,
+                    extra={"host": self.address[0], "port": self.address[1], "workers": self.size})
+        try:
+            self._spawn_missing(time.monotonic())
+            while not (self._stop_deadline is not None and not self.workers):
+                for key, _ in self._selector.select(self.heartbeat_interval):
+                    if key.fileobj is self._wakeup[0]:
+                        self._handle_signals()
+                    else:
+                        self._read_heartbeat(self.workers.get(key.data))
+                self._reap()
+                now = time.monotonic()
+                if self._stop_deadline is None:
+                    self._check_heartbeats(now)
+                    self._spawn_missing(now)
+                    self._retire_previous_generation(now)
+                elif now >= self._stop_deadline:
+                    self._kill_all()
+                if self._metrics_dirty:
+                    self._write_metrics()
+        finally:
+            signal.set_wakeup_fd(-1)
+            for signum, handler in previous.items():
+                signal.signal(signum, handler)
+            self._close()
+        logger.info("Prefork supervisor stopped")
+
+    def _handle_signals(self) -> None:
+        try:
+            data = self._wakeup[0].recv(512)
+        except BlockingIOError:
+            return
+        for signum in data:
+            if signum in (signal.SIGTERM, signal.SIGINT) and self._stop_deadline is None:
+                logger.info("Stopping %d workers", len(self.workers))
+                self._stop_deadline = time.monotonic() + self.grace_period + self.heartbeat_interval
+                for worker in self.workers.values():
+                    self._terminate(worker)
+            elif signum == signal.SIGHUP and self._stop_deadline is None:
+                self.generation += 1
+                self._rollover_started = time.monotonic()
+                self._next_spawn = 0.0
+                logger.info("Rolling workers over to generation %d", self.generation)
+            elif signum == signal.SIGUSR1:
+                for entry in self.health():
+                    logger.info("Worker health", extra=entry)
+
+    def _spawn_missing(self, now: float) -> None:
+        current = sum(1 for w in self.workers.values() if w.generation == self.generation and not w.stopping)
+        while current < self.size and now >= self._next_spawn:
+            self._spawn()
+            current += 1
+
+    def _spawn(self) -> None:
+        read_fd, write_fd = os.pipe()
+        # The log writer thread must not be mid-write while we fork
+        shutdown_logging()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            self._run_worker(write_fd)
+        setup_logging()
+        os.close(write_fd)
+        os.set_blocking(read_fd, False)
+        now = time.monotonic()
+        self.workers[pid] = Worker(pid, self.generation, read_fd, started=now, last_heartbeat=now)
+        self._selector.register(read_fd, selectors.EVENT_READ, pid)
+        logger.info("Started worker %d (generation %d)", pid, self.generation)
+
+    def _run_worker(self, heartbeat_fd: int) -> None:
+        """Body of a forked worker; never returns"""
+        status = 0
+        try:
+            signal.set_wakeup_fd(-1)
+            for signum in (signal.SIGINT, signal.SIGHUP, signal.SIGUSR1):
+                signal.signal(signum, signal.SIG_IGN)
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+            self._selector.close()
+            for end in self._wakeup:
+                end.close()
+            for worker in self.workers.values():
+                os.close(worker.heartbeat_fd)
+            setup_logging()
+            metrics.shared_path = self._metrics_path
+            # ADMISSION_RATE and ADMISSION_CLIENT_RATE are for the whole server
+            admission.share(self.size)
+
+            httpd = self.server_factory(listen_socket=self._socket, reuse_port=self.reuse_port)
+            stop = threading.Event()
+
+            def shutdown(*_):
+                if not stop.is_set():
+                    stop.set()
+                    threading.Thread(target=httpd.shutdown, daemon=True).start()
+            signal.signal(signal.SIGTERM, shutdown)
+
+            write_lock = threading.Lock()
+
+            def send_heartbeat() -> bool:
+                line = json.dumps(dict(httpd.stats(), metrics=metrics.render())) + "\n"
+                with write_lock:
+                    try:
+                        os.write(heartbeat_fd, line.encode())
+                    except OSError:
+                        return False
+                return True
+
+            def heartbeat():
+                while send_heartbeat():
+                    time.sleep(self.heartbeat_interval)
+                # The supervisor is gone; do not linger as an orphan
+                shutdown()
+            threading.Thread(target=heartbeat, name="mcp-heartbeat", daemon=True).start()
+
+            httpd.serve_forever()
+            httpd.drain()
+            # Final counts, so the supervisor keeps the requests served while draining
+            send_heartbeat()
+        except BaseException:
+            logger.exception("Worker %d failed", os.getpid())
+            status = 1
+        finally:
+            shutdown_logging()
+            os._exit(status)
+
+    def _read_heartbeat(self, worker: Optional[Worker]) -> None:
+        if worker is None:
+            return
+        # A heartbeat with metrics can be larger than one read
+        while True:
+            try:
+                data = os.read(worker.heartbeat_fd, 65536)
+            except BlockingIOError:
+                break
+            except OSError:
+                data = b""
+            if not data:
+                # EOF: the worker has exited; _reap will collect it
+                try:
+                    self._selector.unregister(worker.heartbeat_fd)
+                except KeyError:
+                    pass
+                break
+            worker.buffer += data
+        *lines, worker.buffer = worker.buffer.split(b"\n")
+        if lines:
+            try:
+                status = json.loads(lines[-1])
+            except ValueError:
+                return
+            worker.metrics = status.pop("metrics", worker.metrics)
+            worker.status = status
+            worker.last_heartbeat = time.monotonic()
+            worker.ready = True
+            self._metrics_dirty = True
+
+    def _check_heartbeats(self, now: float) -> None:
+        for worker in self.workers.values():
+            if now - worker.last_heartbeat > self.heartbeat_timeout:
+                logger.warning("Worker %d missed heartbeats for %.1fs; killing it",
+                               worker.pid, now - worker.last_heartbeat)
+                worker.last_heartbeat = now
+                self._signal(worker, signal.SIGKILL)
+
+    def _retire_previous_generation(self, now: float) -> None:
+        if self._rollover_started is None:
+            return
+        new = [w for w in self.workers.values() if w.generation == self.generation]
+        timed_out = now - self._rollover_started > self.heartbeat_timeout
+        if not timed_out and (len(new) < self.size or not all(w.ready for w in new)):
+            return
+        for worker in self.workers.values():
+            if worker.generation < self.generation:
+                self._terminate(worker)
+        self._rollover_started = None
+
+    def _reap(self) -> None:
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            worker = self.workers.get(pid)
+            if worker is None:
+                continue
+            self._forget(worker)
+            if worker.stopping:
+                logger.info("Worker %d stopped", pid)
+                continue
+            now = time.monotonic()
+            if now - worker.started < MIN_UPTIME:
+                self._restart_delay = min(MAX_RESTART_DELAY, max(MIN_UPTIME, self._restart_delay * 2))
+            else:
+                self._restart_delay = 0.0
+            self._next_spawn = now + self._restart_delay
+            logger.warning("Worker %d exited unexpectedly (%s); restarting in %.1fs",
+                           pid, _describe(status), self._restart_delay)
+
+    def _terminate(self, worker: Worker) -> None:
+        if not worker.stopping:
+            worker.stopping = True
+            self._signal(worker, signal.SIGTERM)
+
+    def _kill_all(self) -> None:
+        logger.warning("Killing %d workers still running after the grace period", len(self.workers))
+        for worker in self.workers.values():
+            self._signal(worker, signal.SIGKILL)
+        for worker in list(self.workers.values()):
+            try:
+                os.waitpid(worker.pid, 0)
+            except ChildProcessError:
+                pass
+            self._forget(worker)
+
+    def _forget(self, worker: Worker) -> None:
+        # Pick up the final heartbeat before the worker's counts are retired
+        self._read_heartbeat(worker)
+        if worker.metrics:
+            self._retired_metrics = merge_expositions([self._retired_metrics, worker.metrics],
+                                                      counters_only=True)
+            self._metrics_dirty = True
+        del self.workers[worker.pid]
+        try:
+            self._selector.unregister(worker.heartbeat_fd)
+        except KeyError:
+            pass
+        os.close(worker.heartbeat_fd)
+
+    @property
+    def _metrics_path(self) -> str:
+        return os.path.join(self._metrics_dir, "metrics.txt")
+
+    def _write_metrics(self) -> None:
+        """Publish the sum of all workers' metrics for /metrics to serve"""
+        self._metrics_dirty = False
+        text = merge_expositions([self._retired_metrics] + [w.metrics for w in self.workers.values()])
+        tmp = self._metrics_path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp, self._metrics_path)
+        except OSError as e:
+            logger.warning("Could not write aggregated metrics: %s", e)
+
+    @staticmethod
+    def _signal(worker: Worker, signum: int) -> None:
+        try:
+            os.kill(worker.pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def _close(self) -> None:
+        if self._socket is not None:
+            self._socket.close()
+        self._selector.close()
+        for end in self._wakeup:
+            end.close()
+        if self._metrics_dir is not None:
+            shutil.rmtree(self._metrics_dir, ignore_errors=True)
+
+
+def _describe(status: int) -> str:
+    if os.WIFSIGNALED(status):
+        return f"signal {os.WTERMSIG(status)}"
+    return f"exit code {os.waitstatus_to_exitcode(status)}"
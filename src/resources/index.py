@@ -0,0 +1,252 @@
+"""
+Index of the files under DATA_DIR, served as MCP resources.
+
+The index is built on first use and refreshed at most every
+``refresh_interval`` seconds, incrementally: directories whose mtime has not
+changed are not listed again, and files keep their metadata unless their size
+or mtime changed. Hidden entries and symlinks are skipped.
+
+Resources are named ``resource://data/<path relative to DATA_DIR>``.
+``resources/list`` pages through them in URI order with an opaque cursor that
+stays valid when files are added or removed; ``resources/read`` returns a byte
+range of one file, read through mmap (see reader.py).
+"""
+import base64
+import bisect
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote, unquote
+from config.settings import settings
+from src.resources.reader import read_range
+from src.utils.helpers import resolve_data_path
+
+URI_PREFIX = "resource://data/"
+
+# Non-text/* types whose contents are served as text rather than base64
+TEXT_TYPES = {
+    "application/json", "application/xml", "application/javascript",
+    "application/x-yaml", "application/yaml", "application/toml",
+    "application/x-sh", "application/sql",
+}
+
+
+class ResourceError(Exception):
+    """Resource request failure that maps onto a JSON-RPC error"""
+    code = -32602
+
+
+class ResourceNotFound(ResourceError):
+    """Raised when a URI does not name an indexed resource"""
+    code = -32002
+
+    def __init__(self, uri: str):
+        super().__init__(f"Resource not found: {uri}")
+        self.uri = uri
+
+
+@dataclass(frozen=True)
+class Resource:
+    """Metadata for one indexed file"""
+    path: str
+    size: int
+    mtime_ns: int
+    mime_type: str
+
+    @property
+    def uri(self) -> str:
+        return URI_PREFIX + quote(self.path)
+
+    @property
+    def is_text(self) -> bool:
+        return self.mime_type.startswith("text/") or self.mime_type in TEXT_TYPES
+
+    def metadata(self) -> Dict[str, Any]:
+        """MCP ``resources/list`` entry for this file"""
+        return {
+            "uri": self.uri,
+            "name": os.path.basename(self.path),
+            "title": self.path,
+            "mimeType": self.mime_type,
+            "size": self.size,
+        }
+
+
+def guess_mime_type(path: str) -> str:
+    import mimetypes
+    return mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+
+def encode_cursor(uri: str) -> str:
+    return base64.urlsafe_b64encode(uri.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> str:
+    if not isinstance(cursor, str):
+        raise ResourceError("cursor must be a string")
+    try:
+        return base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+    except (ValueError, UnicodeError):
+        raise ResourceError(f"Invalid cursor: {cursor!r}") from None
+
+
+class ResourceIndex:
+    """Incrementally refreshed index of the files under ``root``"""
+
+    def __init__(self, root: str, refresh_interval: float = 5.0, page_size: int = 100,
+                 max_read_bytes: int = 4 * 1024 * 1024):
+        self.root = root
+        self.refresh_interval = refresh_interval
+        self.page_size = page_size
+        self.max_read_bytes = max_read_bytes
+        self._lock = threading.Lock()
+        self._refreshed: Optional[float] = None
+        # (relative path -> Resource, URI -> Resource, all URIs in sorted order),
+        # replaced as a whole so readers never see a half-updated index
+        self._view: Tuple[Dict[str, Resource], Dict[str, Resource], List[str]] = ({}, {}, [])
+        # relative directory -> (mtime_ns, file names, subdirectory names)
+        self._dirs: Dict[str, Tuple[int, List[str], List[str]]] = {}
+
+    def refresh(self, max_age: Optional[float] = None) -> None:
+        """Rescan if the index is older than ``max_age`` (default ``refresh_interval``) seconds"""
+        if not self.root:
+            return
+        max_age = self.refresh_interval if max_age is None else max_age
+        with self._lock:
+            now = time.monotonic()
+            if self._refreshed is not None and now - self._refreshed < max_age:
+                return
+            self._scan()
+            self._refreshed = time.monotonic()
+
+    def _scan(self) -> None:
+        previous, previous_by_uri, uris = self._view
+        resources: Dict[str, Resource] = {}
+        dirs: Dict[str, Tuple[int, List[str], List[str]]] = {}
+        pending = [""]
+        while pending:
+            rel_dir = pending.pop()
+            abs_dir = os.path.join(self.root, rel_dir)
+            try:
+                mtime_ns = os.stat(abs_dir).st_mtime_ns
+            except OSError:
+                continue
+            cached = self._dirs.get(rel_dir)
+            if cached is not None and cached[0] == mtime_ns:
+                _, files, subdirs = cached
+            else:
+                files, subdirs = self._list_dir(abs_dir)
+            dirs[rel_dir] = (mtime_ns, files, subdirs)
+            for name in files:
+                path = os.path.join(rel_dir, name)
+                try:
+                    stat = os.stat(os.path.join(abs_dir, name))
+                except OSError:
+                    continue
+                resource = previous.get(path)
+                if resource is None or (resource.size, resource.mtime_ns) != (stat.st_size, stat.st_mtime_ns):
+                    mime_type = resource.mime_type if resource is not None else guess_mime_type(name)
+                    resource = Resource(path, stat.st_size, stat.st_mtime_ns, mime_type)
+                resources[path] = resource
+            pending.extend(os.path.join(rel_dir, name) for name in subdirs)
+
+        by_uri = {resource.uri: resource for resource in resources.values()}
+        if by_uri.keys() != previous_by_uri.keys():
+            uris = sorted(by_uri)
+        self._view = (resources, by_uri, uris)
+        self._dirs = dirs
+
+    @staticmethod
+    def _list_dir(path: str) -> Tuple[List[str], List[str]]:
+        files, subdirs = [], []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if entry.name.startswith("."):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.name)
+                    elif entry.is_file(follow_symlinks=False):
+                        files.append(entry.name)
+        except OSError:
+            pass
+        return files, subdirs
+
+    def __len__(self) -> int:
+        self.refresh()
+        return len(self._view[0])
+
+    def get(self, uri: str) -> Resource:
+        """Look up a resource by URI, rescanning once if it is not indexed yet"""
+        if not isinstance(uri, str) or not uri.startswith(URI_PREFIX):
+            raise ResourceNotFound(str(uri))
+        path = os.path.normpath(unquote(uri[len(URI_PREFIX):]))
+        self.refresh()
+        resource = self._view[0].get(path)
+        if resource is None:
+            # Maybe a new file; rescan, but not more than once a second
+            self.refresh(max_age=min(self.refresh_interval, 1.0))
+            resource = self._view[0].get(path)
+        if resource is None:
+            raise ResourceNotFound(uri)
+        return resource
+
+    def list_page(self, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """``resources/list`` result: one page of resources, plus ``nextCursor`` if there are more"""
+        self.refresh()
+        _, by_uri, uris = self._view
+        start = bisect.bisect_right(uris, decode_cursor(cursor)) if cursor else 0
+        page = uris[start:start + self.page_size]
+        result: Dict[str, Any] = {"resources": [by_uri[uri].metadata() for uri in page]}
+        if start + self.page_size < len(uris):
+            result["nextCursor"] = encode_cursor(page[-1])
+        return result
+
+    def read(self, uri: str, offset: int = 0, length: Optional[int] = None) -> Dict[str, Any]:
+        """``resources/read`` result for ``length`` bytes of ``uri`` from ``offset``.
+
+        Reads are capped at ``max_read_bytes``; ``_meta`` reports the range
+        actually returned and the file size so clients can page through large
+        files. Text ranges are trimmed (or, inside one character, widened) to
+        whole UTF-8 characters.
+        """
+        if not isinstance(uri, str):
+            raise ResourceError("uri must be a string")
+        if isinstance(offset, bool) or not isinstance(offset, int) or offset < 0:
+            raise ResourceError("offset must be a non-negative integer")
+        if length is not None and (isinstance(length, bool) or not isinstance(length, int) or length < 0):
+            raise ResourceError("length must be a non-negative integer")
+        resource = self.get(uri)
+        length = self.max_read_bytes if length is None else min(length, self.max_read_bytes)
+        try:
+            path = resolve_data_path(resource.path, self.root)
+            data, start, size = read_range(path, offset, length, text=resource.is_text)
+        except FileNotFoundError:
+            raise ResourceNotFound(uri) from None
+        except ValueError as e:
+            raise ResourceError(str(e)) from None
+
+        content: Dict[str, Any] = {"uri": resource.uri, "mimeType": resource.mime_type}
+        if resource.is_text:
+            content["text"] = str(data, "utf-8", "replace")
+        else:
+            content["blob"] = base64.b64encode(data).decode("ascii")
+        return {
+            "contents": [content],
+            "_meta": {
+                "offset": start,
+                "length": len(data),
+                "size": size,
+                "eof": start + len(data) >= size,
+            },
+        }
+
+
+resource_index = ResourceIndex(
+    settings.DATA_DIR,
+    refresh_interval=settings.RESOURCE_REFRESH_INTERVAL,
+    page_size=settings.RESOURCE_PAGE_SIZE,
+    max_read_bytes=settings.RESOURCE_MAX_READ_BYTES,
+)
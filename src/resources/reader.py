@@ -0,0 +1,55 @@
+"""
+Byte-range reads of resource files through mmap.
+
+Only the pages covering the requested range are mapped, so reading a slice of
+a multi-GB file costs the slice, not the file.
+"""
+import mmap
+import os
+from typing import Tuple
+
+# A UTF-8 character is at most 4 bytes, so at most 3 continuation bytes
+_MAX_CONTINUATION = 3
+
+
+def _is_continuation(byte: int) -> bool:
+    return byte & 0xC0 == 0x80
+
+
+def read_range(path: str, offset: int, length: int, text: bool = False) -> Tuple[bytes, int, int]:
+    """Read up to ``length`` bytes of ``path`` from ``offset``.
+
+    Returns ``(data, start, file size)``. With ``text`` the range is trimmed
+    so it neither starts nor ends inside a UTF-8 character, which may move
+    ``start`` forward. A range that falls inside one character is widened to
+    that whole character instead, so paging through a file always advances.
+    Raises ValueError for an offset past the end.
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if offset > size:
+            raise ValueError(f"offset {offset} is past the end of the file ({size} bytes)")
+        end = min(size, offset + length)
+        if end <= offset:
+            return b"", offset, size
+
+        # mmap offsets must be aligned; map one extra byte to see what follows,
+        # and for text enough to widen the range to the next whole character
+        base = offset - offset % mmap.ALLOCATIONGRANULARITY
+        reach = max(end, offset + 2 * _MAX_CONTINUATION + 1) if text else end
+        window = min(size, reach + 1) - base
+        with mmap.mmap(f.fileno(), window, access=mmap.ACCESS_READ, offset=base) as view:
+            start = offset
+            if text:
+                for _ in range(_MAX_CONTINUATION):
+                    if start < size and _is_continuation(view[start - base]):
+                        start += 1
+                if end < size:
+                    for _ in range(_MAX_CONTINUATION):
+                        if end > start and _is_continuation(view[end - base]):
+                            end -= 1
+                if end <= start < size:
+                    end = start + 1
+                    while end < size and _is_continuation(view[end - base]):
+                        end += 1
+            return view[start - base:end - base], start, size
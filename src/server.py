@@ -1,110 +1,182 @@
 import asyncio
+import math
+import os
+import signal
 import sys
-from mcp import Server, StdioServerTransport
-from mcp.types import CallToolRequest, ListToolsRequest, JsonObject
-from src.tools.example_tools import ExampleTools
+from src.resources.index import ResourceError, resource_index
+from src.tools.catalog import registry
+from src.tools.executor import tool_executor
+from src.tools.registry import ToolError
+from src.tools.streaming import collect
+from src.utils.admission import Overloaded, admission, request_deadline
 from config.settings import settings
+from src.utils.log import setup_logging
+from src.utils.metrics import metrics
 import logging
 
 logger = logging.getLogger(__name__)
 
 class MyMCPServer:
     def __init__(self):
+        # The mcp SDK is imported here rather than with the module, so
+        # importing this module (tests, tooling) stays cheap
+        from mcp.server.lowlevel import Server
         self.server = Server(settings.SERVER_NAME, settings.SERVER_VERSION)
         self.setup_handlers()
     
     def setup_handlers(self):
         """Set up MCP request handlers"""
+        from mcp.shared.exceptions import McpError
+        from mcp.types import (
+            CallToolRequest, CallToolResult, ErrorData, ListResourcesRequest, ListResourcesResult,
+            ListToolsResult, ReadResourceRequest, ReadResourceResult, ServerResult,
+        )
         
         @self.server.list_tools()
-        async def handle_list_tools() -> list[JsonObject]:
+        async def handle_list_tools() -> ListToolsResult:
             """Return list of available tools"""
-            tools = [
-                {
-                    "name": "get_weather",
-                    "description": "Get weather information for a city",
-                    "inputSchema": {
-                        "type": "object",
-                        "properties": {
-                            "city": {
-                                "type": "string",
-                                "description": "City name to get weather for"
-                            }
-                        },
-                        "required": ["city"]
-                    }
-                },
-                {
-                    "name": "calculate_bmi",
-                    "description": "Calculate BMI from weight and height",
-                    "inputSchema": {
-                        "type": "object",
-                        "properties": {
-                            "weight": {
-                                "type": "number",
-                                "description": "Weight in kilograms"
-                            },
-                            "height": {
-                                "type": "number",
-                                "description": "Height in centimeters"
-                            }
-                        },
-                        "required": ["weight", "height"]
-                    }
-                },
-                {
-                    "name": "text_analyzer",
-                    "description": "Analyze text and provide statistics",
-                    "inputSchema": {
-                        "type": "object",
-                        "properties": {
-                            "text": {
-                                "type": "string",
-                                "description": "Text to analyze"
-                            }
-                        },
-                        "required": ["text"]
-                    }
-                }
-            ]
-            return tools
+            with metrics.timer("mcp_requests", "tools/list"):
+                return ListToolsResult(tools=registry.list_tools())
         
-        @self.server.call_tool()
-        async def handle_call_tool(name: str, arguments: JsonObject) -> list[JsonObject]:
-            """Handle tool execution requests"""
-            try:
-                if name == "get_weather":
-                    city = arguments.get("city", "")
-                    result = await ExampleTools.get_weather(city)
-                    return [{"type": "text", "text": result["content"][0]["text"]}]
-                
-                elif name == "calculate_bmi":
-                    weight = arguments.get("weight", 0)
-                    height = arguments.get("height", 0)
-                    result = await ExampleTools.calculate_bmi(weight, height)
-                    return [{"type": "text", "text": result["content"][0]["text"]}]
+        async def handle_call_tool(request: CallToolRequest) -> ServerResult:
+            """Handle tool execution requests.
+            
+            Registered directly rather than through ``call_tool()``, which
+            turns every exception (``McpError`` included) into an ``isError``
+            result: rejections such as Overloaded (-32004, with retryAfter) and
+            invalid arguments (-32602) must reach the client as JSON-RPC errors,
+            as they do over HTTP. The registry validates arguments itself, so
+            the SDK's own schema check is not wanted either.
+            
+            The SDK answers ``notifications/cancelled`` itself by cancelling
+            the request's scope, which cancels this handler; the executor then
+            signals ``cancelled()`` to a worker already running the tool.
+            """
+            name = request.params.name
+            arguments = request.params.arguments or {}
+            with metrics.timer("mcp_requests", "tools/call") as timer:
+                try:
+                    tool = registry.get(name)
+                    deadline = self.current_deadline()
+                    async with admission.admit_async(tool.name, "stdio", deadline, tool.max_inflight):
+                        # Streaming tools report progress as they go; their
+                        # content is returned in one piece
+                        result = await collect(registry.stream(name, arguments, deadline),
+                                               self.progress_reporter())
+                    timer.error = bool(result.get("isError"))
+                    return ServerResult(CallToolResult(**result))
                 
-                elif name == "text_analyzer":
-                    text = arguments.get("text", "")
-                    result = await ExampleTools.text_analyzer(text)
-                    return [{"type": "text", "text": result["content"][0]["text"]}]
+                except Overloaded as e:
+                    timer.error = True
+                    raise McpError(ErrorData(code=e.code, message=str(e),
+                                             data={"retryAfter": max(1, math.ceil(e.retry_after))}))
                 
-                else:
-                    raise ValueError(f"Unknown tool: {name}")
-                    
-            except Exception as e:
-                error_msg = f"Tool execution failed: {str(e)}"
-                logger.error(error_msg)
-                return [{"type": "text", "text": error_msg}]
+                except ToolError as e:
+                    timer.error = True
+                    raise McpError(ErrorData(code=e.code, message=str(e)))
+                        
+                except Exception as e:
+                    timer.error = True
+                    error_msg = f"Tool execution failed: {str(e)}"
+                    logger.error(error_msg)
+                    return ServerResult(CallToolResult(content=[{"type": "text", "text": error_msg}],
+                                                       isError=True))
+        
+        @self.server.list_resources()
+        async def handle_list_resources(request: ListResourcesRequest) -> ListResourcesResult:
+            """Return one page of resources under DATA_DIR"""
+            cursor = request.params.cursor if request.params else None
+            with metrics.timer("mcp_requests", "resources/list"):
+                try:
+                    # The first call (and each refresh) walks DATA_DIR
+                    page = await tool_executor.run("blocking", resource_index.list_page, {"cursor": cursor})
+                except ResourceError as e:
+                    raise McpError(ErrorData(code=e.code, message=str(e)))
+                return ListResourcesResult(resources=page["resources"], nextCursor=page.get("nextCursor"))
+        
+        async def handle_read_resource(request: ReadResourceRequest) -> ServerResult:
+            """Return a byte range of one resource.
+            
+            Registered directly rather than through ``read_resource()``, whose
+            handlers only get the URI: ``offset`` and ``length`` are extra
+            params, and the range read is reported in ``_meta``.
+            """
+            extra = request.params.model_extra or {}
+            with metrics.timer("mcp_requests", "resources/read"):
+                try:
+                    result = await tool_executor.run("blocking", resource_index.read, {
+                        "uri": str(request.params.uri),
+                        "offset": extra.get("offset", 0),
+                        "length": extra.get("length"),
+                    })
+                except ResourceError as e:
+                    raise McpError(ErrorData(code=e.code, message=str(e)))
+                return ServerResult(ReadResourceResult(**result))
+        
+        self.server.request_handlers[CallToolRequest] = handle_call_tool
+        self.server.request_handlers[ReadResourceRequest] = handle_read_resource
+    
+    def current_deadline(self):
+        """Deadline from the current request's ``_meta.timeoutMs``, if any"""
+        try:
+            meta = self.server.request_context.meta
+        except (AttributeError, LookupError):
+            return None
+        return request_deadline(meta)
+    
+    def progress_reporter(self):
+        """Callback sending a tool's Progress to the client, if it asked for progress"""
+        try:
+            context = self.server.request_context
+            token = context.meta.progressToken
+        except (AttributeError, LookupError):
+            return None
+        if token is None:
+            return None
+        
+        async def report(progress):
+            await context.session.send_progress_notification(
+                progress_token=token, progress=progress.progress,
+                total=progress.total, message=progress.message)
+        return report
+    
+    def metrics_text(self) -> str:
+        """Prometheus text exposition of this server's metrics"""
+        return metrics.render()
+    
+    def dump_metrics(self):
+        """Write metrics to METRICS_FILE (atomically) or, if unset, to stderr.
+        
+        stdout carries the MCP protocol, so the stdio server has no /metrics
+        endpoint; send SIGUSR1 to trigger a dump, e.g. for the node_exporter
+        textfile collector.
+        """
+        text = self.metrics_text()
+        if not settings.METRICS_FILE:
+            sys.stderr.write(text)
+            sys.stderr.flush()
+            return
+        tmp_path = f"{settings.METRICS_FILE}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, settings.METRICS_FILE)
     
     async def run(self):
         """Run the MCP server"""
+        setup_logging()
+        if hasattr(signal, "SIGUSR1"):
+            asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, self.dump_metrics)
         try:
             # Use stdio transport for MCP protocol
-            transport = StdioServerTransport()
-            await self.server.run(transport)
-            logger.info("MCP Server started successfully")
+            from mcp.server.stdio import stdio_server
+            async with stdio_server() as (read_stream, write_stream):
+                logger.info("MCP Server started successfully")
+                await self.server.run(read_stream, write_stream,
+                                      self.server.create_initialization_options())
             
         except Exception as e:
             logger.error(f"Failed to start MCP server: {e}")
-            sys.exit(1)
\ No newline at end of file
+            sys.exit(1)
+
+if __name__ == "__main__":
+    asyncio.run(MyMCPServer().run())
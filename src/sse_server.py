@@ -0,0 +1,169 @@
+"""
+Streaming HTTP transport (``TRANSPORT=sse``), an ASGI app served by uvicorn.
+
+It accepts the same JSON-RPC POSTs as the threaded server in main.py. A
+``tools/call`` from a client that accepts ``text/event-stream`` is answered
+with a stream of Server-Sent Events instead of one JSON body:
+
+- ``notifications/progress`` for each progress report of a streaming tool,
+  when the request carries ``params._meta.progressToken``,
+- ``notifications/tools/partial`` with each piece of content as the tool
+  produces it, when the request sets ``params._meta.partialResults``; the
+  final result then omits the content already sent,
+- the JSON-RPC response, as the last event.
+
+Every event is flushed as soon as it is produced, so clients see the start of
+a long call straight away and the server never holds the whole output. When
+the client disconnects the stream is torn down, which cancels the tool (and
+any pool worker it is waiting on; see executor.py). Everything else,
+including batches and calls from clients that only accept JSON, goes to the
+dispatcher shared with the threaded transport (dispatcher.py), on a worker
+thread.
+"""
+import json
+import logging
+import math
+import time
+from typing import Any, AsyncIterator, Dict, Optional
+import anyio.to_thread
+from sse_starlette import EventSourceResponse, ServerSentEvent
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+from config.settings import settings
+from src.dispatcher import dispatch, encode_reply, error_response
+from src.tools.catalog import registry
+from src.tools.registry import ToolError
+from src.tools.streaming import Progress
+from src.utils.admission import Overloaded, admission, request_deadline
+from src.utils.metrics import metrics
+
+logger = logging.getLogger("mcp.sse")
+
+CORS_HEADERS = {"Access-Control-Allow-Origin": "*"}
+
+
+def _error(request_id: Any, error: ToolError) -> Dict[str, Any]:
+    data = {"retryAfter": max(1, math.ceil(error.retry_after))} if isinstance(error, Overloaded) else None
+    return error_response(request_id, error.code, str(error), data)
+
+
+def _event(message: Dict[str, Any]) -> ServerSentEvent:
+    return ServerSentEvent(json.dumps(message))
+
+
+def wants_stream(request: Request, message: Any) -> bool:
+    """Whether to answer ``message`` with an event stream rather than JSON"""
+    return (isinstance(message, dict) and message.get("method") == "tools/call" and "id" in message
+            and isinstance(message.get("params"), dict)
+            and "text/event-stream" in request.headers.get("accept", ""))
+
+
+async def read_body(request: Request) -> Optional[bytes]:
+    """Request body, or None when it is larger than MAX_BODY_BYTES"""
+    try:
+        if int(request.headers.get("content-length", 0)) > settings.MAX_BODY_BYTES:
+            return None
+    except ValueError:
+        pass
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > settings.MAX_BODY_BYTES:
+            return None
+    return bytes(body)
+
+
+async def stream_call(message: Dict[str, Any], client: str, received: float) -> AsyncIterator[ServerSentEvent]:
+    """Run one tools/call, yielding its notifications and finally its response"""
+    request_id = message["id"]
+    params = message["params"]
+    name = params.get("name")
+    arguments = params.get("arguments", {})
+    meta = params.get("_meta") if isinstance(params.get("_meta"), dict) else {}
+    token = meta.get("progressToken")
+    partial = bool(meta.get("partialResults"))
+    with metrics.timer("mcp_requests", "tools/call") as timer:
+        try:
+            tool = registry.get(name)
+            deadline = request_deadline(meta, received)
+            content, is_error = [], False
+            async with admission.admit_async(tool.name, client, deadline, tool.max_inflight):
+                async for event in registry.stream(name, arguments, deadline):
+                    if isinstance(event, Progress):
+                        if token is not None:
+                            yield _event(event.notification(token))
+                        continue
+                    is_error = is_error or bool(event.get("isError"))
+                    if partial:
+                        yield _event({"jsonrpc": "2.0", "method": "notifications/tools/partial",
+                                      "params": {"requestId": request_id, "content": event["content"]}})
+                    else:
+                        content.extend(event["content"])
+            result: Dict[str, Any] = {"content": content}
+            if is_error:
+                result["isError"] = True
+            timer.error = is_error
+            yield _event({"jsonrpc": "2.0", "id": request_id, "result": result})
+        except ToolError as e:
+            timer.error = True
+            yield _event(_error(request_id, e))
+        except Exception as e:
+            timer.error = True
+            logger.exception("💥 Error streaming %s: %s", name, e)
+            yield _event(error_response(request_id, -32603, f"Internal error: {e}"))
+
+
+def create_app() -> Starlette:
+    """ASGI app for the streaming transport"""
+
+    async def post(request: Request) -> Response:
+        received = time.monotonic()
+        body = await read_body(request)
+        if body is None:
+            return Response("Request body too large", 413, headers=CORS_HEADERS)
+        client = request.client.host if request.client else ""
+        try:
+            message = json.loads(body)
+        except ValueError as e:
+            reply = error_response(None, -32700, f"Parse error: {e}")
+        else:
+            if wants_stream(request, message):
+                return EventSourceResponse(stream_call(message, client, received), headers=CORS_HEADERS,
+                                           ping=settings.SSE_PING_INTERVAL or None)
+            reply = await anyio.to_thread.run_sync(dispatch, message, client, received)
+
+        if reply is None:
+            return Response(status_code=202, headers=CORS_HEADERS)
+        headers = dict(CORS_HEADERS)
+        status = 200
+        if isinstance(reply, dict) and reply.get("error", {}).get("code") == Overloaded.code:
+            status = 503
+            headers["Retry-After"] = str(reply["error"]["data"]["retryAfter"])
+        return Response(encode_reply(reply), status, headers=headers, media_type="application/json")
+
+    async def options(request: Request) -> Response:
+        return Response(headers={**CORS_HEADERS,
+                                 "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
+                                 "Access-Control-Allow-Headers": "Content-Type"})
+
+    async def metrics_endpoint(request: Request) -> Response:
+        return Response(metrics.scrape(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+    middleware = []
+    if settings.GZIP_MIN_BYTES:
+        # Event streams are never compressed, so they still flush per event
+        middleware.append(Middleware(GZipMiddleware, minimum_size=settings.GZIP_MIN_BYTES,
+                                     compresslevel=settings.GZIP_LEVEL))
+    return Starlette(
+        routes=[
+            Route("/metrics", metrics_endpoint, methods=["GET"]),
+            # Like the threaded server, answer MCP on any path
+            Route("/{path:path}", post, methods=["POST"]),
+            Route("/{path:path}", options, methods=["OPTIONS"]),
+        ],
+        middleware=middleware,
+    )
@@ -0,0 +1,47 @@
+import json
+import operator
+from typing import Dict, Any, List
+from src.utils.helpers import create_success_response, create_error_response, map_columns
+
+_OPERATIONS = {
+    "add": operator.add,
+    "subtract": operator.sub,
+    "multiply": operator.mul,
+    "divide": operator.truediv,
+}
+
+class BasicTools:
+    """Greeting and calculator tools"""
+    
+    @staticmethod
+    def greet(name: str = "Friend") -> Dict[str, Any]:
+        """Greet the caller by name"""
+        return create_success_response(f"Hello, {name}! Welcome to MCP Server!")
+    
+    @staticmethod
+    def calculator(operation: str = "add", a: float = 0, b: float = 0) -> Dict[str, Any]:
+        """Apply a basic arithmetic operation to two numbers"""
+        if operation == "add": result = f"{a} + {b} = {a + b}"
+        elif operation == "subtract": result = f"{a} - {b} = {a - b}"
+        elif operation == "multiply": result = f"{a} × {b} = {a * b}"
+        elif operation == "divide":
+            if b == 0: result = "Error: Cannot divide by zero"
+            else: result = f"{a} ÷ {b} = {a / b}"
+        else: result = f"Unknown operation: {operation}"
+        return create_success_response(result)
+    
+    @staticmethod
+    def calculator_batch(operation: str, a: List[float], b: List[float]) -> Dict[str, Any]:
+        """Apply one operation element-wise to two equal-length columns.
+        
+        Returns columnar JSON: ``results`` and an ``error`` mask set to 1 where
+        the item failed (division by zero, overflow), with a null result.
+        """
+        if len(a) != len(b):
+            return create_error_response("a and b must have the same length")
+        if operation not in _OPERATIONS:
+            return create_error_response(f"Unknown operation: {operation}")
+        
+        results, error = map_columns(_OPERATIONS[operation], a, b)
+        result = {"operation": operation, "results": results, "error": error}
+        return create_success_response(json.dumps(result, separators=(",", ":"), allow_nan=False))
@@ -0,0 +1,184 @@
+"""
+Built-in tools, declared once and served by both the HTTP and stdio servers.
+
+Handlers are given as ``"module:attr"`` references so that ``tools/list`` is
+answered from the metadata below without importing any tool code; each
+module is imported on the first call to one of its tools.
+"""
+from src.tools.registry import ToolRegistry
+
+registry = ToolRegistry()
+
+registry.register(
+    name="greet",
+    description="A friendly greeting tool",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "name": {
+                "type": "string",
+                "description": "Your name"
+            }
+        },
+        "required": ["name"]
+    },
+    handler="src.tools.basic_tools:BasicTools.greet",
+    cacheable=True,
+)
+
+registry.register(
+    name="calculator",
+    description="Simple calculator with basic operations",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "operation": {
+                "type": "string",
+                "description": "add, subtract, multiply, divide",
+                "enum": ["add", "subtract", "multiply", "divide"]
+            },
+            "a": {
+                "type": "number",
+                "description": "First number"
+            },
+            "b": {
+                "type": "number",
+                "description": "Second number"
+            }
+        },
+        "required": ["operation", "a", "b"]
+    },
+    handler="src.tools.basic_tools:BasicTools.calculator",
+    cacheable=True,
+)
+
+registry.register(
+    name="calculator_batch",
+    description="Apply one calculator operation element-wise to two arrays; returns columnar JSON",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "operation": {
+                "type": "string",
+                "description": "add, subtract, multiply, divide",
+                "enum": ["add", "subtract", "multiply", "divide"]
+            },
+            "a": {
+                "type": "array",
+                "description": "First operands",
+                "items": {"type": "number"}
+            },
+            "b": {
+                "type": "array",
+                "description": "Second operands (same length as a)",
+                "items": {"type": "number"}
+            }
+        },
+        "required": ["operation", "a", "b"]
+    },
+    handler="src.tools.basic_tools:BasicTools.calculator_batch",
+    execution="cpu",
+)
+
+registry.register(
+    name="get_weather",
+    description="Get weather information for a city",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "city": {
+                "type": "string",
+                "description": "City name to get weather for"
+            }
+        },
+        "required": ["city"]
+    },
+    handler="src.tools.example_tools:ExampleTools.get_weather",
+)
+
+registry.register(
+    name="calculate_bmi",
+    description="Calculate BMI from weight and height",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "weight": {
+                "type": "number",
+                "description": "Weight in kilograms"
+            },
+            "height": {
+                "type": "number",
+                "description": "Height in centimeters"
+            }
+        },
+        "required": ["weight", "height"]
+    },
+    handler="src.tools.example_tools:ExampleTools.calculate_bmi",
+    cacheable=True,
+)
+
+registry.register(
+    name="calculate_bmi_batch",
+    description="Calculate BMI for many weight/height pairs; returns columnar JSON",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "weight": {
+                "type": "array",
+                "description": "Weights in kilograms",
+                "items": {"type": "number"}
+            },
+            "height": {
+                "type": "array",
+                "description": "Heights in centimeters (same length as weight)",
+                "items": {"type": "number"}
+            }
+        },
+        "required": ["weight", "height"]
+    },
+    handler="src.tools.example_tools:ExampleTools.calculate_bmi_batch",
+    execution="cpu",
+)
+
+registry.register(
+    name="text_analyzer",
+    description="Analyze text and provide statistics",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "text": {
+                "type": "string",
+                "description": "Text to analyze"
+            },
+            "path": {
+                "type": "string",
+                "description": "File under the server's data directory to analyze instead of text"
+            }
+        },
+        "oneOf": [
+            {"required": ["text"]},
+            {"required": ["path"]}
+        ]
+    },
+    # Runs inline and offloads the counting itself, so a large file's ranges
+    # share the CPU pool instead of occupying one of its workers
+    handler="src.tools.example_tools:ExampleTools.text_analyzer",
+    # Files can change between calls; only inline text is a pure input
+    cacheable=lambda arguments: "path" not in arguments,
+)
+
+registry.register(
+    name="text_analyzer_stream",
+    description="Analyze a file in the data directory, reporting progress as it goes",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "path": {
+                "type": "string",
+                "description": "File under the server's data directory to analyze"
+            }
+        },
+        "required": ["path"]
+    },
+    handler="src.tools.example_tools:ExampleTools.text_analyzer_stream",
+)
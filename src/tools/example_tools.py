@@ -1,6 +1,32 @@
-from typing import Dict, Any
-import requests
-from src.utils.helpers import validate_tool_inputs, create_success_response, create_error_response
+import json
+import os
+from bisect import bisect_right
+from typing import Dict, Any, List, AsyncIterator
+from config.settings import settings
+from src.tools.executor import tool_executor
+from src.tools.streaming import Progress
+from src.tools.text_stats import TextStats, analyze_file, analyze_range, analyze_text
+from src.tools.weather_client import get_weather_client
+from src.utils.helpers import create_success_response, create_error_response, map_columns, resolve_data_path
+
+BMI_THRESHOLDS = [18.5, 25, 30]
+BMI_CATEGORIES = ["Underweight", "Normal weight", "Overweight", "Obese"]
+# text_analyzer_stream reports progress after each section of this many bytes
+STREAM_SECTION_BYTES = 8 * 1024 * 1024
+
+def _bmi(weight: float, height: float) -> float:
+    if weight <= 0 or height <= 0:
+        raise ValueError("weight and height must be positive")
+    return weight * 10000 / (height * height)
+
+def format_text_stats(stats: TextStats) -> str:
+    return f"""
+Text Analysis Results:
+- Character count: {stats.chars}
+- Word count: {stats.words}
+- Sentence count: {stats.sentences}
+- Average word length: {stats.average_word_length:.2f} characters
+"""
 
 class ExampleTools:
     """Example MCP tools implementation"""
@@ -9,18 +35,19 @@ class ExampleTools:
     async def get_weather(city: str) -> Dict[str, Any]:
         """Get weather information for a city"""
         try:
-            # This is a mock implementation - replace with real API
             if not city:
                 return create_error_response("City parameter is required")
             
-            # Simulate API call
-            # In real implementation, you would call a weather API
-            weather_data = {
-                "city": city,
-                "temperature": "22°C",
-                "conditions": "Sunny",
-                "humidity": "65%"
-            }
+            if settings.WEATHER_API_URL:
+                weather_data = dict(await get_weather_client().get(city), city=city)
+            else:
+                # No provider configured: serve mock data
+                weather_data = {
+                    "city": city,
+                    "temperature": "22°C",
+                    "conditions": "Sunny",
+                    "humidity": "65%"
+                }
             
             response_text = f"""
 Weather in {weather_data['city']}:
@@ -67,25 +94,67 @@ BMI Calculation Results:
             return create_error_response(f"BMI calculation failed: {str(e)}")
     
     @staticmethod
-    async def text_analyzer(text: str) -> Dict[str, Any]:
-        """Analyze text and provide statistics"""
+    async def calculate_bmi_batch(weight: List[float], height: List[float]) -> Dict[str, Any]:
+        """Calculate BMI for many people at once.
+        
+        Returns columnar JSON: ``bmi`` (rounded to 2 places), ``category`` as an
+        index into ``categories``, and ``error`` set to 1 where weight or height
+        is not positive or the BMI cannot be computed (those rows have null bmi
+        and category).
+        """
+        if len(weight) != len(height):
+            return create_error_response("weight and height must have the same length")
+        
+        raw, error = map_columns(_bmi, weight, height)
+        result = {
+            "bmi": [None if b is None else round(b, 2) for b in raw],
+            "category": [None if b is None else bisect_right(BMI_THRESHOLDS, b) for b in raw],
+            "categories": BMI_CATEGORIES,
+            "error": error,
+        }
+        return create_success_response(json.dumps(result, separators=(",", ":"), allow_nan=False))
+    
+    @staticmethod
+    async def text_analyzer(text: str = "", path: str = "") -> Dict[str, Any]:
+        """Analyze text (or a file under DATA_DIR) and provide statistics.
+        
+        The counting runs on the CPU pool; this handler only waits for it.
+        """
         try:
-            if not text:
+            if path:
+                stats = await analyze_file(
+                    resolve_data_path(path),
+                    parts=settings.TEXT_ANALYSIS_WORKERS,
+                    parallel_threshold=settings.TEXT_PARALLEL_THRESHOLD,
+                )
+            elif text:
+                stats = await tool_executor.run("cpu", analyze_text, {"text": text})
+            else:
                 return create_error_response("Text parameter is required")
             
-            # Basic text analysis
-            word_count = len(text.split())
-            char_count = len(text)
-            sentence_count = text.count('.') + text.count('!') + text.count('?')
-            
-            response_text = f"""
-Text Analysis Results:
-- Character count: {char_count}
-- Word count: {word_count}
-- Sentence count: {sentence_count}
-- Average word length: {char_count/word_count:.2f} characters
-"""
-            return create_success_response(response_text)
+            return create_success_response(format_text_stats(stats))
             
         except Exception as e:
-            return create_error_response(f"Text analysis failed: {str(e)}")
\ No newline at end of file
+            return create_error_response(f"Text analysis failed: {str(e)}")
+    
+    @staticmethod
+    async def text_analyzer_stream(path: str) -> AsyncIterator[Any]:
+        """Analyze a file under DATA_DIR section by section, reporting progress.
+        
+        Each section is analyzed on the CPU pool, so cancelling the call (or
+        the client disconnecting) stops the work between sections.
+        """
+        try:
+            full_path = resolve_data_path(path)
+            size = os.path.getsize(full_path)
+        except (OSError, ValueError) as e:
+            yield create_error_response(f"Text analysis failed: {str(e)}")
+            return
+        
+        stats = TextStats()
+        for start in range(0, size, STREAM_SECTION_BYTES):
+            end = min(size, start + STREAM_SECTION_BYTES)
+            section = await tool_executor.run("cpu", analyze_range, {"path": full_path, "start": start, "end": end})
+            stats.merge(section)
+            yield Progress(end, size, f"Analyzed {end} of {size} bytes")
+        yield create_success_response(format_text_stats(stats))
\ No newline at end of file
@@ -0,0 +1,140 @@
+"""
+Runs blocking and CPU-bound tools off the event loop.
+
+Tools registered with ``execution="blocking"`` run on a thread pool; tools with
+``execution="cpu"`` run on a thread or process pool chosen by ``CPU_POOL``.
+Each kind has its own concurrency limit, and every call can carry a timeout.
+Cancelling the awaiting task (timeout, client cancel notification) releases
+the slot immediately. Work that has not started yet is dropped; thread workers
+that are already running are asked to stop through ``cancelled()`` /
+``check_cancelled()``, which long-running tools should poll. A process worker that is already running
+finishes in the background and its result is discarded.
+"""
+import asyncio
+import os
+import threading
+import weakref
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from config.settings import settings
+
+_local = threading.local()
+
+
+class ToolCancelled(Exception):
+    """Raised inside a worker by ``check_cancelled`` once its call is cancelled"""
+
+
+def cancelled() -> bool:
+    """True when the tool call running on this worker thread has been cancelled"""
+    event = getattr(_local, "cancel_event", None)
+    return event is not None and event.is_set()
+
+
+def check_cancelled() -> None:
+    """Raise ToolCancelled if the tool call on this worker thread was cancelled"""
+    if cancelled():
+        raise ToolCancelled()
+
+
+def _invoke(handler: Callable[..., Any], arguments: Dict[str, Any],
+            cancel_event: Optional[threading.Event] = None) -> Any:
+    """Worker-side trampoline: call the handler, driving it to completion if async"""
+    _local.cancel_event = cancel_event
+    try:
+        result = handler(**arguments)
+        if asyncio.iscoroutine(result):
+            result = asyncio.run(result)
+        return result
+    finally:
+        _local.cancel_event = None
+
+
+class ToolExecutor:
+    """Bounded pools for tools that must not run on the event loop"""
+
+    def __init__(self, blocking_workers: int, cpu_workers: int, cpu_pool: str = "thread",
+                 blocking_concurrency: Optional[int] = None, cpu_concurrency: Optional[int] = None):
+        if cpu_pool not in ("thread", "process"):
+            raise ValueError(f"CPU pool must be 'thread' or 'process', not {cpu_pool!r}")
+        self.blocking_workers = blocking_workers
+        self.cpu_workers = cpu_workers
+        self.cpu_pool = cpu_pool
+        self.limits = {
+            "blocking": blocking_concurrency or blocking_workers,
+            "cpu": cpu_concurrency or cpu_workers,
+        }
+        self._pools: Dict[str, Executor] = {}
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = \
+            weakref.WeakKeyDictionary()
+
+    def _pool(self, kind: str) -> Executor:
+        with self._lock:
+            if self._pid != os.getpid():
+                # Pools do not survive fork; build fresh ones in the child
+                self._pools = {}
+                self._pid = os.getpid()
+            pool = self._pools.get(kind)
+            if pool is None:
+                if kind == "cpu" and self.cpu_pool == "process":
+                    # multiprocessing is slow to import; only load it when used
+                    from concurrent.futures import ProcessPoolExecutor
+                    pool = ProcessPoolExecutor(max_workers=self.cpu_workers)
+                elif kind == "cpu":
+                    pool = ThreadPoolExecutor(max_workers=self.cpu_workers, thread_name_prefix="mcp-cpu")
+                else:
+                    pool = ThreadPoolExecutor(max_workers=self.blocking_workers, thread_name_prefix="mcp-blocking")
+                self._pools[kind] = pool
+            return pool
+
+    def _semaphore(self, kind: str) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphores = self._semaphores.get(loop)
+        if semaphores is None:
+            semaphores = self._semaphores[loop] = {}
+        semaphore = semaphores.get(kind)
+        if semaphore is None:
+            semaphore = semaphores[kind] = asyncio.Semaphore(self.limits[kind])
+        return semaphore
+
+    async def run(self, kind: str, handler: Callable[..., Any], arguments: Dict[str, Any],
+                  timeout: Optional[float] = None) -> Any:
+        """Run ``handler(**arguments)`` on the ``kind`` pool.
+
+        Raises ``asyncio.TimeoutError`` when ``timeout`` elapses, counting time
+        spent waiting for a free slot.
+        """
+        return await asyncio.wait_for(self._run(kind, handler, arguments), timeout)
+
+    async def _run(self, kind: str, handler: Callable[..., Any], arguments: Dict[str, Any]) -> Any:
+        async with self._semaphore(kind):
+            pool = self._pool(kind)
+            # Events cannot cross a process boundary; process workers are not
+            # cooperatively cancellable
+            cancel_event = threading.Event() if isinstance(pool, ThreadPoolExecutor) else None
+            future = pool.submit(_invoke, handler, arguments, cancel_event)
+            try:
+                return await asyncio.wrap_future(future)
+            except asyncio.CancelledError:
+                future.cancel()
+                if cancel_event is not None:
+                    cancel_event.set()
+                raise
+
+    def shutdown(self) -> None:
+        """Stop the pools without waiting for running work"""
+        with self._lock:
+            for pool in self._pools.values():
+                pool.shutdown(wait=False, cancel_futures=True)
+            self._pools = {}
+
+
+tool_executor = ToolExecutor(
+    blocking_workers=settings.BLOCKING_TOOL_WORKERS,
+    cpu_workers=settings.CPU_TOOL_WORKERS,
+    cpu_pool=settings.CPU_POOL,
+    blocking_concurrency=settings.BLOCKING_TOOL_CONCURRENCY,
+    cpu_concurrency=settings.CPU_TOOL_CONCURRENCY,
+)
@@ -0,0 +1,387 @@
+import asyncio
+import hashlib
+import importlib
+import inspect
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple, Union
+from config.settings import settings
+from src.tools.executor import tool_executor
+from src.tools.streaming import Progress, as_result, collect
+from src.utils.background_loop import background_loop
+from src.utils.metrics import metrics
+from src.utils.result_cache import result_cache
+
+
+class ToolError(Exception):
+    """Tool call failure that maps onto a JSON-RPC error"""
+    code = -32603
+
+
+class UnknownToolError(ToolError):
+    """Raised when a call names a tool that is not registered"""
+    code = -32602
+
+    def __init__(self, name: str):
+        super().__init__(f"Unknown tool: {name}")
+        self.name = name
+
+
+class InvalidToolArguments(ToolError):
+    """Raised when call arguments do not match the tool's input schema"""
+    code = -32602
+
+
+class ToolTimeoutError(ToolError):
+    """Raised when a tool call runs past its timeout"""
+    code = -32001
+
+
+class DeadlineExceeded(ToolError):
+    """Raised when a call cannot finish before the deadline its client set"""
+    code = -32003
+
+
+EXECUTION_MODES = ("inline", "blocking", "cpu")
+
+# Python types accepted for simple JSON Schema item types (bool is not a number)
+_ITEM_TYPES = {
+    "number": frozenset((int, float)),
+    "integer": frozenset((int,)),
+    "string": frozenset((str,)),
+    "boolean": frozenset((bool,)),
+}
+
+
+def _split_item_checks(schema: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """Pull ``{"type": "array", "items": {"type": T}}`` item checks out of a schema.
+
+    jsonschema checks array items one Python call at a time, which takes
+    seconds for 100k-element columns. Returns the schema without those
+    ``items`` plus ``{property: T}`` for checks the Tool does in bulk instead.
+    """
+    checks = {}
+    for name, prop in (schema.get("properties") or {}).items():
+        items = prop.get("items") if isinstance(prop, dict) else None
+        if (prop.get("type") == "array" and isinstance(items, dict)
+                and set(items) <= {"type", "description"} and items.get("type") in _ITEM_TYPES):
+            checks[name] = items["type"]
+    if not checks:
+        return schema, checks
+    properties = {
+        name: {key: value for key, value in prop.items() if key != "items"} if name in checks else prop
+        for name, prop in schema["properties"].items()
+    }
+    return {**schema, "properties": properties}, checks
+
+
+def load_handler(reference: str) -> Callable[..., Any]:
+    """Import the callable named by a ``"package.module:Class.attr"`` reference"""
+    module_name, _, path = reference.partition(":")
+    target: Any = importlib.import_module(module_name)
+    for attr in path.split("."):
+        target = getattr(target, attr)
+    return target
+
+
+@dataclass(frozen=True)
+class Tool:
+    """A registered tool: its MCP metadata plus the callable that implements it.
+
+    The handler receives the call arguments as keyword arguments and returns a
+    ``create_success_response``-style dict. It may be a plain function, a
+    coroutine function or an async generator streaming its result (see
+    streaming.py), or a ``"module:attr"`` reference to one that is
+    imported on the first call, so listing tools never loads their code. The
+    input schema is compiled into a validator on first use as well; an invalid
+    schema fails the first call.
+
+    ``execution`` says where the handler runs: ``"inline"`` on the caller's
+    thread or event loop, ``"blocking"`` on the thread pool for tools that wait
+    on I/O without awaiting, ``"cpu"`` on the CPU pool (see executor.py);
+    streaming handlers always run on the event loop and offload their own
+    heavy steps. ``timeout`` overrides TOOL_TIMEOUT for this tool. ``cacheable`` opts a
+    pure tool into the shared result cache; it may also be a predicate on the
+    arguments for tools that are only pure for some calls. ``max_inflight``
+    overrides TOOL_MAX_INFLIGHT, the admission cap on concurrent calls.
+    """
+    name: str
+    description: str
+    input_schema: Dict[str, Any]
+    handler: Union[Callable[..., Any], str]
+    execution: str = "inline"
+    timeout: Optional[float] = None
+    cacheable: Union[bool, Callable[[Dict[str, Any]], bool]] = False
+    max_inflight: Optional[int] = None
+    item_checks: Dict[str, str] = field(init=False, repr=False, compare=False)
+    _schema: Dict[str, Any] = field(init=False, repr=False, compare=False)
+    _implementation: Optional[Callable[..., Any]] = field(init=False, default=None, repr=False, compare=False)
+    _validator: Any = field(init=False, default=None, repr=False, compare=False)
+
+    def __post_init__(self):
+        if self.execution not in EXECUTION_MODES:
+            raise ValueError(f"Unknown execution mode for {self.name}: {self.execution!r}")
+        if isinstance(self.handler, str) and ":" not in self.handler:
+            raise ValueError(f"Handler reference for {self.name} must look like 'module:attr'")
+        schema, item_checks = _split_item_checks(self.input_schema)
+        object.__setattr__(self, "_schema", schema)
+        object.__setattr__(self, "item_checks", item_checks)
+
+    @property
+    def implementation(self) -> Callable[..., Any]:
+        """The handler callable, imported on first use if given as a reference"""
+        if self._implementation is None:
+            handler = load_handler(self.handler) if isinstance(self.handler, str) else self.handler
+            object.__setattr__(self, "_implementation", handler)
+        return self._implementation
+
+    @property
+    def is_async(self) -> bool:
+        return inspect.iscoroutinefunction(self.implementation) or self.streaming
+
+    @property
+    def streaming(self) -> bool:
+        """True when the handler is an async generator yielding progress and content"""
+        return inspect.isasyncgenfunction(self.implementation)
+
+    @property
+    def validator(self) -> Any:
+        """jsonschema validator for the input schema, compiled on first use"""
+        if self._validator is None:
+            from jsonschema.validators import validator_for
+            validator_class = validator_for(self.input_schema)
+            validator_class.check_schema(self.input_schema)
+            object.__setattr__(self, "_validator", validator_class(self._schema))
+        return self._validator
+
+    @property
+    def runs_inline_sync(self) -> bool:
+        """True when the handler can simply be called on the current thread"""
+        return self.execution == "inline" and not self.is_async
+
+    def cache_key(self, arguments: Dict[str, Any]) -> Optional[bytes]:
+        """Result cache key for this call, or None if it must not be cached"""
+        if not self.cacheable or self.streaming:
+            return None
+        if callable(self.cacheable) and not self.cacheable(arguments):
+            return None
+        return result_cache.key(self.name, arguments)
+
+    @property
+    def effective_timeout(self) -> Optional[float]:
+        timeout = self.timeout if self.timeout is not None else settings.TOOL_TIMEOUT
+        return timeout or None
+
+    def validate(self, arguments: Any) -> None:
+        """Raise InvalidToolArguments unless ``arguments`` match the input schema"""
+        if not isinstance(arguments, dict):
+            raise InvalidToolArguments(f"Invalid arguments for {self.name}: expected an object")
+        if not self.validator.is_valid(arguments):
+            from jsonschema.exceptions import best_match
+            error = best_match(self.validator.iter_errors(arguments))
+            location = "/".join(str(part) for part in error.absolute_path)
+            where = f" at '{location}'" if location else ""
+            raise InvalidToolArguments(f"Invalid arguments for {self.name}{where}: {error.message}")
+        for name, item_type in self.item_checks.items():
+            values = arguments.get(name)
+            if isinstance(values, list) and not set(map(type, values)) <= _ITEM_TYPES[item_type]:
+                allowed = _ITEM_TYPES[item_type]
+                index = next(i for i, value in enumerate(values) if type(value) not in allowed)
+                raise InvalidToolArguments(
+                    f"Invalid arguments for {self.name} at '{name}/{index}': "
+                    f"{values[index]!r} is not of type '{item_type}'")
+
+    def metadata(self) -> Dict[str, Any]:
+        """MCP ``tools/list`` entry for this tool"""
+        return {
+            "name": self.name,
+            "description": self.description,
+            "inputSchema": self.input_schema,
+        }
+
+
+class ToolRegistry:
+    """Name -> Tool mapping shared by the HTTP and stdio servers"""
+
+    def __init__(self):
+        self._tools: Dict[str, Tool] = {}
+        self._metadata: Optional[List[Dict[str, Any]]] = None
+        self._encoded: Optional[Tuple[bytes, str]] = None
+
+    def _invalidate(self) -> None:
+        self._metadata = None
+        self._encoded = None
+
+    def register(self, name: str, description: str, input_schema: Dict[str, Any],
+                 handler: Union[Callable[..., Any], str], execution: str = "inline",
+                 timeout: Optional[float] = None,
+                 cacheable: Union[bool, Callable[[Dict[str, Any]], bool]] = False,
+                 max_inflight: Optional[int] = None) -> Tool:
+        """Register (or replace) a tool"""
+        tool = Tool(name, description, input_schema, handler, execution, timeout, cacheable, max_inflight)
+        self._tools[name] = tool
+        self._invalidate()
+        return tool
+
+    def unregister(self, name: str) -> None:
+        """Remove a tool if present"""
+        if self._tools.pop(name, None) is not None:
+            self._invalidate()
+
+    def get(self, name: str) -> Tool:
+        """Look up a tool by name"""
+        try:
+            return self._tools[name]
+        except KeyError:
+            raise UnknownToolError(name) from None
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._tools
+
+    def __len__(self) -> int:
+        return len(self._tools)
+
+    def list_tools(self) -> List[Dict[str, Any]]:
+        """Metadata for every tool, built once per change to the tool set"""
+        if self._metadata is None:
+            self._metadata = [tool.metadata() for tool in self._tools.values()]
+        return self._metadata
+
+    def encoded_tools(self) -> Tuple[bytes, str]:
+        """JSON-encoded ``tools/list`` result and its ETag.
+
+        The ETag is a digest of the encoded body, so it is the same in every
+        process serving the same tool set and changes whenever the set does.
+        """
+        encoded = self._encoded
+        if encoded is None:
+            body = json.dumps({"tools": self.list_tools()}).encode("utf-8")
+            etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+            encoded = self._encoded = (body, etag)
+        return encoded
+
+    def resolve(self, name: str, arguments: Any) -> Tool:
+        """Look up a tool and validate the call arguments against its schema"""
+        tool = self.get(name)
+        tool.validate(arguments)
+        return tool
+
+    async def call(self, name: str, arguments: Dict[str, Any],
+                   deadline: Optional[float] = None) -> Dict[str, Any]:
+        """Run a tool from async code.
+
+        ``deadline`` (a ``time.monotonic()`` value) further limits how long a
+        non-inline-sync handler may run.
+        """
+        tool = self.get(name)
+        with metrics.timer("mcp_tool_calls", tool.name) as timer:
+            tool.validate(arguments)
+            key = tool.cache_key(arguments)
+            if key is not None:
+                cached = result_cache.get(key)
+                if cached is not None:
+                    return cached
+            if tool.runs_inline_sync:
+                result = tool.implementation(**arguments)
+            else:
+                result = await self._run(tool, arguments, deadline)
+            timer.error = bool(result.get("isError"))
+            if key is not None and not timer.error:
+                result_cache.put(key, result)
+            return result
+
+    def call_sync(self, name: str, arguments: Dict[str, Any],
+                  deadline: Optional[float] = None) -> Dict[str, Any]:
+        """Run a tool from a worker thread.
+
+        Plain inline handlers run on the calling thread; everything else goes
+        through the shared background event loop, so pool limits and timeouts
+        apply the same way as on the stdio server.
+        """
+        tool = self.get(name)
+        with metrics.timer("mcp_tool_calls", tool.name) as timer:
+            tool.validate(arguments)
+            key = tool.cache_key(arguments)
+            if key is not None:
+                cached = result_cache.get(key)
+                if cached is not None:
+                    return cached
+            if tool.runs_inline_sync:
+                result = tool.implementation(**arguments)
+            else:
+                result = background_loop.run(self._run(tool, arguments, deadline))
+            timer.error = bool(result.get("isError"))
+            if key is not None and not timer.error:
+                result_cache.put(key, result)
+            return result
+
+    async def stream(self, name: str, arguments: Dict[str, Any],
+                     deadline: Optional[float] = None) -> AsyncIterator[Any]:
+        """Run a tool, yielding its events as they are produced.
+
+        Events are Progress reports and ``{"content": [...]}`` result fragments
+        (see streaming.py). Other tools yield their whole result once. The
+        timeout and ``deadline`` cover the whole stream; closing the iterator
+        early cancels the tool.
+        """
+        tool = self.get(name)
+        if not tool.streaming:
+            yield await self.call(name, arguments, deadline)
+            return
+        with metrics.timer("mcp_tool_calls", tool.name) as timer:
+            tool.validate(arguments)
+            timeout, limited_by_deadline = self._budget(tool, deadline)
+            expires = time.monotonic() + timeout if timeout is not None else None
+            events = self._events(tool, arguments)
+            try:
+                while True:
+                    remaining = max(0.0, expires - time.monotonic()) if expires is not None else None
+                    try:
+                        event = await asyncio.wait_for(events.__anext__(), remaining)
+                    except StopAsyncIteration:
+                        return
+                    except asyncio.TimeoutError:
+                        raise self._timed_out(tool, timeout, limited_by_deadline) from None
+                    if not isinstance(event, Progress) and event.get("isError"):
+                        timer.error = True
+                    yield event
+            finally:
+                await events.aclose()
+
+    @staticmethod
+    async def _events(tool: Tool, arguments: Dict[str, Any]) -> AsyncIterator[Any]:
+        handler_events = tool.implementation(**arguments)
+        try:
+            async for event in handler_events:
+                yield event if isinstance(event, Progress) else as_result(event)
+        finally:
+            await handler_events.aclose()
+
+    @staticmethod
+    def _budget(tool: Tool, deadline: Optional[float]) -> Tuple[Optional[float], bool]:
+        """Seconds the call may run, and whether the client's deadline is what limits it"""
+        timeout = tool.effective_timeout
+        remaining = deadline - time.monotonic() if deadline is not None else None
+        if remaining is not None and remaining <= 0:
+            raise DeadlineExceeded(f"Deadline passed before {tool.name} started")
+        limited_by_deadline = remaining is not None and (timeout is None or remaining < timeout)
+        return (remaining if limited_by_deadline else timeout), limited_by_deadline
+
+    @staticmethod
+    def _timed_out(tool: Tool, timeout: Optional[float], limited_by_deadline: bool) -> ToolError:
+        if limited_by_deadline:
+            return DeadlineExceeded(f"Tool {tool.name} did not finish before the deadline")
+        return ToolTimeoutError(f"Tool {tool.name} timed out after {timeout}s")
+
+    async def _run(self, tool: Tool, arguments: Dict[str, Any],
+                   deadline: Optional[float] = None) -> Dict[str, Any]:
+        timeout, limited_by_deadline = self._budget(tool, deadline)
+        try:
+            if tool.streaming:
+                return await asyncio.wait_for(collect(self._events(tool, arguments)), timeout)
+            if tool.execution == "inline":
+                return await asyncio.wait_for(tool.implementation(**arguments), timeout)
+            return await tool_executor.run(tool.execution, tool.implementation, arguments, timeout)
+        except asyncio.TimeoutError:
+            raise self._timed_out(tool, timeout, limited_by_deadline) from None
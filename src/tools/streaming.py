@@ -0,0 +1,66 @@
+"""
+Streaming tools: handlers that report progress and produce their result piecemeal.
+
+A streaming tool's handler is an async generator. It may yield:
+
+- ``Progress(progress, total, message)``, passed on to clients that asked for
+  progress as ``notifications/progress``,
+- content items (``{"type": "text", "text": ...}``) or plain strings, the next
+  piece of the result,
+- a whole result dict such as ``create_error_response(...)``, whose content is
+  added to the result and whose ``isError`` marks the call as failed.
+
+The handler runs on the event loop; heavy steps should be awaited through
+``tool_executor.run`` so the loop stays free and cancelling the call (timeout,
+client disconnect) stops them. ``ToolRegistry.stream`` hands the events to the
+streaming transports; everywhere else ``collect`` folds them into an ordinary
+result.
+"""
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+
+@dataclass(frozen=True)
+class Progress:
+    """Progress report yielded by a streaming tool"""
+    progress: float
+    total: Optional[float] = None
+    message: Optional[str] = None
+
+    def notification(self, token: Any) -> Dict[str, Any]:
+        """``notifications/progress`` message for a request's ``progressToken``"""
+        params: Dict[str, Any] = {"progressToken": token, "progress": self.progress}
+        if self.total is not None:
+            params["total"] = self.total
+        if self.message is not None:
+            params["message"] = self.message
+        return {"jsonrpc": "2.0", "method": "notifications/progress", "params": params}
+
+
+def as_result(event: Any) -> Dict[str, Any]:
+    """Normalize a non-progress event into a ``{"content": [...]}`` fragment"""
+    if isinstance(event, str):
+        return {"content": [{"type": "text", "text": event}]}
+    if isinstance(event, dict) and "content" in event:
+        return event
+    if isinstance(event, dict) and "type" in event:
+        return {"content": [event]}
+    raise TypeError(f"Streaming tools yield Progress, content items or results, not {type(event).__name__}")
+
+
+async def collect(events: AsyncIterator[Any],
+                  on_progress: Optional[Callable[[Progress], Awaitable[None]]] = None) -> Dict[str, Any]:
+    """Fold a tool's events into one result, passing progress to ``on_progress``"""
+    content = []
+    is_error = False
+    async for event in events:
+        if isinstance(event, Progress):
+            if on_progress is not None:
+                await on_progress(event)
+            continue
+        content.extend(event["content"])
+        is_error = is_error or bool(event.get("isError"))
+    result: Dict[str, Any] = {"content": content}
+    if is_error:
+        result["isError"] = True
+    return result
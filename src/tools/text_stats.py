@@ -0,0 +1,212 @@
+"""
+Single-pass text statistics over UTF-8 input of any size.
+
+Input is consumed in chunks. Each chunk is translated into a byte-class string
+(``' '`` whitespace, ``'c'`` UTF-8 continuation byte, ``'x'`` anything else)
+and every statistic is then a C-level ``count`` over that chunk, so extra memory
+is bounded by the chunk size rather than the input size. Files are read through
+mmap; large ones are split into byte ranges analysed concurrently on the shared
+CPU pool and merged, with words that straddle a range boundary counted once.
+
+Whitespace is whatever ``str.split()`` splits on: ASCII whitespace (including
+the ``\x1c``-``\x1f`` separators) and the Unicode spaces such as NBSP, U+0085
+and U+2000-U+200A. Chunks that contain a possible lead byte of a multibyte
+space are searched for them, so pure ASCII input and most other scripts pay
+nothing extra.
+"""
+import asyncio
+import mmap
+import os
+import re
+from typing import Iterable, List, Tuple, Union
+from src.tools.executor import check_cancelled, tool_executor
+
+CHUNK_SIZE = 1 << 20
+
+_WHITESPACE = b" \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f"
+_CLASSES = bytes(
+    ord(" ") if byte in _WHITESPACE else ord("c") if 0x80 <= byte <= 0xBF else ord("x")
+    for byte in range(256)
+)
+# UTF-8 forms of the non-ASCII characters for which str.isspace() is true:
+# U+0085, U+00A0, U+1680, U+2000-U+200A, U+2028, U+2029, U+202F, U+205F, U+3000
+_UNICODE_SPACE = re.compile(b"\xc2[\x85\xa0]|\xe1\x9a\x80|\xe2(?:\x80[\x80-\x8a\xa8\xa9\xaf]|\x81\x9f)|\xe3\x80\x80")
+_UNICODE_SPACE_LEADS = (b"\xc2", b"\xe1", b"\xe2", b"\xe3")
+
+
+def _blank(match: "re.Match[bytes]") -> bytes:
+    return b" " * (match.end() - match.start())
+
+
+def _incomplete_tail(data: bytes) -> int:
+    """Length of a UTF-8 character cut off at the end of ``data`` (0 if none)"""
+    for back in range(1, min(4, len(data) + 1)):
+        byte = data[-back]
+        if byte & 0xC0 == 0x80:
+            continue
+        if byte < 0xC0:
+            return 0
+        needed = 2 if byte < 0xE0 else 3 if byte < 0xF0 else 4
+        return back if back < needed else 0
+    return 0
+
+
+def _char_start(view: mmap.mmap, offset: int) -> int:
+    """``offset`` moved forward past any UTF-8 continuation bytes"""
+    for _ in range(3):
+        if offset < len(view) and view[offset] & 0xC0 == 0x80:
+            offset += 1
+    return offset
+
+
+class TextStats:
+    """Running character, word and sentence counts"""
+    __slots__ = ("chars", "words", "word_chars", "sentences", "starts_in_word", "ends_in_word", "_empty",
+                 "_pending")
+
+    def __init__(self):
+        self.chars = 0
+        self.words = 0
+        self.word_chars = 0
+        self.sentences = 0
+        self.starts_in_word = False
+        self.ends_in_word = False
+        self._empty = True
+        self._pending = b""
+
+    def feed(self, data: Union[bytes, bytearray, str]) -> "TextStats":
+        """Add the next chunk of input.
+
+        A character cut off at the end of the chunk is held back until the
+        next one, so a space split across chunks is still seen; ``finish``
+        counts whatever is left once the input ends.
+        """
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        if self._pending:
+            data = self._pending + data
+            self._pending = b""
+        if not data.isascii():
+            cut = _incomplete_tail(data)
+            if cut:
+                self._pending = bytes(data[-cut:])
+                data = data[:-cut]
+        return self._count(data)
+
+    def finish(self) -> "TextStats":
+        """Count any bytes still held back by ``feed``"""
+        if self._pending:
+            pending, self._pending = self._pending, b""
+            self._count(pending)
+        return self
+
+    def _count(self, data: Union[bytes, bytearray]) -> "TextStats":
+        if not data:
+            return self
+        classes = data.translate(_CLASSES)
+        continuation = classes.count(b"c")
+        if not data.isascii() and any(lead in data for lead in _UNICODE_SPACE_LEADS):
+            # Multibyte spaces become one space class per byte; continuation
+            # was counted first so each still counts as one character
+            spaced, found = _UNICODE_SPACE.subn(_blank, data)
+            if found:
+                classes = spaced.translate(_CLASSES)
+        self.chars += len(classes) - continuation
+        self.word_chars += classes.count(b"x")
+        self.words += classes.count(b" x")
+        first_in_word = classes[0] != 0x20
+        if first_in_word and not self.ends_in_word:
+            self.words += 1
+        if self._empty:
+            self.starts_in_word = first_in_word
+            self._empty = False
+        self.ends_in_word = classes[-1] != 0x20
+        self.sentences += data.count(b".") + data.count(b"!") + data.count(b"?")
+        return self
+
+    def merge(self, following: "TextStats") -> "TextStats":
+        """Fold in the stats of the input that immediately follows this one.
+
+        Both sides are finished first; a space split between them is not
+        recognised, so ranges should start on a character (see analyze_range).
+        """
+        self.finish()
+        following.finish()
+        if following._empty:
+            return self
+        self.chars += following.chars
+        self.word_chars += following.word_chars
+        self.sentences += following.sentences
+        self.words += following.words
+        if self.ends_in_word and following.starts_in_word:
+            self.words -= 1  # one word split across the boundary
+        if self._empty:
+            self.starts_in_word = following.starts_in_word
+            self._empty = False
+        self.ends_in_word = following.ends_in_word
+        return self
+
+    @property
+    def average_word_length(self) -> float:
+        return self.word_chars / self.words if self.words else 0.0
+
+
+def analyze_chunks(chunks: Iterable[Union[bytes, str]]) -> TextStats:
+    """Stats for a stream of chunks (split anywhere, even inside a character)"""
+    stats = TextStats()
+    for chunk in chunks:
+        check_cancelled()
+        stats.feed(chunk)
+    return stats.finish()
+
+
+def analyze_text(text: str, chunk_chars: int = CHUNK_SIZE) -> TextStats:
+    """Stats for an in-memory string, encoded one slice at a time"""
+    return analyze_chunks(text[i:i + chunk_chars] for i in range(0, len(text), chunk_chars))
+
+
+def analyze_range(path: str, start: int, end: int) -> TextStats:
+    """Stats for bytes ``start``..``end`` of a file.
+
+    Both ends are moved forward to the next character, so adjacent ranges
+    split no character between them.
+    """
+    stats = TextStats()
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+        start, end = _char_start(view, start), _char_start(view, end)
+        for offset in range(start, end, CHUNK_SIZE):
+            check_cancelled()
+            stats.feed(view[offset:min(offset + CHUNK_SIZE, end)])
+    return stats.finish()
+
+
+def _split(size: int, parts: int) -> List[Tuple[int, int]]:
+    step = -(-size // parts)
+    return [(start, min(start + step, size)) for start in range(0, size, step)]
+
+
+async def analyze_file(path: str, parts: int = 1, parallel_threshold: int = 32 << 20) -> TextStats:
+    """Stats for a UTF-8 file read through mmap, computed on the CPU pool.
+
+    Files of at least ``parallel_threshold`` bytes are split into ``parts``
+    ranges analysed concurrently. They go through ``tool_executor`` like any
+    other CPU work, so CPU_TOOL_WORKERS and CPU_TOOL_CONCURRENCY bound them and
+    cancelling the call drops the ranges that have not started.
+    """
+    size = os.path.getsize(path)
+    if size == 0:
+        return TextStats()
+    ranges = _split(size, parts) if parts > 1 and size >= parallel_threshold else [(0, size)]
+    tasks = [asyncio.ensure_future(tool_executor.run("cpu", analyze_range, {"path": path, "start": start, "end": end}))
+             for start, end in ranges]
+    try:
+        results = await asyncio.gather(*tasks)
+    except BaseException:
+        # One range failed: the others are no longer needed
+        for task in tasks:
+            task.cancel()
+        raise
+    stats = results[0]
+    for part in results[1:]:
+        stats.merge(part)
+    return stats
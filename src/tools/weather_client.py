@@ -0,0 +1,166 @@
+"""
+Async client for the upstream weather provider.
+
+One pooled ``httpx.AsyncClient`` per event loop is shared by every call on
+that loop (connections cannot move between loops, and the SSE transport calls
+in from both uvicorn's loop and the background loop). Replies are cached per
+normalized city with a TTL and LRU eviction, shared by all loops under a lock;
+expired entries are still served for ``stale_ttl`` seconds while a background
+refresh runs.
+Concurrent misses for the same city on one loop share one upstream request.
+
+The provider is queried as ``GET {base_url}?city=<city>`` and must answer with
+a JSON object carrying ``temperature``, ``conditions`` and ``humidity``.
+"""
+import asyncio
+import logging
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class _LoopState:
+    """Connections and in-flight requests belonging to one event loop"""
+    __slots__ = ("client", "inflight")
+
+    def __init__(self):
+        self.client = None
+        self.inflight: Dict[str, asyncio.Task] = {}
+
+
+class WeatherClient:
+    """Pooled, cached and coalesced weather lookups"""
+
+    def __init__(self, base_url: str, api_key: str = "", timeout: float = 5.0,
+                 ttl: float = 300.0, stale_ttl: float = 3600.0, max_entries: int = 1024,
+                 max_connections: int = 20):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.timeout = timeout
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.max_connections = max_connections
+        self.upstream_calls = 0
+        # city -> (fresh_until, stale_until, data)
+        self._cache: "OrderedDict[str, Tuple[float, float, Dict[str, Any]]]" = OrderedDict()
+        # Guards the cache and the loop map, which the loops use from their own threads
+        self._lock = threading.Lock()
+        self._loops: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]" = \
+            weakref.WeakKeyDictionary()
+
+    @staticmethod
+    def normalize(city: str) -> str:
+        """Cache key for a city name: case- and whitespace-insensitive"""
+        return " ".join(city.split()).casefold()
+
+    async def get(self, city: str) -> Dict[str, Any]:
+        """Weather data for ``city``, from cache when possible"""
+        key = self.normalize(city)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and now < entry[1]:
+                self._cache.move_to_end(key)
+        if entry is not None:
+            fresh_until, stale_until, data = entry
+            if now < fresh_until:
+                return data
+            if now < stale_until:
+                self._refresh_in_background(key, city)
+                return data
+        return await self._fetch_shared(key, city)
+
+    async def aclose(self) -> None:
+        """Close the pooled connections of every loop that is still running"""
+        current = asyncio.get_running_loop()
+        with self._lock:
+            loops = list(self._loops.items())
+        for loop, state in loops:
+            client, state.client = state.client, None
+            if client is None:
+                continue
+            if loop is current:
+                await client.aclose()
+            elif loop.is_running():
+                await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(client.aclose(), loop))
+
+    def _state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            state = self._loops.get(loop)
+            if state is None:
+                # The connections of a loop that has been closed died with it
+                for closed in [other for other in list(self._loops.keys()) if other.is_closed()]:
+                    self._loops.pop(closed, None)
+                state = self._loops[loop] = _LoopState()
+        return state
+
+    def _http(self, state: _LoopState):
+        if state.client is None:
+            import httpx
+            state.client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout),
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections),
+                headers={"Authorization": f"Bearer {self.api_key}"} if self.api_key else None,
+            )
+        return state.client
+
+    async def _fetch_shared(self, key: str, city: str) -> Dict[str, Any]:
+        inflight = self._state().inflight
+        task = inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(key, city))
+            inflight[key] = task
+            task.add_done_callback(lambda _: inflight.pop(key, None))
+        # A cancelled caller must not cancel the request other callers share
+        return await asyncio.shield(task)
+
+    async def _fetch(self, key: str, city: str) -> Dict[str, Any]:
+        self.upstream_calls += 1
+        response = await self._http(self._state()).get(self.base_url, params={"city": city})
+        response.raise_for_status()
+        data = response.json()
+        now = time.monotonic()
+        with self._lock:
+            self._cache[key] = (now + self.ttl, now + self.ttl + self.stale_ttl, data)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return data
+
+    def _refresh_in_background(self, key: str, city: str) -> None:
+        if key in self._state().inflight:
+            return
+        task = asyncio.ensure_future(self._fetch_shared(key, city))
+        task.add_done_callback(_log_refresh_failure)
+
+
+def _log_refresh_failure(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("Background weather refresh failed: %s", task.exception())
+
+
+_client: Optional[WeatherClient] = None
+
+
+def get_weather_client() -> WeatherClient:
+    """Process-wide client configured from settings"""
+    global _client
+    if _client is None:
+        _client = WeatherClient(
+            settings.WEATHER_API_URL,
+            api_key=settings.WEATHER_API_KEY,
+            timeout=settings.WEATHER_TIMEOUT,
+            ttl=settings.WEATHER_CACHE_TTL,
+            stale_ttl=settings.WEATHER_STALE_TTL,
+            max_entries=settings.WEATHER_CACHE_SIZE,
+            max_connections=settings.WEATHER_MAX_CONNECTIONS,
+        )
+    return _client
@@ -0,0 +1,292 @@
+"""
+Admission control for tool calls.
+
+Both transports pass every ``tools/call`` through ``admission.admit`` (worker
+threads) or ``admission.admit_async`` (event loop) before running it:
+
+1. a call whose deadline has already passed is dropped,
+2. a per-client and a global token bucket limit the call rate,
+3. each tool has a cap on calls in flight; calls over the cap wait in a
+   per-tool queue until a slot frees up or their deadline passes, and are
+   turned away at once when that queue is already ``max_queue`` long.
+
+Rejections raise Overloaded with a ``retry_after`` hint in seconds, which the
+HTTP transport answers with 503 and Retry-After. Clients set a deadline with
+``params._meta.timeoutMs``; without one, waiting for a slot is capped at
+``max_wait`` seconds.
+"""
+import asyncio
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+from config.settings import settings
+from src.tools.registry import DeadlineExceeded, ToolError
+from src.utils.metrics import metrics
+
+
+class Overloaded(ToolError):
+    """Raised when a call is turned away to protect the server"""
+    code = -32004
+
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def request_deadline(meta: Any, received: Optional[float] = None) -> Optional[float]:
+    """Monotonic deadline from a request's ``_meta.timeoutMs``, if it has one.
+
+    ``meta`` may be a dict (HTTP) or an SDK model (stdio); ``received`` is when
+    the request arrived, defaulting to now.
+    """
+    if isinstance(meta, dict):
+        timeout_ms = meta.get("timeoutMs")
+    else:
+        timeout_ms = getattr(meta, "timeoutMs", None)
+    if isinstance(timeout_ms, bool) or not isinstance(timeout_ms, (int, float)) or timeout_ms <= 0:
+        return None
+    return (received if received is not None else time.monotonic()) + timeout_ms / 1000
+
+
+class TokenBucket:
+    """``rate`` tokens per second, holding at most ``burst`` (not thread-safe)"""
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def wait(self, now: float) -> float:
+        """Seconds until a token is available, 0 if one is; takes nothing"""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self, now: float) -> float:
+        """Take a token; returns 0 on success, else seconds until one is due"""
+        wait = self.wait(now)
+        if not wait:
+            self.tokens -= 1
+        return wait
+
+
+class _Gate:
+    """In-flight count and waiting calls for one tool"""
+    __slots__ = ("limit", "inflight", "waiters")
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.inflight = 0
+        self.waiters: Deque[Any] = deque()
+
+
+class _AsyncWaiter:
+    """Queue entry for a call waiting on an event loop"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.future = loop.create_future()
+
+    def set(self) -> None:
+        self.loop.call_soon_threadsafe(self._grant)
+
+    def _grant(self) -> None:
+        if not self.future.done():
+            self.future.set_result(None)
+
+
+class AdmissionController:
+    """Rate limits, per-tool in-flight caps and bounded queues for tool calls.
+
+    A rate of 0 disables that bucket; a burst of 0 defaults to the rate (at
+    least 1). ``max_inflight`` is the cap for tools that do not set their own
+    (0 means no cap); ``max_queue`` of 0 lets queues grow without bound.
+    """
+
+    def __init__(self, rate: float = 0.0, burst: float = 0.0, client_rate: float = 0.0,
+                 client_burst: float = 0.0, max_inflight: int = 0, max_queue: int = 0,
+                 max_wait: float = 30.0, max_clients: int = 10000):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self.client_rate = client_rate
+        self.client_burst = client_burst or max(1.0, client_rate)
+        self.max_inflight = max_inflight
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.max_clients = max_clients
+        self._lock = threading.Lock()
+        self._bucket = TokenBucket(rate, self.burst, time.monotonic()) if rate > 0 else None
+        self._clients: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._gates: Dict[str, _Gate] = {}
+        self.rejected: Dict[str, int] = {"rate": 0, "client_rate": 0, "queue": 0, "wait": 0, "deadline": 0}
+
+    def share(self, parts: int) -> None:
+        """Keep ``1/parts`` of the configured rates, for one of ``parts`` processes.
+
+        Each prefork worker calls this so the rate limits stay server-wide in
+        total. A client's calls are spread over the workers by the kernel, so its
+        limit holds on average rather than exactly. Bursts are divided too (but
+        kept at least 1); in-flight caps and queues are not, and stay per process.
+        """
+        with self._lock:
+            self.rate /= parts
+            self.burst = max(1.0, self.burst / parts)
+            self.client_rate /= parts
+            self.client_burst = max(1.0, self.client_burst / parts)
+            self._bucket = TokenBucket(self.rate, self.burst, time.monotonic()) if self.rate > 0 else None
+            self._clients.clear()
+
+    @contextmanager
+    def admit(self, tool: str, client: str = "", deadline: Optional[float] = None,
+              limit: Optional[int] = None):
+        """Hold an admission slot for ``tool`` while the block runs (blocking wait)"""
+        gate, waiter = self._enter(tool, client, deadline, limit, threading.Event)
+        if waiter is not None and not waiter.wait(self._wait_time(deadline)):
+            self._give_up(gate, waiter, tool, deadline)
+        try:
+            yield
+        finally:
+            if gate is not None:
+                self._release(gate)
+
+    @asynccontextmanager
+    async def admit_async(self, tool: str, client: str = "", deadline: Optional[float] = None,
+                          limit: Optional[int] = None):
+        """Hold an admission slot for ``tool`` while the block runs (awaitable wait)"""
+        loop = asyncio.get_running_loop()
+        gate, waiter = self._enter(tool, client, deadline, limit, lambda: _AsyncWaiter(loop))
+        if waiter is not None:
+            try:
+                await asyncio.wait_for(waiter.future, self._wait_time(deadline))
+            except asyncio.TimeoutError:
+                self._give_up(gate, waiter, tool, deadline)
+            except asyncio.CancelledError:
+                if not self._dequeue(gate, waiter):
+                    self._release(gate)  # granted just as we were cancelled
+                raise
+        try:
+            yield
+        finally:
+            if gate is not None:
+                self._release(gate)
+
+    def queued(self) -> int:
+        """Calls currently waiting for a slot, across all tools"""
+        with self._lock:
+            return sum(len(gate.waiters) for gate in self._gates.values())
+
+    def _enter(self, tool: str, client: str, deadline: Optional[float], limit: Optional[int],
+               make_waiter: Callable[[], Any]) -> Tuple[Optional[_Gate], Any]:
+        """Take tokens and a slot; returns (gate or None if uncapped, waiter or None if admitted)"""
+        now = time.monotonic()
+        with self._lock:
+            if deadline is not None and now >= deadline:
+                self.rejected["deadline"] += 1
+                raise DeadlineExceeded(f"Deadline passed before {tool} was admitted")
+            self._take_tokens(client, now)
+            limit = limit or self.max_inflight
+            if not limit:
+                return None, None
+            gate = self._gates.get(tool)
+            if gate is None:
+                gate = self._gates[tool] = _Gate(limit)
+            if gate.inflight < gate.limit and not gate.waiters:
+                gate.inflight += 1
+                return gate, None
+            if self.max_queue and len(gate.waiters) >= self.max_queue:
+                self.rejected["queue"] += 1
+                raise Overloaded(f"Too many calls to {tool} waiting", retry_after=1.0)
+            waiter = make_waiter()
+            gate.waiters.append(waiter)
+            return gate, waiter
+
+    def _take_tokens(self, client: str, now: float) -> None:
+        # Both buckets are checked before either is charged, so a call the
+        # server rejects does not also use up its client's allowance
+        bucket = None
+        if self.client_rate > 0:
+            bucket = self._clients.get(client)
+            if bucket is None:
+                bucket = self._clients[client] = TokenBucket(self.client_rate, self.client_burst, now)
+                if len(self._clients) > self.max_clients:
+                    self._clients.popitem(last=False)
+            else:
+                self._clients.move_to_end(client)
+            wait = bucket.wait(now)
+            if wait:
+                self.rejected["client_rate"] += 1
+                raise Overloaded("Client rate limit exceeded", retry_after=wait)
+        if self._bucket is not None:
+            wait = self._bucket.take(now)
+            if wait:
+                self.rejected["rate"] += 1
+                raise Overloaded("Server rate limit exceeded", retry_after=wait)
+        if bucket is not None:
+            bucket.take(now)
+
+    def _wait_time(self, deadline: Optional[float]) -> Optional[float]:
+        if deadline is not None:
+            return max(0.0, deadline - time.monotonic())
+        return self.max_wait or None
+
+    def _dequeue(self, gate: _Gate, waiter: Any) -> bool:
+        """Remove a waiter that stopped waiting; False if it was already granted a slot"""
+        with self._lock:
+            try:
+                gate.waiters.remove(waiter)
+                return True
+            except ValueError:
+                return False
+
+    def _give_up(self, gate: _Gate, waiter: Any, tool: str, deadline: Optional[float]) -> None:
+        # A slot handed over just as the wait timed out is still ours to use
+        if not self._dequeue(gate, waiter):
+            return
+        with self._lock:
+            if deadline is not None:
+                self.rejected["deadline"] += 1
+                raise DeadlineExceeded(f"Deadline passed while {tool} was queued")
+            self.rejected["wait"] += 1
+        raise Overloaded(f"Timed out waiting for a free {tool} slot", retry_after=1.0)
+
+    def _release(self, gate: _Gate) -> None:
+        with self._lock:
+            if gate.waiters:
+                gate.waiters.popleft().set()  # hand the slot straight over
+            else:
+                gate.inflight -= 1
+
+
+admission = AdmissionController(
+    rate=settings.ADMISSION_RATE,
+    burst=settings.ADMISSION_BURST,
+    client_rate=settings.ADMISSION_CLIENT_RATE,
+    client_burst=settings.ADMISSION_CLIENT_BURST,
+    max_inflight=settings.TOOL_MAX_INFLIGHT,
+    max_queue=settings.ADMISSION_MAX_QUEUE,
+    max_wait=settings.ADMISSION_MAX_WAIT,
+)
+
+
+def _exposition():
+    lines = [
+        "# HELP mcp_admission_rejected_total Tool calls turned away by admission control",
+        "# TYPE mcp_admission_rejected_total counter",
+    ]
+    for reason, count in admission.rejected.items():
+        lines.append(f'mcp_admission_rejected_total{{reason="{reason}"}} {count}')
+    lines += [
+        "# HELP mcp_admission_queued Tool calls waiting for an in-flight slot",
+        "# TYPE mcp_admission_queued gauge",
+        f"mcp_admission_queued {admission.queued()}",
+    ]
+    return lines
+
+
+metrics.add_collector(_exposition)
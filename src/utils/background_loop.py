@@ -0,0 +1,42 @@
+import asyncio
+import os
+import threading
+from typing import Any, Coroutine, Optional
+
+
+class BackgroundLoop:
+    """Event loop on a daemon thread, for awaiting coroutines from synchronous code.
+
+    The threaded HTTP transport uses it to run async tool handlers. Sharing a
+    single loop (rather than ``asyncio.run`` per call) lets async clients and
+    caches that are bound to a loop be reused across requests. The loop is
+    started on first use and restarted in a forked child.
+    """
+
+    def __init__(self, name: str = "mcp-async"):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None or self._pid != os.getpid():
+            with self._lock:
+                if self._loop is None or self._pid != os.getpid():
+                    loop = asyncio.new_event_loop()
+                    threading.Thread(target=loop.run_forever, name=self.name, daemon=True).start()
+                    self._loop, self._pid = loop, os.getpid()
+        return self._loop
+
+    def run(self, coro: Coroutine[Any, Any, Any], timeout: Optional[float] = None) -> Any:
+        """Run ``coro`` on the background loop and block until it finishes"""
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            future.cancel()
+            raise
+
+
+background_loop = BackgroundLoop()
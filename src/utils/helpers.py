@@ -1,19 +1,12 @@
 import json
 import logging
-from typing import Any, Dict
+import math
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from config.settings import settings
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def validate_tool_inputs(inputs: Dict[str, Any], required_fields: list) -> bool:
-    """Validate tool input parameters"""
-    for field in required_fields:
-        if field not in inputs:
-            logger.error(f"Missing required field: {field}")
-            return False
-    return True
-
 def create_success_response(content: str) -> Dict[str, Any]:
     """Create standardized success response"""
     return {
@@ -29,5 +22,41 @@ def create_error_response(error_message: str) -> Dict[str, Any]:
         "content": [{
             "type": "text",
             "text": f"Error: {error_message}"
-        }]
-    }
\ No newline at end of file
+        }],
+        "isError": True
+    }
+
+def _checked(func: Callable[..., Any], *args: Any) -> Optional[Any]:
+    try:
+        value = func(*args)
+    except (ArithmeticError, ValueError):
+        return None
+    # NaN and infinities have no JSON encoding
+    return None if value != value or value in (math.inf, -math.inf) else value
+
+def map_columns(func: Callable[..., Any], *columns: List[Any]) -> Tuple[List[Any], List[int]]:
+    """Apply ``func`` across equal-length columns, returning values and an error mask.
+    
+    Items where ``func`` raises ArithmeticError or ValueError, or returns a
+    non-finite number, get a null value and 1 in the mask; the rest of the
+    batch is unaffected. Clean columns take a single pass through ``map``.
+    """
+    try:
+        values = list(map(func, *columns))
+        if all(map(math.isfinite, values)):
+            return values, [0] * len(values)
+    except (ArithmeticError, ValueError):
+        pass
+    values = [_checked(func, *args) for args in zip(*columns)]
+    return values, [1 if value is None else 0 for value in values]
+
+def resolve_data_path(path: str, root: str = "") -> str:
+    """Resolve a client-supplied path inside ``root`` (default DATA_DIR), refusing anything outside it"""
+    root = root or settings.DATA_DIR
+    if not root:
+        raise ValueError("File access is disabled (DATA_DIR is not set)")
+    root = os.path.realpath(root)
+    full_path = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([root, full_path]) != root:
+        raise ValueError(f"Path is outside DATA_DIR: {path}")
+    return full_path
\ No newline at end of file
@@ -0,0 +1,152 @@
+"""
+Structured, non-blocking logging.
+
+Records are handed to a background thread through a bounded queue and written
+to stderr as JSON lines, so formatting and I/O stay off the calling thread; the
+only work done there is clipping payloads in ``log_payload``, which keeps the
+queue from holding whole requests. A full queue drops the record (counted in
+``dropped``) rather than stalling a request.
+"""
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Optional
+from config.settings import settings
+from src.utils.metrics import metrics
+
+# Attributes every LogRecord has; anything else came in through ``extra``
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+def _clip(value: Any, limit: int) -> Any:
+    """Copy of ``value`` with long strings and sequences shortened to ``limit``"""
+    if isinstance(value, (bytes, bytearray)):
+        value = bytes(value[:limit + 1]).decode("utf-8", "replace")
+    if isinstance(value, str):
+        return value if len(value) <= limit else f"{value[:limit]}...(+{len(value) - limit} chars)"
+    if isinstance(value, dict):
+        return {key: _clip(item, limit) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        clipped = [_clip(item, limit) for item in value[:limit]]
+        if len(value) > limit:
+            clipped.append(f"...(+{len(value) - limit} items)")
+        return clipped
+    return value
+
+
+class JSONFormatter(logging.Formatter):
+    """Render a record as one JSON object per line"""
+
+    def __init__(self, payload_limit: int = 512):
+        super().__init__()
+        self.payload_limit = payload_limit
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = _clip(value, self.payload_limit)
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that never blocks and defers formatting to the listener"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The stock handler formats here, on the caller's thread; the listener
+        # formats instead. Tracebacks are rendered now because they reference
+        # frames that will not survive.
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener: Optional[QueueListener] = None
+_handler: Optional[DroppingQueueHandler] = None
+_exit_hook = False
+
+
+def setup_logging() -> None:
+    """Route all logging through the background writer (idempotent).
+
+    A process that forks must call ``shutdown_logging()`` first and this again
+    afterwards (in both parent and child), since the writer thread does not
+    survive fork.
+    """
+    global _listener, _handler, _exit_hook
+    if _listener is not None:
+        return
+
+    stream = logging.StreamHandler(sys.stderr)
+    stream.setFormatter(JSONFormatter(settings.LOG_PAYLOAD_MAX_CHARS))
+    _handler = DroppingQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE))
+    _listener = QueueListener(_handler.queue, stream, respect_handler_level=False)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_handler)
+    root.setLevel(logging.DEBUG if settings.DEBUG else logging.INFO)
+
+    _listener.start()
+    if not _exit_hook:
+        atexit.register(shutdown_logging)
+        _exit_hook = True
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def dropped_records() -> int:
+    """Number of records discarded because the queue was full"""
+    return _handler.dropped if _handler is not None else 0
+
+
+metrics.add_collector(lambda: [
+    "# HELP mcp_log_records_dropped_total Log records discarded because the queue was full",
+    "# TYPE mcp_log_records_dropped_total counter",
+    f"mcp_log_records_dropped_total {dropped_records()}",
+])
+
+
+def log_payload(logger: logging.Logger, message: str, payload: Any, **fields: Any) -> None:
+    """Log a request/response body at DEBUG, sampled by LOG_PAYLOAD_SAMPLE_RATE.
+
+    Unsampled payloads are skipped before any work is done; sampled ones are
+    clipped to LOG_PAYLOAD_MAX_CHARS here, so the queue only ever holds a small
+    copy rather than keeping whole requests and responses alive.
+    """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    if random.random() >= settings.LOG_PAYLOAD_SAMPLE_RATE:
+        return
+    logger.debug(message, extra={"payload": _clip(payload, settings.LOG_PAYLOAD_MAX_CHARS), **fields})
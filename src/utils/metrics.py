@@ -0,0 +1,211 @@
+"""
+In-process request metrics rendered in the Prometheus text format.
+
+Each thread records into its own shard of fixed-bucket counters, so the hot
+path is a dict lookup and a few integer increments with no lock. Shards are
+only summed when the metrics are scraped.
+
+Under the prefork supervisor every worker process has its own counters. The
+workers send their exposition with each heartbeat and the supervisor sums them
+(``merge_expositions``) into ``shared_path``, which every worker serves from
+``scrape()``; any worker's /metrics then covers the whole server, at most one
+heartbeat interval old.
+"""
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Upper bounds in seconds, from sub-millisecond cached replies to slow tools
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+FAMILIES = {
+    "mcp_requests": ("method", "JSON-RPC requests"),
+    "mcp_tool_calls": ("tool", "Tool calls"),
+}
+
+
+class _Series:
+    """Counters for one (family, label) pair within one shard"""
+    __slots__ = ("buckets", "total", "sum", "errors", "in_flight")
+
+    def __init__(self, size: int):
+        self.buckets = [0] * size  # per-bucket (not cumulative) counts, +Inf last
+        self.total = 0
+        self.sum = 0.0
+        self.errors = 0
+        self.in_flight = 0
+
+
+class Timer:
+    """Context manager returned by ``Metrics.timer``; set ``error`` to count a failure"""
+    __slots__ = ("_series", "_bounds", "_started", "error")
+
+    def __init__(self, series: _Series, bounds: Tuple[float, ...]):
+        self._series = series
+        self._bounds = bounds
+        self.error = False
+
+    def __enter__(self) -> "Timer":
+        self._series.in_flight += 1
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        elapsed = time.perf_counter() - self._started
+        series = self._series
+        series.in_flight -= 1
+        series.buckets[bisect_left(self._bounds, elapsed)] += 1
+        series.total += 1
+        series.sum += elapsed
+        if self.error or exc_type is not None:
+            series.errors += 1
+
+
+class Metrics:
+    """Per-method and per-tool counters, in-flight gauges and latency histograms"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._local = threading.local()
+        self._shards: List[Dict[Tuple[str, str], _Series]] = []
+        self._shards_lock = threading.Lock()
+        self._collectors: List[Callable[[], Iterable[str]]] = []
+        # Set in prefork workers: the supervisor's aggregate of all workers
+        self.shared_path: Optional[str] = None
+
+    def _shard(self) -> Dict[Tuple[str, str], _Series]:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    def timer(self, family: str, label: str) -> Timer:
+        """Time one unit of work, e.g. ``with metrics.timer("mcp_requests", method):``"""
+        shard = self._shard()
+        series = shard.get((family, label))
+        if series is None:
+            series = shard[(family, label)] = _Series(len(self.buckets) + 1)
+        return Timer(series, self.buckets)
+
+    def add_collector(self, collector: Callable[[], Iterable[str]]) -> None:
+        """Add a callable returning extra exposition lines at scrape time"""
+        self._collectors.append(collector)
+
+    def _merged(self) -> Dict[Tuple[str, str], _Series]:
+        with self._shards_lock:
+            shards = list(self._shards)
+        merged: Dict[Tuple[str, str], _Series] = {}
+        for shard in shards:
+            for key, series in list(shard.items()):
+                total = merged.get(key)
+                if total is None:
+                    total = merged[key] = _Series(len(self.buckets) + 1)
+                for i, count in enumerate(series.buckets):
+                    total.buckets[i] += count
+                total.total += series.total
+                total.sum += series.sum
+                total.errors += series.errors
+                total.in_flight += series.in_flight
+        return merged
+
+    def render(self) -> str:
+        """Prometheus text exposition (format 0.0.4) of everything recorded"""
+        merged = self._merged()
+        lines: List[str] = []
+        bounds = [_format_bound(bound) for bound in self.buckets] + ["+Inf"]
+
+        for family, (label_name, description) in FAMILIES.items():
+            series = sorted((label, s) for (name, label), s in merged.items() if name == family)
+
+            lines.append(f"# HELP {family}_total {description} handled")
+            lines.append(f"# TYPE {family}_total counter")
+            for label, s in series:
+                lines.append(f'{family}_total{{{label_name}="{_escape(label)}"}} {s.total}')
+
+            lines.append(f"# HELP {family}_errors_total {description} that failed")
+            lines.append(f"# TYPE {family}_errors_total counter")
+            for label, s in series:
+                lines.append(f'{family}_errors_total{{{label_name}="{_escape(label)}"}} {s.errors}')
+
+            lines.append(f"# HELP {family}_in_flight {description} currently running")
+            lines.append(f"# TYPE {family}_in_flight gauge")
+            for label, s in series:
+                lines.append(f'{family}_in_flight{{{label_name}="{_escape(label)}"}} {s.in_flight}')
+
+            lines.append(f"# HELP {family}_duration_seconds {description} latency")
+            lines.append(f"# TYPE {family}_duration_seconds histogram")
+            for label, s in series:
+                labels = f'{label_name}="{_escape(label)}"'
+                cumulative = 0
+                for bound, count in zip(bounds, s.buckets):
+                    cumulative += count
+                    lines.append(f'{family}_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f"{family}_duration_seconds_sum{{{labels}}} {s.sum:.6f}")
+                lines.append(f"{family}_duration_seconds_count{{{labels}}} {s.total}")
+
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+    def scrape(self) -> str:
+        """What /metrics serves: the server-wide aggregate when there is one, else ``render()``"""
+        if self.shared_path is not None:
+            try:
+                with open(self.shared_path, encoding="utf-8") as f:
+                    return f.read()
+            except FileNotFoundError:
+                pass  # not written yet
+        return self.render()
+
+
+def merge_expositions(texts: Iterable[str], counters_only: bool = False) -> str:
+    """Sum the samples of several expositions of the same metrics.
+
+    Samples with the same name and labels are added up; families keep their
+    HELP/TYPE lines and first-seen order. ``counters_only`` drops gauges, for
+    keeping the final counts of processes that have exited.
+    """
+    headers: Dict[str, List[str]] = {}
+    samples: Dict[str, Dict[str, float]] = {}
+    gauges = set()
+    for text in texts:
+        family = ""
+        for line in text.splitlines():
+            if line.startswith("# "):
+                _, kind, family, rest = (line.split(" ", 3) + [""])[:4]
+                if kind == "TYPE" and rest == "gauge":
+                    gauges.add(family)
+                header = headers.setdefault(family, [])
+                if line not in header:
+                    header.append(line)
+                samples.setdefault(family, {})
+            elif line:
+                key, _, value = line.rpartition(" ")
+                family_samples = samples.setdefault(family, {})
+                family_samples[key] = family_samples.get(key, 0) + float(value)
+    lines: List[str] = []
+    for family, family_samples in samples.items():
+        if counters_only and family in gauges:
+            continue
+        lines.extend(headers.get(family, []))
+        lines.extend(f"{key} {_format_value(value)}" for key, value in family_samples.items())
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def _format_bound(bound: float) -> str:
+    return repr(float(bound))
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if value.is_integer() else f"{value:.6f}"
+
+
+def _escape(value: Optional[str]) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+metrics = Metrics()
@@ -0,0 +1,108 @@
+"""
+Memoized results for pure tools, bounded by an approximate byte budget.
+
+Keys are a digest of the canonical JSON encoding of ``[tool name, arguments]``
+(sorted keys, no whitespace), so argument order does not matter but ``1`` and
+``1.0`` stay distinct, as they format differently. Entries are evicted least
+recently used first until the cached results fit ``max_bytes``. Cached results
+are shared between callers and must be treated as read-only.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from config.settings import settings
+from src.utils.metrics import metrics
+
+# Rough per-entry bookkeeping cost on top of the encoded result and key
+ENTRY_OVERHEAD = 200
+
+
+class ResultCache:
+    """Thread-safe LRU of tool results with a byte budget"""
+
+    def __init__(self, max_bytes: int, max_entry_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes or max(1, max_bytes // 16)
+        self._entries: "OrderedDict[bytes, Tuple[Dict[str, Any], int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(name: str, arguments: Dict[str, Any]) -> bytes:
+        """Digest of the canonical encoding of a call"""
+        canonical = json.dumps([name, arguments], sort_keys=True, separators=(",", ":"),
+                               ensure_ascii=False).encode("utf-8")
+        return hashlib.blake2b(canonical, digest_size=16).digest()
+
+    def get(self, key: bytes) -> Optional[Dict[str, Any]]:
+        """Cached result for ``key``, or None (counting the hit or miss)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: bytes, result: Dict[str, Any]) -> bool:
+        """Cache ``result``; returns False if it is too large to keep"""
+        if self.max_bytes <= 0:
+            return False
+        size = len(json.dumps(result, ensure_ascii=False)) + len(key) + ENTRY_OVERHEAD
+        if size > self.max_entry_bytes:
+            return False
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[1]
+            self._entries[key] = (result, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+        }
+
+
+result_cache = ResultCache(settings.RESULT_CACHE_BYTES, settings.RESULT_CACHE_MAX_ENTRY_BYTES)
+
+
+def _exposition():
+    stats = result_cache.stats()
+    lines = []
+    for name, kind, description in (
+        ("hits", "counter", "Tool calls answered from the result cache"),
+        ("misses", "counter", "Cacheable tool calls not found in the result cache"),
+        ("evictions", "counter", "Results evicted to stay within the byte budget"),
+        ("entries", "gauge", "Results currently cached"),
+        ("bytes", "gauge", "Approximate size of cached results"),
+    ):
+        metric = f"mcp_result_cache_{name}" + ("_total" if kind == "counter" else "")
+        lines += [f"# HELP {metric} {description}", f"# TYPE {metric} {kind}", f"{metric} {stats[name]}"]
+    return lines
+
+
+metrics.add_collector(_exposition)
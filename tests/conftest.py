@@ -0,0 +1,16 @@
+import threading
+
+import pytest
+from src.http_server import PooledHTTPServer
+from src.main import MCPHandler
+
+
+@pytest.fixture
+def http_server():
+    """Run the HTTP transport on an ephemeral port"""
+    server = PooledHTTPServer(("127.0.0.1", 0), MCPHandler, workers=2, drain_timeout=1)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.drain()
@@ -0,0 +1,147 @@
+import asyncio
+import http.client
+import json
+import threading
+import time
+
+import pytest
+import src.dispatcher
+from src.tools.registry import DeadlineExceeded, ToolRegistry
+from src.utils.admission import AdmissionController, Overloaded, request_deadline
+from tests.test_http import post
+
+
+class TestAdmission:
+    """Test cases for admission control"""
+    
+    def test_global_and_client_rate_limits(self):
+        """Test token buckets reject bursts with a retry hint"""
+        controller = AdmissionController(rate=100, burst=3, client_rate=1, client_burst=2)
+        for _ in range(2):
+            with controller.admit("greet", "a"):
+                pass
+        with pytest.raises(Overloaded) as excinfo:
+            with controller.admit("greet", "a"):
+                pass
+        assert 0 < excinfo.value.retry_after <= 1
+        with controller.admit("greet", "b"):
+            pass
+        with pytest.raises(Overloaded):
+            with controller.admit("greet", "c"):
+                pass
+        assert controller.rejected["client_rate"] == 1
+        assert controller.rejected["rate"] == 1
+    
+    def test_server_rejection_does_not_charge_client(self):
+        """Test a call refused by the global bucket keeps its client's token"""
+        controller = AdmissionController(rate=0.001, burst=1, client_rate=0.001, client_burst=2)
+        with controller.admit("greet", "a"):
+            pass
+        for _ in range(3):
+            with pytest.raises(Overloaded):
+                with controller.admit("greet", "a"):
+                    pass
+        assert controller.rejected["rate"] == 3
+        assert controller.rejected["client_rate"] == 0
+        assert controller._clients["a"].tokens >= 1
+    
+    def test_share_splits_rates_between_processes(self):
+        """Test a prefork worker keeps its share of the server-wide rates"""
+        controller = AdmissionController(rate=8, burst=8, client_rate=4)
+        controller.share(4)
+        assert (controller.rate, controller.burst) == (2, 2)
+        assert (controller.client_rate, controller.client_burst) == (1, 1)
+        for client in ("a", "b"):
+            with controller.admit("greet", client):
+                pass
+        with pytest.raises(Overloaded):
+            with controller.admit("greet", "c"):
+                pass
+    
+    def test_inflight_cap_queues_then_rejects(self):
+        """Test calls over the cap wait, and are turned away once the queue is full"""
+        controller = AdmissionController(max_inflight=1, max_queue=1)
+        order = []
+        def queued_call():
+            with controller.admit("slow"):
+                order.append("ran")
+        with controller.admit("slow"):
+            waiter = threading.Thread(target=queued_call)
+            waiter.start()
+            while not controller.queued():
+                time.sleep(0.001)
+            with pytest.raises(Overloaded):
+                with controller.admit("slow"):
+                    pass
+            with controller.admit("other"):
+                order.append("other")
+        waiter.join(1)
+        assert order == ["other", "ran"]
+    
+    def test_deadlines_drop_queued_calls(self):
+        """Test expired and queue-expiring deadlines raise DeadlineExceeded"""
+        controller = AdmissionController(max_inflight=1)
+        with pytest.raises(DeadlineExceeded):
+            with controller.admit("t", deadline=time.monotonic() - 1):
+                pass
+        with controller.admit("t"):
+            with pytest.raises(DeadlineExceeded):
+                with controller.admit("t", deadline=time.monotonic() + 0.05):
+                    pass
+        assert controller.queued() == 0
+        assert controller.rejected["deadline"] == 2
+        with controller.admit("t"):
+            pass
+    
+    @pytest.mark.asyncio
+    async def test_async_waiters_hand_over_and_cancel(self):
+        """Test released slots pass to async waiters and cancelled waiters leave the queue"""
+        controller = AdmissionController(max_inflight=1)
+        async def call(label, results):
+            async with controller.admit_async("t"):
+                results.append(label)
+                await asyncio.sleep(0.01)
+        results = []
+        cancelled = None
+        async with controller.admit_async("t"):
+            first = asyncio.ensure_future(call("first", results))
+            cancelled = asyncio.ensure_future(call("cancelled", results))
+            await asyncio.sleep(0.01)
+            assert controller.queued() == 2
+            cancelled.cancel()
+            await asyncio.sleep(0)
+        await first
+        assert cancelled.cancelled()
+        assert results == ["first"]
+        assert controller.queued() == 0
+    
+    def test_request_deadline(self):
+        """Test _meta.timeoutMs parsing"""
+        assert request_deadline({"timeoutMs": 1500}, received=10.0) == 11.5
+        assert request_deadline({"timeoutMs": True}) is None
+        assert request_deadline(None) is None
+        assert request_deadline({}) is None
+    
+    @pytest.mark.asyncio
+    async def test_registry_enforces_deadline(self):
+        """Test a deadline shorter than the tool timeout cuts the call short"""
+        async def slow():
+            await asyncio.sleep(1)
+        registry = ToolRegistry()
+        registry.register("slow", "", {"type": "object"}, slow)
+        with pytest.raises(DeadlineExceeded):
+            await registry.call("slow", {}, deadline=time.monotonic() + 0.05)
+    
+    def test_http_overload_returns_503(self, http_server, monkeypatch):
+        """Test a rate-limited call gets 503 with Retry-After"""
+        monkeypatch.setattr(src.dispatcher, "admission", AdmissionController(client_rate=0.5, client_burst=1))
+        conn = http.client.HTTPConnection(*http_server.server_address)
+        request = {"jsonrpc": "2.0", "id": 1, "method": "tools/call",
+                   "params": {"name": "greet", "arguments": {"name": "Ada"}}}
+        response, _ = post(conn, request)
+        assert response.status == 200
+        response, body = post(conn, request)
+        assert response.status == 503
+        assert response.getheader("Retry-After") == "2"
+        assert json.loads(body)["error"]["code"] == Overloaded.code
+        conn.close()
@@ -0,0 +1,26 @@
+from benchmarks import bench_startup
+from benchmarks.bench_transports import compare, percentile
+
+class TestBenchmarkReporting:
+    """Test cases for benchmark statistics and baseline checks"""
+    
+    def test_percentile_nearest_rank(self):
+        """Test percentiles on a sorted sample"""
+        values = [i / 100 for i in range(1, 101)]
+        assert percentile(values, 50) == 0.5
+        assert percentile(values, 99) == 0.99
+        assert percentile([], 99) == 0.0
+    
+    def test_regression_against_baseline(self):
+        """Test throughput drops and p99 increases beyond tolerance are reported"""
+        baseline = {"results": [{"transport": "http", "concurrency": 8, "rps": 1000, "p99_ms": 10, "errors": 0}]}
+        ok = [{"transport": "http", "concurrency": 8, "rps": 950, "p99_ms": 11, "errors": 0}]
+        slow = [{"transport": "http", "concurrency": 8, "rps": 700, "p99_ms": 20, "errors": 0}]
+        assert compare(ok, baseline, 0.15) == []
+        assert len(compare(slow, baseline, 0.15)) == 2
+    
+    def test_startup_regression_against_baseline(self):
+        """Test time-to-initialize increases beyond tolerance are reported"""
+        baseline = {"results": [{"transport": "stdio", "initialize_p50_ms": 200}]}
+        assert bench_startup.compare([{"transport": "stdio", "initialize_p50_ms": 220}], baseline, 0.15) == []
+        assert len(bench_startup.compare([{"transport": "stdio", "initialize_p50_ms": 300}], baseline, 0.15)) == 1
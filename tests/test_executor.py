@@ -0,0 +1,82 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from src.tools.executor import ToolExecutor, cancelled
+from src.tools.registry import ToolRegistry, ToolTimeoutError
+
+SCHEMA = {"type": "object"}
+
+
+def spin(seconds: float = 0.3):
+    """Busy CPU work that honours cooperative cancellation"""
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        if cancelled():
+            return {"content": [], "cancelled": True}
+    return {"content": [{"type": "text", "text": "done"}]}
+
+
+class TestToolExecutor:
+    """Test cases for offloading tools from the event loop"""
+    
+    @pytest.mark.asyncio
+    async def test_loop_stays_responsive(self):
+        """Test cheap coroutines keep running while a CPU tool executes"""
+        executor = ToolExecutor(blocking_workers=1, cpu_workers=1)
+        heavy = asyncio.ensure_future(executor.run("cpu", spin, {"seconds": 0.3}))
+        started = time.monotonic()
+        await asyncio.sleep(0.01)
+        assert time.monotonic() - started < 0.1
+        assert (await heavy)["content"][0]["text"] == "done"
+        executor.shutdown()
+    
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(self):
+        """Test no more than the limit run at once"""
+        running, peak = [0], [0]
+        lock = threading.Lock()
+        def work():
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+            return {"content": []}
+        executor = ToolExecutor(blocking_workers=8, cpu_workers=1, blocking_concurrency=2)
+        await asyncio.gather(*(executor.run("blocking", work, {}) for _ in range(6)))
+        assert peak[0] == 2
+        executor.shutdown()
+    
+    @pytest.mark.asyncio
+    async def test_cancellation_reaches_the_worker(self):
+        """Test cancelling the caller signals the running thread"""
+        executor = ToolExecutor(blocking_workers=1, cpu_workers=1)
+        seen = threading.Event()
+        def work():
+            while not cancelled():
+                time.sleep(0.01)
+            seen.set()
+            return {"content": []}
+        task = asyncio.ensure_future(executor.run("cpu", work, {}))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert await asyncio.get_running_loop().run_in_executor(None, seen.wait, 1)
+        executor.shutdown()
+    
+    @pytest.mark.asyncio
+    async def test_registry_timeout(self):
+        """Test per-tool timeouts surface as ToolTimeoutError"""
+        tools = ToolRegistry()
+        tools.register("spin", "Spin", SCHEMA, spin, execution="cpu", timeout=0.05)
+        with pytest.raises(ToolTimeoutError):
+            await tools.call("spin", {"seconds": 1})
+    
+    def test_unknown_execution_mode(self):
+        """Test registration rejects unknown execution modes"""
+        with pytest.raises(ValueError):
+            ToolRegistry().register("x", "X", SCHEMA, spin, execution="gpu")
@@ -0,0 +1,218 @@
+import gzip
+import http.client
+import json
+import threading
+import time
+
+from config.settings import settings
+from src.dispatcher import handle_mcp_request
+from src.http_server import PooledHTTPServer
+from src.main import MCPHandler, accepts_gzip
+
+
+def post(conn, payload, headers=None):
+    conn.request("POST", "/", json.dumps(payload), {"Content-Type": "application/json", **(headers or {})})
+    response = conn.getresponse()
+    return response, response.read()
+
+
+class TestHTTPTransport:
+    """Test cases for the HTTP transport"""
+
+    def test_keep_alive_reuses_connection(self, http_server):
+        """Test several requests over one persistent connection"""
+        conn = http.client.HTTPConnection(*http_server.server_address)
+        for request_id in range(3):
+            response, body = post(conn, {"jsonrpc": "2.0", "id": request_id, "method": "initialize"})
+            assert response.status == 200
+            assert response.version == 11
+            assert json.loads(body)["id"] == request_id
+        conn.close()
+
+    def test_slow_client_does_not_block_others(self, http_server):
+        """Test that an idle open connection leaves other workers free"""
+        idle = http.client.HTTPConnection(*http_server.server_address)
+        idle.connect()
+        conn = http.client.HTTPConnection(*http_server.server_address, timeout=5)
+        response, _ = post(conn, {"jsonrpc": "2.0", "id": 1, "method": "tools/list"})
+        assert response.status == 200
+        idle.close()
+        conn.close()
+
+    def test_drain_closes_idle_connections(self):
+        """Test drain does not wait out idle keep-alive connections"""
+        server = PooledHTTPServer(("127.0.0.1", 0), MCPHandler, workers=2, drain_timeout=5)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        conn = http.client.HTTPConnection(*server.server_address)
+        response, _ = post(conn, {"jsonrpc": "2.0", "id": 1, "method": "initialize"})
+        assert response.status == 200
+        fresh = http.client.HTTPConnection(*server.server_address)
+        fresh.connect()
+        time.sleep(0.1)
+        started = time.monotonic()
+        server.shutdown()
+        server.drain()
+        assert time.monotonic() - started < 1
+        assert server.stats()["active_connections"] == 0
+        conn.close()
+        fresh.close()
+
+    def test_batch_replies_in_order(self, http_server):
+        """Test a batch of calls returns one ordered array"""
+        conn = http.client.HTTPConnection(*http_server.server_address)
+        batch = [
+            {"jsonrpc": "2.0", "id": i, "method": "tools/call",
+             "params": {"name": "calculator", "arguments": {"operation": "add", "a": i, "b": 1}}}
+            for i in range(10)
+        ]
+        response, body = post(conn, batch)
+        replies = json.loads(body)
+        assert response.status == 200
+        assert [reply["id"] for reply in replies] == list(range(10))
+        assert replies[3]["result"]["content"][0]["text"] == "3 + 1 = 4"
+        conn.close()
+
+    def test_batch_skips_notifications(self, http_server):
+        """Test notifications in a batch produce no reply entry"""
+        conn = http.client.HTTPConnection(*http_server.server_address)
+        batch = [
+            {"jsonrpc": "2.0", "method": "notifications/initialized"},
+            {"jsonrpc": "2.0", "id": 7, "method": "initialize"},
+        ]
+        _, body = post(conn, batch)
+        assert [reply["id"] for reply in json.loads(body)] == [7]
+
+        response, body = post(conn, [{"jsonrpc": "2.0", "method": "notifications/initialized"}])
+        assert response.status == 202
+        assert body == b""
+        conn.close()
+
+    def test_invalid_batches(self, http_server):
+        """Test empty batches and non-object entries are rejected"""
+        conn = http.client.HTTPConnection(*http_server.server_address)
+        _, body = post(conn, [])
+        assert json.loads(body)["error"]["code"] == -32600
+        _, body = post(conn, [1, {"jsonrpc": "2.0", "id": 1, "method": "initialize"}])
+        replies = json.loads(body)
+        assert replies[0]["error"]["code"] == -32600
+        assert "result" in replies[1]
+        conn.close()
+
+    def test_unknown_tool_is_an_error(self, http_server):
+        """Test calling an unregistered tool returns a JSON-RPC error"""
+        conn = http.client.HTTPConnection(*http_server.server_address)
+        _, body = post(conn, {"jsonrpc": "2.0", "id": 1, "method": "tools/call",
+                              "params": {"name": "nope", "arguments": {}}})
+        assert json.loads(body)["error"]["code"] == -32602
+        conn.close()
+
+    def test_cached_replies_match_uncached(self, http_server):
+        """Test pre-encoded initialize/tools/list replies equal the built ones"""
+        conn = http.client.HTTPConnection(*http_server.server_address)
+        for method in ("initialize", "tools/list"):
+            request = {"jsonrpc": "2.0", "id": "abc", "method": method}
+            _, body = post(conn, request)
+            assert json.loads(body) == handle_mcp_request(request)
+        conn.close()
+
+    def test_tools_list_etag_revalidation(self, http_server):
+        """Test tools/list carries an ETag and answers If-None-Match with 304"""
+        conn = http.client.HTTPConnection(*http_server.server_address)
+        request = {"jsonrpc": "2.0", "id": 1, "method": "tools/list"}
+        response, _ = post(conn, request)
+        etag = response.getheader("ETag")
+        assert etag
+        response, body = post(conn, request, {"If-None-Match": etag})
+        assert response.status == 304
+        assert body == b""
+        response, body = post(conn, request, {"If-None-Match": '"stale"'})
+        assert response.status == 200
+        assert json.loads(body)["result"]["tools"]
+        conn.close()
+
+    def test_bad_arguments_return_invalid_params(self, http_server):
+        """Test schema violations surface as JSON-RPC -32602, not a 500"""
+        conn = http.client.HTTPConnection(*http_server.server_address)
+        response, body = post(conn, {"jsonrpc": "2.0", "id": 1, "method": "tools/call",
+                                     "params": {"name": "calculator",
+                                                "arguments": {"operation": "divide", "a": "x"}}})
+        assert response.status == 200
+        assert json.loads(body)["error"]["code"] == -32602
+        for params in ([], "calculator"):
+            _, body = post(conn, {"jsonrpc": "2.0", "id": 2, "method": "tools/call", "params": params})
+            assert json.loads(body)["error"]["code"] == -32602
+        conn.close()
+
+    def test_metrics_endpoint(self, http_server):
+        """Test GET /metrics exposes per-method and per-tool series"""
+        conn = http.client.HTTPConnection(*http_server.server_address)
+        post(conn, {"jsonrpc": "2.0", "id": 1, "method": "tools/call",
+                    "params": {"name": "greet", "arguments": {"name": "Ada"}}})
+        conn.request("GET", "/metrics")
+        response = conn.getresponse()
+        text = response.read().decode()
+        assert response.status == 200
+        assert response.getheader("Content-Type").startswith("text/plain")
+        assert 'mcp_requests_total{method="tools/call"}' in text
+        assert 'mcp_tool_calls_duration_seconds_count{tool="greet"}' in text
+        conn.close()
+
+    def test_oversized_body_rejected(self, http_server, monkeypatch):
+        """Test bodies over MAX_BODY_BYTES get a 413 and the connection is closed"""
+        monkeypatch.setattr(settings, "MAX_BODY_BYTES", 64)
+        conn = http.client.HTTPConnection(*http_server.server_address)
+        response, _ = post(conn, {"jsonrpc": "2.0", "id": 1, "method": "initialize", "pad": "x" * 100})
+        assert response.status == 413
+        assert response.getheader("Connection") == "close"
+        conn.close()
+
+    def test_chunked_body_and_buffer_reuse(self, http_server):
+        """Test chunked requests are accepted and buffers are reused safely"""
+        conn = http.client.HTTPConnection(*http_server.server_address)
+        text = "word " * 50000
+        request = json.dumps({"jsonrpc": "2.0", "id": 1, "method": "tools/call",
+                              "params": {"name": "text_analyzer", "arguments": {"text": text}}}).encode()
+        chunks = (request[i:i + 7000] for i in range(0, len(request), 7000))
+        conn.request("POST", "/", chunks, {"Content-Type": "application/json"}, encode_chunked=True)
+        response = conn.getresponse()
+        assert response.status == 200
+        assert "Word count: 50000" in json.loads(response.read())["result"]["content"][0]["text"]
+        # A shorter request on the same connection must not see the leftover bytes
+        response, body = post(conn, {"jsonrpc": "2.0", "id": 2, "method": "initialize"})
+        assert json.loads(body)["id"] == 2
+        conn.close()
+
+    def test_large_responses_are_gzipped(self, http_server):
+        """Test gzip is negotiated through Accept-Encoding, ETags included"""
+        conn = http.client.HTTPConnection(*http_server.server_address)
+        request = {"jsonrpc": "2.0", "id": 1, "method": "tools/list"}
+        response, plain = post(conn, request)
+        assert response.getheader("Content-Encoding") is None
+        assert response.getheader("Vary") == "Accept-Encoding"
+        response, body = post(conn, request, {"Accept-Encoding": "gzip, deflate"})
+        assert response.getheader("Content-Encoding") == "gzip"
+        assert gzip.decompress(body) == plain
+        etag = response.getheader("ETag")
+        assert etag.endswith('-gzip"')
+        response, _ = post(conn, request, {"Accept-Encoding": "gzip", "If-None-Match": etag})
+        assert response.status == 304
+        assert response.getheader("ETag") == etag
+        assert response.getheader("Vary") == "Accept-Encoding"
+        # The identity ETag does not validate the gzip representation, nor the reverse
+        response, _ = post(conn, request, {"Accept-Encoding": "gzip", "If-None-Match": etag[:-6] + '"'})
+        assert response.status == 200
+        response, _ = post(conn, request, {"If-None-Match": etag})
+        assert response.status == 200
+        response, body = post(conn, {"jsonrpc": "2.0", "id": 1, "method": "initialize"},
+                              {"Accept-Encoding": "gzip"})
+        assert response.getheader("Content-Encoding") is None
+        conn.close()
+
+    def test_accept_encoding_parsing(self):
+        """Test q-values and wildcards in Accept-Encoding"""
+        assert accepts_gzip("gzip")
+        assert accepts_gzip("br, GZIP;q=0.5")
+        assert accepts_gzip("*")
+        assert not accepts_gzip("gzip;q=0")
+        assert not accepts_gzip("identity")
+        assert not accepts_gzip("")
@@ -0,0 +1,52 @@
+import json
+import logging
+import queue
+from config.settings import settings
+from src.utils.log import DroppingQueueHandler, JSONFormatter, log_payload
+
+class TestLogging:
+    """Test cases for the structured logging subsystem"""
+    
+    def test_json_lines_with_clipped_payload(self):
+        """Test records render as JSON with long payloads truncated"""
+        record = logging.LogRecord("mcp.http", logging.DEBUG, __file__, 1, "Received %s", ("request",), None)
+        record.payload = {"params": {"arguments": {"text": "x" * 1000}}}
+        entry = json.loads(JSONFormatter(payload_limit=10).format(record))
+        assert entry["msg"] == "Received request"
+        assert entry["level"] == "DEBUG"
+        assert entry["payload"]["params"]["arguments"]["text"].startswith("x" * 10 + "...")
+    
+    def test_full_queue_drops_instead_of_blocking(self):
+        """Test a full queue discards records and counts them"""
+        handler = DroppingQueueHandler(queue.Queue(maxsize=1))
+        for _ in range(3):
+            handler.handle(logging.LogRecord("t", logging.INFO, __file__, 1, "msg", (), None))
+        assert handler.queue.qsize() == 1
+        assert handler.dropped == 2
+    
+    def test_payload_clipped_before_enqueue(self, monkeypatch):
+        """Test the queued record holds a clipped copy, not the caller's payload"""
+        monkeypatch.setattr(settings, "LOG_PAYLOAD_SAMPLE_RATE", 1.0)
+        monkeypatch.setattr(settings, "LOG_PAYLOAD_MAX_CHARS", 10)
+        handler = DroppingQueueHandler(queue.Queue())
+        logger = logging.getLogger("test.payload")
+        logger.addHandler(handler)
+        logger.setLevel(logging.DEBUG)
+        logger.propagate = False
+        try:
+            payload = {"text": "x" * 1000, "items": list(range(100))}
+            log_payload(logger, "Received", payload)
+        finally:
+            logger.removeHandler(handler)
+        queued = handler.queue.get_nowait().payload
+        assert queued is not payload
+        assert queued["text"].startswith("x" * 10 + "...")
+        assert len(queued["items"]) == 11
+        
+        monkeypatch.setattr(settings, "LOG_PAYLOAD_SAMPLE_RATE", 0.0)
+        logger.addHandler(handler)
+        try:
+            log_payload(logger, "Received", payload)
+        finally:
+            logger.removeHandler(handler)
+        assert handler.queue.empty()
@@ -0,0 +1,55 @@
+import threading
+import pytest
+from src.utils.metrics import Metrics, merge_expositions
+
+class TestMetrics:
+    """Test cases for request metrics"""
+    
+    def test_histogram_and_counters(self):
+        """Test latency buckets, totals and errors are rendered"""
+        m = Metrics(buckets=(0.1, 1.0))
+        with m.timer("mcp_requests", "tools/call"):
+            pass
+        with m.timer("mcp_requests", "tools/call") as timer:
+            timer.error = True
+        with pytest.raises(ValueError):
+            with m.timer("mcp_tool_calls", "greet"):
+                raise ValueError
+        text = m.render()
+        assert 'mcp_requests_total{method="tools/call"} 2' in text
+        assert 'mcp_requests_errors_total{method="tools/call"} 1' in text
+        assert 'mcp_requests_duration_seconds_bucket{method="tools/call",le="0.1"} 2' in text
+        assert 'mcp_requests_duration_seconds_bucket{method="tools/call",le="+Inf"} 2' in text
+        assert 'mcp_tool_calls_errors_total{tool="greet"} 1' in text
+        assert 'mcp_requests_in_flight{method="tools/call"} 0' in text
+    
+    def test_shards_are_merged_across_threads(self):
+        """Test counts recorded on different threads are summed"""
+        m = Metrics()
+        def record():
+            for _ in range(100):
+                with m.timer("mcp_requests", "initialize"):
+                    pass
+        threads = [threading.Thread(target=record) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert 'mcp_requests_total{method="initialize"} 400' in m.render()
+    
+    def test_merge_expositions(self):
+        """Test worker expositions are summed and gauges dropped for exited workers"""
+        workers = []
+        for calls in (2, 3):
+            m = Metrics(buckets=(0.1,))
+            for _ in range(calls):
+                with m.timer("mcp_requests", "tools/call"):
+                    pass
+            workers.append(m.render())
+        text = merge_expositions(workers)
+        assert 'mcp_requests_total{method="tools/call"} 5' in text
+        assert 'mcp_requests_duration_seconds_count{method="tools/call"} 5' in text
+        assert text.count("# TYPE mcp_requests_total counter") == 1
+        assert 'mcp_requests_in_flight{method="tools/call"} 0' in text
+        assert "mcp_requests_in_flight" not in merge_expositions(workers, counters_only=True)
+        assert merge_expositions([]) == ""
@@ -0,0 +1,122 @@
+import http.client
+import json
+import os
+import queue
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Supervisor:
+    """Prefork server in a subprocess, with its JSON log records collected"""
+
+    def __init__(self):
+        env = dict(os.environ, PREFORK="true", WORKER_PROCESSES="2", HOST="127.0.0.1", PORT="0",
+                   WORKER_HEARTBEAT_INTERVAL="0.2", SHUTDOWN_GRACE_PERIOD="2")
+        self.process = subprocess.Popen([sys.executable, os.path.join(ROOT, "src", "main.py")],
+                                        cwd=ROOT, env=env, stderr=subprocess.PIPE)
+        self.records = queue.Queue()
+        threading.Thread(target=self._collect, daemon=True).start()
+
+    def _collect(self):
+        for line in self.process.stderr:
+            try:
+                self.records.put(json.loads(line))
+            except ValueError:
+                pass
+
+    def expect(self, predicate, timeout=10):
+        """Next log record matching ``predicate``"""
+        deadline = time.monotonic() + timeout
+        while True:
+            record = self.records.get(timeout=max(0.0, deadline - time.monotonic()))
+            if predicate(record):
+                return record
+
+    def started(self, generation):
+        record = self.expect(lambda r: r["msg"].startswith("Started worker")
+                             and r["msg"].endswith(f"(generation {generation})"))
+        return int(record["msg"].split()[2])
+
+
+def greet(port):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    payload = {"jsonrpc": "2.0", "id": 1, "method": "tools/call",
+               "params": {"name": "greet", "arguments": {"name": "prefork"}}}
+    conn.request("POST", "/", json.dumps(payload), {"Content-Type": "application/json"})
+    response = conn.getresponse()
+    body = json.loads(response.read())
+    conn.close()
+    return response.status, body
+
+
+def scrape(port):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    conn.request("GET", "/metrics")
+    body = conn.getresponse().read().decode()
+    conn.close()
+    return body
+
+
+@pytest.fixture
+def supervisor():
+    supervisor = Supervisor()
+    yield supervisor
+    if supervisor.process.poll() is None:
+        supervisor.process.kill()
+        supervisor.process.wait()
+
+
+class TestPrefork:
+    """Test cases for the prefork supervisor"""
+
+    def test_restart_rollover_and_shutdown(self, supervisor):
+        """Test crashed workers come back, SIGHUP replaces them and SIGTERM drains"""
+        port = supervisor.expect(lambda r: "port" in r)["port"]
+        workers = {supervisor.started(0), supervisor.started(0)}
+        status, body = greet(port)
+        assert status == 200
+        assert "prefork" in body["result"]["content"][0]["text"]
+
+        crashed = workers.pop()
+        os.kill(crashed, signal.SIGKILL)
+        supervisor.expect(lambda r: f"Worker {crashed} exited unexpectedly" in r["msg"])
+        workers.add(supervisor.started(0))
+        assert crashed not in workers
+        assert greet(port)[0] == 200
+
+        supervisor.process.send_signal(signal.SIGHUP)
+        replacements = {supervisor.started(1), supervisor.started(1)}
+        for _ in workers:
+            record = supervisor.expect(lambda r: r["msg"].startswith("Worker") and r["msg"].endswith("stopped"))
+            assert int(record["msg"].split()[1]) in workers
+        assert greet(port)[0] == 200
+
+        supervisor.process.send_signal(signal.SIGUSR1)
+        health = [supervisor.expect(lambda r: r["msg"] == "Worker health") for _ in replacements]
+        assert {entry["pid"] for entry in health} == replacements
+        assert all(entry["generation"] == 1 and "active_connections" in entry for entry in health)
+
+        supervisor.process.send_signal(signal.SIGTERM)
+        assert supervisor.process.wait(timeout=10) == 0
+
+    def test_metrics_cover_all_workers(self, supervisor):
+        """Test /metrics on any worker reports the calls served by every worker"""
+        port = supervisor.expect(lambda r: "port" in r)["port"]
+        workers = {supervisor.started(0), supervisor.started(0)}
+        for _ in range(6):
+            assert greet(port)[0] == 200
+        os.kill(workers.pop(), signal.SIGTERM)
+        # The drained worker's counts outlive it
+        supervisor.expect(lambda r: "exited unexpectedly" in r["msg"])
+        expected = 'mcp_tool_calls_total{tool="greet"} 6'
+        deadline = time.monotonic() + 5
+        while expected not in scrape(port):
+            assert time.monotonic() < deadline
+            time.sleep(0.1)
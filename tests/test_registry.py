@@ -0,0 +1,92 @@
+import json
+import pytest
+from jsonschema.exceptions import SchemaError
+from src.tools.catalog import registry
+from src.tools.registry import InvalidToolArguments, ToolRegistry, UnknownToolError
+
+class TestToolRegistry:
+    """Test cases for the tool registry"""
+    
+    def test_catalog_lists_every_tool(self):
+        """Test both servers' tools are declared in one registry"""
+        names = [tool["name"] for tool in registry.list_tools()]
+        assert names == ["greet", "calculator", "calculator_batch", "get_weather",
+                         "calculate_bmi", "calculate_bmi_batch", "text_analyzer",
+                         "text_analyzer_stream"]
+    
+    def test_list_tools_is_cached_until_changed(self):
+        """Test tool metadata is rebuilt only when the tool set changes"""
+        tools = ToolRegistry()
+        tools.register("echo", "Echo", {"type": "object"}, lambda **kwargs: kwargs)
+        first = tools.list_tools()
+        assert tools.list_tools() is first
+        tools.register("echo2", "Echo", {"type": "object"}, lambda **kwargs: kwargs)
+        assert len(tools.list_tools()) == 2
+    
+    def test_call_sync_runs_async_handlers(self):
+        """Test coroutine tools can be called from a worker thread"""
+        result = registry.call_sync("get_weather", {"city": "Paris"})
+        assert "Weather in Paris" in result["content"][0]["text"]
+    
+    @pytest.mark.asyncio
+    async def test_call_sync_handler_from_async(self):
+        """Test plain tools can be awaited through the registry"""
+        result = await registry.call("greet", {"name": "Ada"})
+        assert result["content"][0]["text"] == "Hello, Ada! Welcome to MCP Server!"
+    
+    def test_unknown_tool(self):
+        """Test unknown tool names raise a JSON-RPC invalid params error"""
+        with pytest.raises(UnknownToolError) as excinfo:
+            registry.get("nope")
+        assert excinfo.value.code == -32602
+    
+    def test_invalid_arguments_rejected_before_dispatch(self):
+        """Test schema violations raise before the handler runs"""
+        calls = []
+        tools = ToolRegistry()
+        tools.register("add", "Add", registry.get("calculator").input_schema,
+                       lambda **kwargs: calls.append(kwargs))
+        with pytest.raises(InvalidToolArguments) as excinfo:
+            tools.call_sync("add", {"operation": "add", "a": "1", "b": 2})
+        assert excinfo.value.code == -32602
+        assert "'a'" in str(excinfo.value)
+        with pytest.raises(InvalidToolArguments):
+            tools.call_sync("add", {"operation": "modulo", "a": 1, "b": 2})
+        with pytest.raises(InvalidToolArguments):
+            tools.call_sync("add", None)
+        assert calls == []
+    
+    def test_invalid_schema_fails_first_call(self):
+        """Test a broken input schema is caught when the tool is first validated"""
+        registry = ToolRegistry()
+        registry.register("bad", "Bad", {"type": "no-such-type"}, lambda: None)
+        with pytest.raises(SchemaError):
+            registry.call_sync("bad", {})
+    
+    def test_handler_references_load_on_first_call(self):
+        """Test "module:attr" handlers are listed without importing the module"""
+        registry = ToolRegistry()
+        tool = registry.register("greet", "Greet", {"type": "object"},
+                                 "src.tools.basic_tools:BasicTools.greet")
+        assert registry.list_tools()[0]["name"] == "greet"
+        assert tool._implementation is None
+        result = registry.call_sync("greet", {"name": "Ada"})
+        assert "Ada" in result["content"][0]["text"]
+        with pytest.raises(ValueError):
+            registry.register("bad", "Bad", {"type": "object"}, "no_colon")
+    
+    def test_array_items_checked_in_bulk(self):
+        """Test typed array columns are validated, reporting the first bad index"""
+        with pytest.raises(InvalidToolArguments) as excinfo:
+            registry.call_sync("calculator_batch", {"operation": "add", "a": [1, 2.5, True], "b": [1, 2, 3]})
+        assert "'a/2'" in str(excinfo.value)
+        result = registry.call_sync("calculator_batch", {"operation": "add", "a": [1, 2.5], "b": [1, 2]})
+        assert '"results":[2,4.5]' in result["content"][0]["text"]
+    
+    def test_batch_items_fail_individually(self):
+        """Test division by zero and overflow null one item each, not the batch"""
+        result = registry.call_sync("calculator_batch", {"operation": "divide", "a": [1, 1], "b": [0, 4]})
+        assert json.loads(result["content"][0]["text"])["results"] == [None, 0.25]
+        result = registry.call_sync("calculator_batch", {"operation": "multiply", "a": [1e300, 2], "b": [1e300, 3]})
+        columns = json.loads(result["content"][0]["text"])
+        assert (columns["results"], columns["error"]) == ([None, 6], [1, 0])
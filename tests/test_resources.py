@@ -0,0 +1,178 @@
+import base64
+import http.client
+import json
+import os
+
+import pytest
+import src.dispatcher
+from src.resources.index import (
+    ResourceError, ResourceIndex, ResourceNotFound, URI_PREFIX, decode_cursor,
+)
+from src.resources.reader import read_range
+from tests.test_http import post
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    """A small DATA_DIR tree with text, binary, hidden and nested files"""
+    (tmp_path / "notes.txt").write_text("hello world", encoding="utf-8")
+    (tmp_path / "image.png").write_bytes(bytes(range(256)))
+    (tmp_path / ".secret").write_text("hidden", encoding="utf-8")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "data.json").write_text('{"a": 1}', encoding="utf-8")
+    return tmp_path
+
+
+class TestResourceIndex:
+    """Test cases for the DATA_DIR resource index"""
+
+    def test_lists_files_in_uri_order(self, data_dir):
+        """Test listing skips hidden files and includes subdirectories"""
+        index = ResourceIndex(str(data_dir))
+        resources = index.list_page()["resources"]
+        assert [r["uri"] for r in resources] == [
+            URI_PREFIX + "image.png", URI_PREFIX + "notes.txt", URI_PREFIX + "sub/data.json",
+        ]
+        assert resources[1]["mimeType"] == "text/plain"
+        assert resources[1]["size"] == 11
+
+    def test_pagination_cursor(self, data_dir):
+        """Test pages chain through nextCursor and survive files being added"""
+        index = ResourceIndex(str(data_dir), refresh_interval=0, page_size=2)
+        first = index.list_page()
+        assert len(first["resources"]) == 2
+        (data_dir / "aaa.txt").write_text("new", encoding="utf-8")
+        second = index.list_page(first["nextCursor"])
+        assert [r["uri"] for r in second["resources"]] == [URI_PREFIX + "sub/data.json"]
+        assert "nextCursor" not in second
+        with pytest.raises(ResourceError):
+            decode_cursor("not base64!")
+
+    def test_incremental_refresh(self, data_dir):
+        """Test unchanged entries are reused and changes are picked up"""
+        index = ResourceIndex(str(data_dir), refresh_interval=0)
+        index.refresh()
+        before = index.get(URI_PREFIX + "image.png")
+        (data_dir / "notes.txt").write_text("changed contents", encoding="utf-8")
+        os.remove(data_dir / "sub" / "data.json")
+        (data_dir / "extra.md").write_text("# extra", encoding="utf-8")
+        assert index.get(URI_PREFIX + "image.png") is before
+        assert index.get(URI_PREFIX + "notes.txt").size == 16
+        assert index.get(URI_PREFIX + "extra.md").size == 7
+        with pytest.raises(ResourceNotFound):
+            index.get(URI_PREFIX + "sub/data.json")
+        assert len(index) == 3
+
+    def test_refresh_is_rate_limited(self, data_dir):
+        """Test the index is not rescanned within the refresh interval"""
+        index = ResourceIndex(str(data_dir), refresh_interval=60)
+        assert len(index) == 3
+        (data_dir / "late.txt").write_text("late", encoding="utf-8")
+        assert len(index) == 3
+        # A lookup of an unknown file rescans, at most once a second
+        with pytest.raises(ResourceNotFound):
+            index.get(URI_PREFIX + "late.txt")
+        index._refreshed -= 1
+        assert index.get(URI_PREFIX + "late.txt").size == 4
+
+    def test_read_text_range(self, data_dir):
+        """Test reading a text slice reports its range"""
+        index = ResourceIndex(str(data_dir))
+        result = index.read(URI_PREFIX + "notes.txt", offset=6, length=100)
+        assert result["contents"][0]["text"] == "world"
+        assert result["_meta"] == {"offset": 6, "length": 5, "size": 11, "eof": True}
+
+    def test_read_binary_as_blob(self, data_dir):
+        """Test binary files are returned base64 encoded and capped"""
+        index = ResourceIndex(str(data_dir), max_read_bytes=16)
+        result = index.read(URI_PREFIX + "image.png", offset=32)
+        assert base64.b64decode(result["contents"][0]["blob"]) == bytes(range(32, 48))
+        assert result["_meta"]["eof"] is False
+
+    def test_read_rejects_bad_ranges(self, data_dir):
+        """Test invalid offsets and lengths are parameter errors"""
+        index = ResourceIndex(str(data_dir))
+        with pytest.raises(ResourceError):
+            index.read(URI_PREFIX + "notes.txt", offset=12)
+        with pytest.raises(ResourceError):
+            index.read(URI_PREFIX + "notes.txt", offset=-1)
+        with pytest.raises(ResourceError):
+            index.read(URI_PREFIX + "notes.txt", length="10")
+        with pytest.raises(ResourceError) as excinfo:
+            index.read(None)
+        assert excinfo.value.code == -32602
+
+    def test_paths_outside_root_are_not_found(self, data_dir):
+        """Test URIs cannot escape DATA_DIR"""
+        index = ResourceIndex(str(data_dir / "sub"))
+        for uri in (URI_PREFIX + "../notes.txt", URI_PREFIX + "%2e%2e/notes.txt", "file:///etc/passwd"):
+            with pytest.raises(ResourceNotFound):
+                index.read(uri)
+
+
+class TestReadRange:
+    """Test cases for mmap range reads"""
+
+    def test_text_range_trimmed_to_characters(self, tmp_path):
+        """Test ranges never split a UTF-8 character"""
+        path = tmp_path / "utf8.txt"
+        path.write_text("aé€b", encoding="utf-8")  # 1 + 2 + 3 + 1 bytes
+        data, start, size = read_range(str(path), 3, 2, text=True)
+        assert (data.decode("utf-8"), start, size) == ("€", 3, 7)
+        data, start, _ = read_range(str(path), 1, 4, text=True)
+        assert data.decode("utf-8") == "é"
+        assert start == 1
+        data, start, _ = read_range(str(path), 2, 5, text=True)
+        assert data.decode("utf-8") == "€b"
+        assert start == 3
+
+    def test_range_inside_one_character_is_widened(self, tmp_path):
+        """Test a range too short for any whole character still makes progress"""
+        path = tmp_path / "kanji.txt"
+        path.write_text("漢字", encoding="utf-8")
+        data, start, _ = read_range(str(path), 0, 2, text=True)
+        assert (data.decode("utf-8"), start) == ("漢", 0)
+        data, start, _ = read_range(str(path), 1, 1, text=True)
+        assert (data.decode("utf-8"), start) == ("字", 3)
+        offset, pieces = 0, []
+        while offset < 6:
+            data, start, _ = read_range(str(path), offset, 1, text=True)
+            pieces.append(data.decode("utf-8"))
+            offset = start + len(data)
+        assert pieces == ["漢", "字"]
+
+    def test_range_beyond_mmap_granularity(self, tmp_path):
+        """Test offsets that are not page aligned in large files"""
+        path = tmp_path / "big.bin"
+        payload = os.urandom(200_000)
+        path.write_bytes(payload)
+        data, start, size = read_range(str(path), 70_001, 1000)
+        assert data == payload[70_001:71_001]
+        assert (start, size) == (70_001, 200_000)
+        assert read_range(str(path), 200_000, 10)[0] == b""
+
+
+class TestHTTPResources:
+    """Test cases for resources over the HTTP transport"""
+
+    def test_list_and_read(self, http_server, data_dir, monkeypatch):
+        """Test resources/list and resources/read round trips"""
+        monkeypatch.setattr(src.dispatcher, "resource_index", ResourceIndex(str(data_dir)))
+        conn = http.client.HTTPConnection(*http_server.server_address)
+        response, body = post(conn, {"jsonrpc": "2.0", "id": 1, "method": "resources/list"})
+        assert response.status == 200
+        assert len(json.loads(body)["result"]["resources"]) == 3
+
+        response, body = post(conn, {"jsonrpc": "2.0", "id": 2, "method": "resources/read",
+                                     "params": {"uri": URI_PREFIX + "notes.txt", "length": 5}})
+        result = json.loads(body)["result"]
+        assert result["contents"][0]["text"] == "hello"
+        assert result["_meta"]["size"] == 11
+
+        response, body = post(conn, {"jsonrpc": "2.0", "id": 3, "method": "resources/read",
+                                     "params": {"uri": URI_PREFIX + "missing.txt"}})
+        assert json.loads(body)["error"]["code"] == -32002
+
+        response, body = post(conn, {"jsonrpc": "2.0", "id": 4, "method": "resources/read"})
+        assert json.loads(body)["error"]["code"] == -32602
+        conn.close()
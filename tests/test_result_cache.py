@@ -0,0 +1,55 @@
+import pytest
+from src.tools.registry import ToolRegistry
+from src.utils.result_cache import ResultCache, result_cache
+
+class TestResultCache:
+    """Test cases for the memoized tool result cache"""
+    
+    def test_key_is_canonical(self):
+        """Test argument order is ignored but value types are not"""
+        assert ResultCache.key("calculator", {"a": 1, "b": 2}) == ResultCache.key("calculator", {"b": 2, "a": 1})
+        assert ResultCache.key("calculator", {"a": 1}) != ResultCache.key("calculator", {"a": 1.0})
+        assert ResultCache.key("greet", {"name": "x"}) != ResultCache.key("calculator", {"name": "x"})
+    
+    def test_lru_eviction_by_bytes(self):
+        """Test least recently used entries are evicted to fit the byte budget"""
+        cache = ResultCache(max_bytes=1000, max_entry_bytes=1000)
+        results = {name: {"content": [{"type": "text", "text": name * 50}]} for name in "abcd"}
+        for name in "abc":
+            cache.put(name.encode(), results[name])
+        assert cache.get(b"a") is results["a"]
+        cache.put(b"d", results["d"])
+        assert cache.get(b"b") is None
+        assert cache.get(b"a") is results["a"]
+        assert cache.bytes <= 1000
+        assert cache.stats()["evictions"] == 1
+    
+    def test_oversized_results_are_not_cached(self):
+        """Test a result larger than the per-entry limit is skipped"""
+        cache = ResultCache(max_bytes=10000, max_entry_bytes=300)
+        assert not cache.put(b"k", {"content": [{"type": "text", "text": "x" * 500}]})
+        assert len(cache) == 0
+    
+    @pytest.mark.asyncio
+    async def test_registry_serves_repeats_from_cache(self):
+        """Test opted-in tools are computed once per distinct call"""
+        calls = []
+        def handler(value, flaky=False):
+            calls.append(value)
+            return {"content": [{"type": "text", "text": str(value)}], "isError": flaky}
+        registry = ToolRegistry()
+        schema = {"type": "object", "properties": {"value": {"type": "number"}, "flaky": {"type": "boolean"}}}
+        registry.register("pure", "", schema, handler, cacheable=True)
+        registry.register("impure", "", schema, handler)
+        registry.register("some", "", schema, handler, cacheable=lambda arguments: arguments["value"] > 0)
+        hits = result_cache.hits
+        first = await registry.call("pure", {"value": 1})
+        assert registry.call_sync("pure", {"value": 1}) is first
+        assert result_cache.hits == hits + 1
+        registry.call_sync("impure", {"value": 1})
+        registry.call_sync("impure", {"value": 1})
+        registry.call_sync("some", {"value": -1})
+        registry.call_sync("some", {"value": -1})
+        registry.call_sync("pure", {"value": 2, "flaky": True})
+        registry.call_sync("pure", {"value": 2, "flaky": True})
+        assert calls == [1, 1, 1, -1, -1, 2, 2]
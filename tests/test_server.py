@@ -1,15 +1,104 @@
 import pytest
 import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager
+import src.server
 from src.server import MyMCPServer
+from src.tools.executor import cancelled
+from src.tools.registry import ToolRegistry
+from src.utils.admission import AdmissionController
+
+SCHEMA = {"type": "object"}
+
+
+@asynccontextmanager
+async def stdio_session(server):
+    """Run ``server`` on in-memory streams like the ones stdio_server() yields.
+
+    Yields ``send`` and ``receive`` for raw JSON-RPC messages, after the
+    initialize handshake.
+    """
+    import anyio
+    from mcp.shared.memory import create_client_server_memory_streams
+    from mcp.shared.message import SessionMessage
+    from mcp.types import JSONRPCMessage
+
+    async with create_client_server_memory_streams() as ((client_read, client_write), server_streams):
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(server.server.run, *server_streams, server.server.create_initialization_options())
+
+            async def send(message):
+                await client_write.send(SessionMessage(JSONRPCMessage.model_validate(message)))
+
+            async def receive():
+                with anyio.fail_after(5):
+                    message = await client_read.receive()
+                return message.message.model_dump(by_alias=True, exclude_none=True)
+
+            await send({"jsonrpc": "2.0", "id": 0, "method": "initialize",
+                        "params": {"protocolVersion": "2024-11-05", "capabilities": {},
+                                   "clientInfo": {"name": "test", "version": "1.0"}}})
+            assert "result" in await receive()
+            await send({"jsonrpc": "2.0", "method": "notifications/initialized"})
+            yield send, receive
+            tg.cancel_scope.cancel()
+
 
 class TestMCPServer:
     """Test cases for MCP server"""
-    
+
     @pytest.mark.asyncio
     async def test_server_initialization(self):
         """Test server initialization"""
         server = MyMCPServer()
         assert server is not None
         assert server.server is not None
-    
-    # Add more server tests as needed
\ No newline at end of file
+
+    @pytest.mark.asyncio
+    async def test_cancelled_notification_reaches_the_worker(self, monkeypatch):
+        """Test notifications/cancelled stops a tool already running on a worker"""
+        started, stopped = threading.Event(), threading.Event()
+
+        def wait_for_cancel():
+            started.set()
+            while not cancelled():
+                time.sleep(0.01)
+            stopped.set()
+            return {"content": []}
+        tools = ToolRegistry()
+        tools.register("wait", "Wait", SCHEMA, wait_for_cancel, execution="blocking")
+        monkeypatch.setattr(src.server, "registry", tools)
+
+        async with stdio_session(MyMCPServer()) as (send, receive):
+            await send({"jsonrpc": "2.0", "id": 1, "method": "tools/call",
+                        "params": {"name": "wait", "arguments": {}}})
+            assert await asyncio.to_thread(started.wait, 5)
+            await send({"jsonrpc": "2.0", "method": "notifications/cancelled",
+                        "params": {"requestId": 1, "reason": "test"}})
+            reply = await receive()
+            assert reply["id"] == 1
+            assert "error" in reply
+            assert await asyncio.to_thread(stopped.wait, 5)
+
+    @pytest.mark.asyncio
+    async def test_rejections_are_jsonrpc_errors(self, monkeypatch):
+        """Test invalid arguments and overload come back as error codes, not error results"""
+        tools = ToolRegistry()
+        tools.register("echo", "Echo", {"type": "object", "properties": {"n": {"type": "integer"}}},
+                       lambda n=0: {"content": [{"type": "text", "text": str(n)}]})
+        monkeypatch.setattr(src.server, "registry", tools)
+        monkeypatch.setattr(src.server, "admission", AdmissionController(rate=0.001, burst=2))
+
+        async with stdio_session(MyMCPServer()) as (send, receive):
+            await send({"jsonrpc": "2.0", "id": 1, "method": "tools/call",
+                        "params": {"name": "echo", "arguments": {"n": 1}}})
+            assert (await receive())["result"]["content"][0]["text"] == "1"
+            await send({"jsonrpc": "2.0", "id": 2, "method": "tools/call",
+                        "params": {"name": "echo", "arguments": {"n": "x"}}})
+            assert (await receive())["error"]["code"] == -32602
+            await send({"jsonrpc": "2.0", "id": 3, "method": "tools/call",
+                        "params": {"name": "echo", "arguments": {}}})
+            error = (await receive())["error"]
+            assert error["code"] == -32004
+            assert error["data"]["retryAfter"] >= 1
@@ -0,0 +1,194 @@
+import asyncio
+import http.client
+import json
+import socket
+import threading
+import time
+
+import pytest
+import uvicorn
+import src.sse_server
+from config.settings import settings
+from src.sse_server import create_app
+from src.tools import example_tools
+from src.tools.registry import ToolRegistry, ToolTimeoutError
+from src.tools.streaming import Progress, collect
+
+SCHEMA = {"type": "object"}
+
+
+async def count_to(n: int = 3, delay: float = 0.0):
+    """Streaming tool: one progress report and one content item per step"""
+    for i in range(1, n + 1):
+        await asyncio.sleep(delay)
+        yield Progress(i, n)
+        yield f"line {i}\n"
+
+
+def streaming_registry(**options):
+    tools = ToolRegistry()
+    tools.register("count", "Count", SCHEMA, count_to, **options)
+    return tools
+
+
+@pytest.fixture
+def sse_server(monkeypatch):
+    """Run the streaming transport on an ephemeral port with test tools.
+
+    Yields the address and an event set when the ``slow`` tool stops.
+    """
+    closed = threading.Event()
+
+    async def slow(steps: int = 100):
+        try:
+            for i in range(steps):
+                yield Progress(i, steps)
+                await asyncio.sleep(0.05)
+            yield "finished"
+        finally:
+            closed.set()
+
+    tools = streaming_registry()
+    tools.register("slow", "Slow", SCHEMA, slow)
+    monkeypatch.setattr(src.sse_server, "registry", tools)
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    server = uvicorn.Server(uvicorn.Config(create_app(), log_config=None, lifespan="off"))
+    thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    yield sock.getsockname(), closed
+    server.should_exit = True
+    thread.join(5)
+
+
+def post_stream(address, payload):
+    conn = http.client.HTTPConnection(*address, timeout=10)
+    conn.request("POST", "/", json.dumps(payload),
+                 {"Content-Type": "application/json", "Accept": "application/json, text/event-stream"})
+    return conn, conn.getresponse()
+
+
+def read_events(response):
+    """JSON messages from the data lines of an event stream"""
+    return [json.loads(line[len(b"data: "):]) for line in response.read().splitlines()
+            if line.startswith(b"data: ")]
+
+
+class TestStreamingRegistry:
+    """Test cases for streaming tools in the registry"""
+
+    @pytest.mark.asyncio
+    async def test_stream_yields_progress_and_content(self):
+        """Test events come out in order, normalized into result fragments"""
+        events = [event async for event in streaming_registry().stream("count", {"n": 2})]
+        assert events == [
+            Progress(1, 2), {"content": [{"type": "text", "text": "line 1\n"}]},
+            Progress(2, 2), {"content": [{"type": "text", "text": "line 2\n"}]},
+        ]
+
+    @pytest.mark.asyncio
+    async def test_call_collects_streamed_content(self):
+        """Test callers that cannot stream still get the whole result"""
+        tools = streaming_registry()
+        result = await tools.call("count", {"n": 3})
+        assert [item["text"] for item in result["content"]] == ["line 1\n", "line 2\n", "line 3\n"]
+        assert tools.call_sync("count", {"n": 1}) == {"content": [{"type": "text", "text": "line 1\n"}]}
+
+    @pytest.mark.asyncio
+    async def test_non_streaming_tools_yield_once(self):
+        """Test ordinary tools come through stream() as one fragment"""
+        tools = ToolRegistry()
+        tools.register("echo", "Echo", SCHEMA, lambda **kwargs: {"content": [kwargs]})
+        reported = []
+
+        async def on_progress(progress):
+            reported.append(progress)
+        result = await collect(tools.stream("echo", {"type": "text", "text": "hi"}), on_progress)
+        assert result == {"content": [{"type": "text", "text": "hi"}]}
+        assert reported == []
+
+    @pytest.mark.asyncio
+    async def test_timeout_covers_whole_stream(self):
+        """Test a stream that runs past its timeout is stopped"""
+        tools = streaming_registry(timeout=0.1)
+        events = []
+        with pytest.raises(ToolTimeoutError):
+            async for event in tools.stream("count", {"n": 10, "delay": 0.03}):
+                events.append(event)
+        assert 0 < len(events) < 20
+
+    @pytest.mark.asyncio
+    async def test_text_analyzer_stream_reports_progress(self, tmp_path, monkeypatch):
+        """Test the streaming analyzer reports each section and merges the stats"""
+        (tmp_path / "doc.txt").write_text("one two three. " * 10, encoding="utf-8")
+        monkeypatch.setattr(settings, "DATA_DIR", str(tmp_path))
+        monkeypatch.setattr(example_tools, "STREAM_SECTION_BYTES", 64)
+        from src.tools.catalog import registry
+        progress = []
+
+        async def on_progress(report):
+            progress.append(report.progress)
+        result = await collect(registry.stream("text_analyzer_stream", {"path": "doc.txt"}), on_progress)
+        assert progress == [64, 128, 150]
+        assert "Word count: 30" in result["content"][0]["text"]
+
+
+class TestSSETransport:
+    """Test cases for the streaming HTTP transport"""
+
+    def test_streams_progress_partials_then_result(self, sse_server):
+        """Test a tools/call is answered with notifications and a final response"""
+        address, _ = sse_server
+        conn, response = post_stream(address, {
+            "jsonrpc": "2.0", "id": 7, "method": "tools/call",
+            "params": {"name": "count", "arguments": {"n": 2},
+                       "_meta": {"progressToken": "tok", "partialResults": True}}})
+        assert response.status == 200
+        assert response.getheader("Content-Type").startswith("text/event-stream")
+        events = read_events(response)
+        assert [e.get("method") for e in events] == [
+            "notifications/progress", "notifications/tools/partial",
+            "notifications/progress", "notifications/tools/partial", None]
+        assert events[0]["params"] == {"progressToken": "tok", "progress": 1, "total": 2}
+        assert events[1]["params"]["content"] == [{"type": "text", "text": "line 1\n"}]
+        assert events[-1] == {"jsonrpc": "2.0", "id": 7, "result": {"content": []}}
+        conn.close()
+
+    def test_final_result_carries_content_by_default(self, sse_server):
+        """Test clients that did not ask for partials get the content in the response"""
+        address, _ = sse_server
+        conn, response = post_stream(address, {
+            "jsonrpc": "2.0", "id": 1, "method": "tools/call",
+            "params": {"name": "count", "arguments": {"n": 2}}})
+        events = read_events(response)
+        assert len(events) == 1
+        assert [item["text"] for item in events[0]["result"]["content"]] == ["line 1\n", "line 2\n"]
+        conn.close()
+
+    def test_other_requests_answered_as_json(self, sse_server):
+        """Test non-streamed requests go through the threaded transport's dispatcher"""
+        address, _ = sse_server
+        conn = http.client.HTTPConnection(*address, timeout=10)
+        conn.request("POST", "/", json.dumps({"jsonrpc": "2.0", "id": 1, "method": "initialize"}),
+                     {"Content-Type": "application/json"})
+        response = conn.getresponse()
+        assert response.getheader("Content-Type") == "application/json"
+        assert json.loads(response.read())["result"]["serverInfo"]["name"] == "my-mcp-server"
+        conn.request("POST", "/", "{nope", {"Content-Type": "application/json"})
+        assert json.loads(conn.getresponse().read())["error"]["code"] == -32700
+        conn.close()
+
+    def test_disconnect_cancels_the_tool(self, sse_server):
+        """Test closing the connection mid-stream stops the tool"""
+        address, closed = sse_server
+        conn, response = post_stream(address, {
+            "jsonrpc": "2.0", "id": 1, "method": "tools/call",
+            "params": {"name": "slow", "arguments": {}, "_meta": {"progressToken": 1}}})
+        assert response.readline().startswith(b"data: ")
+        assert not closed.is_set()
+        conn.sock.shutdown(socket.SHUT_RDWR)
+        conn.close()
+        # The whole run would take 5s; the tool's finally block runs well before
+        assert closed.wait(2)
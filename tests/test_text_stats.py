@@ -0,0 +1,76 @@
+import random
+import pytest
+from src.tools.text_stats import TextStats, analyze_chunks, analyze_file, analyze_text
+
+SAMPLE = "Héllo  wörld. This is\ta tést!\n Ünïcode ☃ snow? end"
+
+
+def reference(text):
+    words = text.split()
+    return len(text), len(words), text.count(".") + text.count("!") + text.count("?")
+
+
+class TestTextStats:
+    """Test cases for the streaming text statistics engine"""
+    
+    def test_matches_reference_counts(self):
+        """Test counts agree with str.split/len/count"""
+        stats = analyze_text(SAMPLE)
+        assert (stats.chars, stats.words, stats.sentences) == reference(SAMPLE)
+        assert stats.average_word_length == pytest.approx(
+            sum(len(w) for w in SAMPLE.split()) / len(SAMPLE.split()))
+    
+    @pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 8, 13])
+    def test_chunk_boundaries(self, chunk_size):
+        """Test splitting the byte stream anywhere, even inside a character"""
+        data = SAMPLE.encode("utf-8")
+        chunks = [data[i:i + chunk_size] for i in range(0, len(data), chunk_size)]
+        stats = analyze_chunks(chunks)
+        assert (stats.chars, stats.words, stats.sentences) == reference(SAMPLE)
+    
+    def test_merge_partial_counts(self):
+        """Test merging independently computed ranges counts split words once"""
+        data = SAMPLE.encode("utf-8")
+        for cut in range(len(data) + 1):
+            stats = TextStats().feed(data[:cut]).merge(TextStats().feed(data[cut:]))
+            assert (stats.chars, stats.words, stats.sentences) == reference(SAMPLE)
+    
+    def test_unicode_whitespace_splits_words(self):
+        """Test every character str.split() splits on separates words, even across chunks"""
+        spaces = [chr(c) for c in range(0x80, 0x110000) if chr(c).isspace()]
+        text = "x".join(spaces) + " \x1c\x1fend"
+        assert (analyze_text(text).chars, analyze_text(text).words) == reference(text)[:2]
+        rng = random.Random(3)
+        text = "".join(rng.choice(["wörd", "漢字", ".", "\u00a0", "\u2003", "\u0085", "\u3000", " "])
+                       for _ in range(2000))
+        data = text.encode("utf-8")
+        for chunk_size in (1, 2, 5, 64):
+            stats = analyze_chunks(data[i:i + chunk_size] for i in range(0, len(data), chunk_size))
+            assert (stats.chars, stats.words, stats.sentences) == reference(text)
+    
+    def test_whitespace_only(self):
+        """Test input without words does not divide by zero"""
+        stats = analyze_text(" \n\t ")
+        assert stats.words == 0
+        assert stats.average_word_length == 0.0
+    
+    @pytest.mark.asyncio
+    async def test_parallel_file_analysis(self, tmp_path):
+        """Test the split file path agrees with the sequential one"""
+        rng = random.Random(7)
+        text = " ".join(rng.choice(["alpha", "β-ray", "end.", "why?", "", "\n", "\u3000", "a\u00a0b"])
+                        for _ in range(20000))
+        path = tmp_path / "sample.txt"
+        path.write_text(text, encoding="utf-8")
+        sequential = await analyze_file(str(path))
+        parallel = await analyze_file(str(path), parts=3, parallel_threshold=0)
+        assert (parallel.chars, parallel.words, parallel.sentences) == reference(text)
+        assert (sequential.chars, sequential.words, sequential.word_chars) == \
+            (parallel.chars, parallel.words, parallel.word_chars)
+    
+    @pytest.mark.asyncio
+    async def test_empty_file(self, tmp_path):
+        """Test an empty file yields zero counts"""
+        path = tmp_path / "empty.txt"
+        path.write_bytes(b"")
+        assert (await analyze_file(str(path))).chars == 0
@@ -1,5 +1,7 @@
 import pytest
 import asyncio
+import json
+from config.settings import settings
 from src.tools.example_tools import ExampleTools
 
 class TestExampleTools:
@@ -31,6 +33,31 @@ class TestExampleTools:
         result = await ExampleTools.calculate_bmi(0, 175)
         assert "Error" in result["content"][0]["text"]
     
+    @pytest.mark.asyncio
+    async def test_calculate_bmi_batch(self):
+        """Test batch BMI returns columns with an error mask"""
+        result = await ExampleTools.calculate_bmi_batch([70, 0, 120], [175, 175, 170])
+        columns = json.loads(result["content"][0]["text"])
+        assert columns["bmi"] == [22.86, None, 41.52]
+        assert [columns["categories"][c] if c is not None else None for c in columns["category"]] == \
+            ["Normal weight", None, "Obese"]
+        assert columns["error"] == [0, 1, 0]
+    
+    @pytest.mark.asyncio
+    async def test_calculate_bmi_batch_bad_rows(self):
+        """Test rows that underflow or overflow are masked without failing the batch"""
+        result = await ExampleTools.calculate_bmi_batch([70, 70, 1e308], [1e-200, 175, 1e-5])
+        columns = json.loads(result["content"][0]["text"])
+        assert columns["bmi"] == [None, 22.86, None]
+        assert columns["category"] == [None, 1, None]
+        assert columns["error"] == [1, 0, 1]
+    
+    @pytest.mark.asyncio
+    async def test_calculate_bmi_batch_length_mismatch(self):
+        """Test batch BMI rejects columns of different lengths"""
+        result = await ExampleTools.calculate_bmi_batch([70], [175, 180])
+        assert "Error" in result["content"][0]["text"]
+    
     @pytest.mark.asyncio
     async def test_text_analyzer_success(self):
         """Test successful text analysis"""
@@ -43,4 +70,20 @@ class TestExampleTools:
     async def test_text_analyzer_empty_text(self):
         """Test text analysis with empty text"""
         result = await ExampleTools.text_analyzer("")
-        assert "Error" in result["content"][0]["text"]
\ No newline at end of file
+        assert "Error" in result["content"][0]["text"]
+    
+    @pytest.mark.asyncio
+    async def test_text_analyzer_whitespace_only(self):
+        """Test text analysis of whitespace-only text"""
+        result = await ExampleTools.text_analyzer("   \n ")
+        assert "Word count: 0" in result["content"][0]["text"]
+    
+    @pytest.mark.asyncio
+    async def test_text_analyzer_path_outside_data_dir(self, tmp_path, monkeypatch):
+        """Test file analysis refuses paths outside DATA_DIR"""
+        monkeypatch.setattr(settings, "DATA_DIR", str(tmp_path))
+        (tmp_path / "doc.txt").write_text("One two. Three!")
+        result = await ExampleTools.text_analyzer(path="doc.txt")
+        assert "Word count: 3" in result["content"][0]["text"]
+        result = await ExampleTools.text_analyzer(path="../etc/passwd")
+        assert "Error" in result["content"][0]["text"]
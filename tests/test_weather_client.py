@@ -0,0 +1,138 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from src.tools.weather_client import WeatherClient
+
+
+class StandInProvider(BaseHTTPRequestHandler):
+    """Local stand-in for the weather provider that counts hits"""
+    hits = 0
+    delay = 0.0
+
+    def do_GET(self):
+        type(self).hits += 1
+        time.sleep(self.delay)
+        city = parse_qs(urlparse(self.path).query)["city"][0]
+        body = json.dumps({"city": city, "temperature": "18°C", "conditions": "Cloudy",
+                           "humidity": "70%"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def provider():
+    StandInProvider.hits = 0
+    StandInProvider.delay = 0.0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInProvider)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield StandInProvider, f"http://127.0.0.1:{server.server_address[1]}/current"
+    server.shutdown()
+    server.server_close()
+
+
+class TestWeatherClient:
+    """Test cases for the upstream weather client"""
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_are_coalesced(self, provider):
+        """Test 100 concurrent lookups for one city make one upstream call"""
+        handler, url = provider
+        handler.delay = 0.1
+        client = WeatherClient(url)
+        results = await asyncio.gather(*(client.get("London") for _ in range(100)))
+        assert handler.hits == 1
+        assert all(result["conditions"] == "Cloudy" for result in results)
+        await client.aclose()
+    
+    @pytest.mark.asyncio
+    async def test_cache_key_is_normalized(self, provider):
+        """Test case and spacing variants share a cache entry"""
+        handler, url = provider
+        client = WeatherClient(url)
+        await client.get("New York")
+        await client.get("  new   YORK ")
+        assert handler.hits == 1
+        await client.aclose()
+    
+    @pytest.mark.asyncio
+    async def test_stale_entry_served_while_refreshing(self, provider):
+        """Test an expired entry is returned immediately and refreshed behind"""
+        handler, url = provider
+        client = WeatherClient(url, ttl=0.0, stale_ttl=60)
+        await client.get("Oslo")
+        handler.delay = 0.2
+        started = time.monotonic()
+        await client.get("Oslo")
+        assert time.monotonic() - started < 0.1
+        await asyncio.sleep(0.4)
+        assert handler.hits == 2
+        await client.aclose()
+    
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self, provider):
+        """Test the cache holds at most max_entries cities"""
+        handler, url = provider
+        client = WeatherClient(url, max_entries=2)
+        for city in ("A", "B", "C", "A"):
+            await client.get(city)
+        assert handler.hits == 4
+        await client.aclose()
+    
+    @pytest.mark.asyncio
+    async def test_each_loop_keeps_its_own_pool(self, provider):
+        """Test calls from another loop neither drop nor share this loop's connections"""
+        handler, url = provider
+        client = WeatherClient(url, ttl=0.0, stale_ttl=0.0)
+        await client.get("Rome")
+        pooled = client._state().client
+        other = asyncio.new_event_loop()
+        thread = threading.Thread(target=other.run_forever, daemon=True)
+        thread.start()
+        try:
+            await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(client.get("Rome"), other))
+            await client.get("Rome")
+            assert client._state().client is pooled
+            assert len(client._loops) == 2
+            await client.aclose()
+            assert all(state.client is None for state in client._loops.values())
+        finally:
+            other.call_soon_threadsafe(other.stop)
+            thread.join(5)
+            other.close()
+        assert handler.hits == 3
+    
+    @pytest.mark.asyncio
+    async def test_cache_shared_across_loops(self, provider):
+        """Test loops on different threads can hit and evict the cache together"""
+        handler, url = provider
+        client = WeatherClient(url, max_entries=4)
+        cities = [f"City {i}" for i in range(8)]
+        other = asyncio.new_event_loop()
+        thread = threading.Thread(target=other.run_forever, daemon=True)
+        thread.start()
+        
+        async def lookups():
+            for _ in range(10):
+                for city in cities:
+                    await client.get(city)
+        try:
+            there = asyncio.run_coroutine_threadsafe(lookups(), other)
+            await lookups()
+            await asyncio.wrap_future(there)
+            assert len(client._cache) <= 4
+            await client.aclose()
+        finally:
+            other.call_soon_threadsafe(other.stop)
+            thread.join(5)
+            other.close()